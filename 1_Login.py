@@ -1,22 +1,13 @@
 # 1_Login.py
 import streamlit as st
 import utils
-import base64 # Biblioteca para codificar a imagem
+import ativos
 
 st.set_page_config(page_title="Login - Rocker Equipamentos", layout="centered")
 
-# --- FUNÇÃO PARA CARREGAR E CODIFICAR A IMAGEM ---
-def get_image_as_base64(path):
-    try:
-        with open(path, "rb") as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-    except FileNotFoundError:
-        return None
-
-# Carrega a imagem da logo
-logo_path = "assets/logo.png"
-logo_base64 = get_image_as_base64(logo_path)
+# Logo servido pela pasta static/ (lido do disco uma vez por processo; veja ativos.py)
+logo_src = utils.src_imagem("logo")
+logo = ativos.obter("logo")
 
 # --- ESTILOS CSS PARA APLICAR A FONTE POPPINS E AJUSTAR TAMANHOS ---
 st.markdown(
@@ -41,9 +32,12 @@ st.markdown(
 )
 
 # --- CABEÇALHO CENTRALIZADO COM LOGO E TÍTULO ---
-if logo_base64:
+if logo_src:
+    # Com a altura já no <img>, a página não "pula" quando a imagem termina de carregar.
+    altura_logo = logo.altura_proporcional(500)
     st.markdown(
-        f'<img src="data:image/png;base64,{logo_base64}" alt="Rocker Equipamentos Logo" class="centered-image" width="500">',
+        f'<img src="{logo_src}" alt="Rocker Equipamentos Logo" class="centered-image" width="500"'
+        + (f' height="{altura_logo}"' if altura_logo else '') + '>',
         unsafe_allow_html=True
     )
 
@@ -66,8 +60,8 @@ with st.form("login_form"):
     if submitted:
         # Conexão com o banco de dados de usuários movida para dentro da submissão
         try:
-            drive = utils.login_gdrive()
-            users_file = utils.get_database_file(drive, "users.json")
+            banco = utils.conectar_banco()
+            users_file = utils.get_database_file(banco, "users.json")
             users_data = utils.read_data(users_file)
             
             usuario_encontrado = None
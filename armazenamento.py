@@ -0,0 +1,1353 @@
+# armazenamento.py
+# Backends de armazenamento do banco de dados do app. Todos guardam os mesmos
+# "arquivos" lógicos (clients.json, contracts.json, invoices.json, config.json,
+# users.json) e expõem a mesma interface, usada pelas funções read_data,
+# write_data, inserir_registro etc. de utils.py:
+#
+# - ArmazenamentoDrive: arquivos no Google Drive (PyDrive2), o backend original.
+#   Fica em armazenamento_drive.py para que o PyDrive2 e o cliente da API do
+#   Google só sejam importados quando o backend do Drive é usado.
+# - ArmazenamentoLocal: arquivos numa pasta local (uso offline e benchmarks).
+# - ArmazenamentoSQLite: banco SQLite com índices nos campos usados em filtros.
+# - ArmazenamentoParticionado: contratos e faturas em um arquivo por mês.
+# - FilaDeEscrita: camada write-behind sobre qualquer um dos anteriores.
+import contextlib
+import gzip
+import hashlib
+import importlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+
+# Coleções (listas de registros) e o campo que identifica cada registro.
+# Os demais arquivos (config.json, users.json) são gravados sempre inteiros.
+CHAVES_COLECOES = {
+    "clients.json": "id",
+    "contracts.json": "id_contrato",
+    "invoices.json": "id_fatura",
+}
+
+# --- FORMATO DOS ARQUIVOS (storage_format) ---
+# "json-indent" é o formato original (JSON indentado). "json" é JSON compacto,
+# "json-gzip"/"json-zstd" são JSON compacto comprimido e "msgpack" é binário.
+# A leitura reconhece qualquer um deles pelo conteúdo, então arquivos antigos
+# continuam legíveis e a troca de formato pode ser feita aos poucos.
+FORMATOS = ("json-indent", "json", "json-gzip", "json-zstd", "msgpack")
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_GZIP_MAGIC = b'\x1f\x8b'
+
+def _importar_opcional(modulo, formato):
+    try:
+        return importlib.import_module(modulo)
+    except ImportError:
+        raise RuntimeError(f"O formato '{formato}' precisa do pacote '{modulo}' instalado.")
+
+def serializar(data, formato):
+    if formato == "json-indent":
+        return json.dumps(data, indent=4, ensure_ascii=False).encode('utf-8')
+    if formato == "msgpack":
+        return _importar_opcional("msgpack", formato).packb(data, use_bin_type=True)
+    compacto = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if formato == "json":
+        return compacto
+    if formato == "json-gzip":
+        # mtime fixo: o mesmo conteúdo gera os mesmos bytes (e o mesmo md5).
+        return gzip.compress(compacto, mtime=0)
+    if formato == "json-zstd":
+        return _importar_opcional("zstandard", formato).ZstdCompressor(level=10).compress(compacto)
+    raise ValueError(f"Formato de armazenamento desconhecido: '{formato}'. Use um de {FORMATOS}.")
+
+def desserializar(conteudo):
+    if not conteudo.strip():
+        return []
+    if conteudo.startswith(_GZIP_MAGIC):
+        return json.loads(gzip.decompress(conteudo))
+    if conteudo.startswith(_ZSTD_MAGIC):
+        return json.loads(_importar_opcional("zstandard", "json-zstd").ZstdDecompressor().decompress(conteudo))
+    if conteudo.lstrip(b' \t\r\n\xef\xbb\xbf')[:1] in (b'[', b'{'):
+        return json.loads(conteudo.decode('utf-8-sig'))
+    return _importar_opcional("msgpack", "msgpack").unpackb(conteudo, raw=False)
+
+
+# Campo de data de cada coleção, usado nas consultas por período
+# (periodo=(inicio, fim), datas ISO inclusivas) e no particionamento.
+CAMPOS_PERIODO = {
+    "contracts.json": "data_geracao",
+    "invoices.json": "data_emissao",
+}
+
+def _intervalo(periodo):
+    inicio, fim = periodo
+    return str(inicio)[:10], str(fim)[:10]
+
+def filtrar_registros(registros, nome, filtros=None, ordenar_por=None, decrescente=False, periodo=None):
+    if filtros:
+        registros = [r for r in registros if all(r.get(campo) == valor for campo, valor in filtros.items())]
+    if periodo:
+        campo = CAMPOS_PERIODO[nome]
+        inicio, fim = _intervalo(periodo)
+        registros = [r for r in registros if inicio <= str(r.get(campo) or '')[:10] <= fim]
+    if ordenar_por:
+        registros.sort(key=lambda r: r.get(ordenar_por) or '', reverse=decrescente)
+    return registros
+
+
+class Colecao:
+    """Referência a um arquivo lógico do banco dentro de um backend."""
+
+    def __init__(self, armazenamento, nome, ref=None):
+        self.armazenamento = armazenamento
+        self.nome = nome
+        self.ref = ref  # específico do backend (arquivo do Drive, caminho local...)
+
+    @property
+    def chave(self):
+        return CHAVES_COLECOES.get(self.nome)
+
+
+class Armazenamento:
+    """Interface comum dos backends.
+
+    As implementações padrão de inserir/atualizar/excluir/consultar/contar
+    leem a coleção inteira e filtram em Python; os backends sobrescrevem o que
+    conseguem fazer melhor.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    def abrir(self, nome):
+        raise NotImplementedError
+
+    def ler(self, colecao):
+        raise NotImplementedError
+
+    def gravar(self, colecao, dados):
+        raise NotImplementedError
+
+    def inserir(self, colecao, registro):
+        with self._lock:
+            dados = self.ler(colecao)
+            dados.append(registro)
+            self.gravar(colecao, dados)
+
+    def atualizar(self, colecao, id_registro, alteracoes):
+        with self._lock:
+            dados = self.ler(colecao)
+            for registro in dados:
+                if registro.get(colecao.chave) == id_registro:
+                    registro.update(alteracoes)
+                    break
+            self.gravar(colecao, dados)
+
+    def excluir(self, colecao, id_registro):
+        with self._lock:
+            dados = self.ler(colecao)
+            self.gravar(colecao, [r for r in dados if r.get(colecao.chave) != id_registro])
+
+    def consultar(self, colecao, filtros=None, ordenar_por=None, decrescente=False, periodo=None):
+        return filtrar_registros(self.ler(colecao), colecao.nome, filtros, ordenar_por, decrescente, periodo)
+
+    def contar(self, colecao, filtros=None, periodo=None):
+        return len(self.consultar(colecao, filtros, periodo=periodo))
+
+    def aplicar_operacoes(self, colecao, operacoes):
+        """Aplica uma sequência de operações no formato do journal com uma gravação só.
+
+        Além de insert/update/delete, aceita {'op': 'replace', 'dados': ...}
+        (a coleção inteira, como em gravar). É o que a FilaDeEscrita usa para
+        enviar de uma vez as alterações acumuladas de um arquivo.
+        """
+        with self._lock:
+            if colecao.chave is None:
+                # Arquivos que não são coleções só são gravados inteiros.
+                self.gravar(colecao, operacoes[-1]['dados'])
+                return
+            base = [] if _tem_substituicao(operacoes) else self.ler(colecao)
+            self.gravar(colecao, aplicar_journal(base, operacoes, colecao.chave))
+
+    def reservar_numeros(self, nome, campo, quantidade=1):
+        """Soma 'quantidade' ao contador 'campo' do arquivo 'nome' e devolve o primeiro número reservado.
+
+        Esta versão só é atômica dentro do processo; os backends sobrescrevem
+        com uma operação atômica entre processos.
+        """
+        with self._lock:
+            colecao = self.abrir(nome)
+            dados = _como_contadores(self.ler(colecao))
+            primeiro = dados.get(campo, 0) + 1
+            dados[campo] = primeiro + quantidade - 1
+            self.gravar(colecao, dados)
+            return primeiro
+
+    def versao(self, colecao, revalidar=False):
+        """Identifica o conteúdo atual da coleção (muda a cada gravação); None se o backend não souber.
+
+        Serve para caches derivados dos dados (índices de busca) saberem se
+        ainda valem. Não faz requisição: reflete a última leitura/gravação
+        deste processo. Com 'revalidar', backends remotos conferem a versão
+        no servidor (uma consulta leve, sem baixar o conteúdo), e alterações
+        de outras instâncias aparecem.
+        """
+        return None
+
+    def estatisticas(self):
+        return {}
+
+
+class ArmazenamentoEmArquivos(Armazenamento):
+    """Base dos backends que guardam cada arquivo lógico como um arquivo (Drive, pasta local).
+
+    Cuida do formato de serialização e do modo journal. As subclasses só
+    precisam abrir, ler e gravar bytes.
+
+    No modo journal, cada inserção/alteração/exclusão vira uma linha pequena
+    em '<colecao>.journal.jsonl' em vez de regravar a coleção inteira. A
+    leitura aplica o journal sobre o snapshot e, quando o journal passa de
+    'journal_max_entradas' linhas, ele é compactado no snapshot. As operações
+    são idempotentes (inserção com ID existente substitui o registro), então
+    reaplicar um journal já compactado não duplica nada.
+    """
+
+    def __init__(self, formato="json-indent", journal=False, journal_max_entradas=200):
+        super().__init__()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de armazenamento desconhecido: '{formato}'. Use um de {FORMATOS}.")
+        self.formato = formato
+        self.journal = journal
+        self.journal_max_entradas = journal_max_entradas
+
+    def _ler_bytes(self, colecao):
+        raise NotImplementedError
+
+    def _enviar_bytes(self, colecao, conteudo):
+        raise NotImplementedError
+
+    def _anexar_linhas(self, colecao, conteudo):
+        """Acrescenta linhas ao fim do arquivo e devolve quantas linhas ele passou a ter."""
+        # Sem acréscimo de verdade, o arquivo é lido e regravado inteiro; a
+        # gravação é condicionada à versão lida para não apagar as linhas que
+        # outro processo acrescentou no meio do caminho.
+        def acrescentar(atual):
+            if atual and not atual.endswith(b'\n'):
+                # Última linha cortada por uma queda: as novas começam numa linha própria.
+                return atual + b'\n' + conteudo
+            return atual + conteudo
+        return self._alterar_se_versao(colecao, acrescentar).count(b'\n')
+
+    def ler(self, colecao):
+        dados = desserializar(self._ler_bytes(colecao))
+        if self._usa_journal(colecao):
+            dados = aplicar_journal(dados, self._ler_journal(colecao), colecao.chave)
+        return dados
+
+    def gravar(self, colecao, dados):
+        with self._lock:
+            self._enviar_bytes(colecao, serializar(dados, self.formato))
+            if self._usa_journal(colecao):
+                # O snapshot gravado já contém tudo; o journal recomeça vazio.
+                journal = self._abrir_journal(colecao)
+                if self._ler_bytes(journal):
+                    self._enviar_bytes(journal, b'')
+
+    def inserir(self, colecao, registro):
+        if not self._usa_journal(colecao):
+            return super().inserir(colecao, registro)
+        self._registrar_operacao(colecao, {'op': 'insert', 'id': registro[colecao.chave], 'registro': registro})
+
+    def atualizar(self, colecao, id_registro, alteracoes):
+        if not self._usa_journal(colecao):
+            return super().atualizar(colecao, id_registro, alteracoes)
+        self._registrar_operacao(colecao, {'op': 'update', 'id': id_registro, 'alteracoes': alteracoes})
+
+    def excluir(self, colecao, id_registro):
+        if not self._usa_journal(colecao):
+            return super().excluir(colecao, id_registro)
+        self._registrar_operacao(colecao, {'op': 'delete', 'id': id_registro})
+
+    def aplicar_operacoes(self, colecao, operacoes):
+        if not self._usa_journal(colecao) or _tem_substituicao(operacoes):
+            return super().aplicar_operacoes(colecao, operacoes)
+        # Modo journal: todas as operações vão num único acréscimo ao journal.
+        linhas = b''.join(json.dumps(entrada, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+                          for entrada in operacoes)
+        self._registrar_linhas(colecao, linhas)
+
+    def _ler_com_versao(self, colecao):
+        """Conteúdo atual e um identificador da versão lida, para _gravar_se_versao."""
+        raise NotImplementedError
+
+    def _gravar_se_versao(self, colecao, conteudo, versao):
+        """Grava só se o arquivo ainda estiver na 'versao' lida; devolve se gravou."""
+        raise NotImplementedError
+
+    def _alterar_se_versao(self, colecao, alterar):
+        """Grava alterar(conteúdo atual) e devolve o que ficou gravado no arquivo.
+
+        Compare-and-swap: lê o conteúdo com a versão, grava condicionado a ela
+        e repete se outro processo gravou no meio do caminho.
+        """
+        for tentativa in range(TENTATIVAS_CAS):
+            atual, versao = self._ler_com_versao(colecao)
+            novo = alterar(atual)
+            if novo == atual or self._gravar_se_versao(colecao, novo, versao):
+                return novo
+            time.sleep(random.uniform(0.05, 0.2) * (tentativa + 1))
+        raise ConflitoDeVersao(f"Não foi possível gravar {colecao.nome}: o arquivo mudou em todas as {TENTATIVAS_CAS} tentativas.")
+
+    def reservar_numeros(self, nome, campo, quantidade=1):
+        primeiro = None
+        def reservar(conteudo):
+            nonlocal primeiro
+            dados = _como_contadores(desserializar(conteudo))
+            primeiro = dados.get(campo, 0) + 1
+            dados[campo] = primeiro + quantidade - 1
+            return serializar(dados, self.formato)
+        self._alterar_se_versao(self.abrir(nome), reservar)
+        return primeiro
+
+    def compactar_journal(self, colecao):
+        """Incorpora o journal ao snapshot da coleção e esvazia o journal."""
+        # Os dois passos são compare-and-swap: se outro processo compactou ou
+        # acrescentou linhas no meio do caminho, nada do que ele gravou se perde.
+        journal = self._abrir_journal(colecao)
+        incorporado = b''
+        def incorporar(snapshot):
+            nonlocal incorporado
+            incorporado = self._ler_com_versao(journal)[0]
+            dados = aplicar_journal(desserializar(snapshot), _entradas_journal(incorporado), colecao.chave)
+            return serializar(dados, self.formato)
+        with self._lock:
+            self._alterar_se_versao(colecao, incorporar)
+            # Tira do journal só as linhas incorporadas; as acrescentadas depois ficam.
+            self._alterar_se_versao(journal, lambda atual: atual[len(incorporado):] if atual.startswith(incorporado) else atual)
+
+    def migrar_formato(self, formato, arquivos=None):
+        """Regrava os arquivos no formato indicado e devolve {arquivo: (bytes_antes, bytes_depois)}."""
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de armazenamento desconhecido: '{formato}'. Use um de {FORMATOS}.")
+        resultado = {}
+        with self._lock:
+            for nome in arquivos or [*CHAVES_COLECOES, "config.json"]:
+                colecao = self.abrir(nome)
+                antes = self._ler_bytes(colecao)
+                depois = serializar(desserializar(antes), formato)
+                if depois != antes:
+                    self._enviar_bytes(colecao, depois)
+                resultado[nome] = (len(antes), len(depois))
+        return resultado
+
+    def versao(self, colecao, revalidar=False):
+        versoes = [self._versao_arquivo(colecao, revalidar)]
+        if self._usa_journal(colecao):
+            versoes.append(self._versao_arquivo(self._abrir_journal(colecao), revalidar))
+        return None if None in versoes else tuple(versoes)
+
+    def _versao_arquivo(self, colecao, revalidar=False):
+        return None
+
+    def _usa_journal(self, colecao):
+        return self.journal and colecao.chave is not None
+
+    def _abrir_journal(self, colecao):
+        return self.abrir(colecao.nome.replace('.json', '.journal.jsonl'))
+
+    def _ler_journal(self, colecao):
+        return _entradas_journal(self._ler_bytes(self._abrir_journal(colecao)))
+
+    def _registrar_operacao(self, colecao, entrada):
+        self._registrar_linhas(colecao, json.dumps(entrada, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+
+    def _registrar_linhas(self, colecao, linhas):
+        with self._lock:
+            if self._anexar_linhas(self._abrir_journal(colecao), linhas) >= self.journal_max_entradas:
+                self.compactar_journal(colecao)
+
+
+def _entradas_journal(conteudo):
+    entradas = []
+    for linha in conteudo.splitlines():
+        if not linha.strip():
+            continue
+        try:
+            entradas.append(json.loads(linha))
+        except ValueError:
+            # Linha cortada por uma queda no meio do acréscimo: a gravação
+            # nunca foi confirmada a quem a pediu, então é descartada.
+            continue
+    return entradas
+
+def aplicar_journal(dados, entradas, chave):
+    posicoes = {registro.get(chave): i for i, registro in enumerate(dados)}
+    removidos = set()
+    for entrada in entradas:
+        if entrada['op'] == 'replace':
+            # Coleção regravada inteira: o que veio antes deixa de valer.
+            dados = list(entrada['dados'])
+            posicoes = {registro.get(chave): i for i, registro in enumerate(dados)}
+            removidos = set()
+            continue
+        id_registro = entrada['id']
+        if entrada['op'] == 'insert':
+            if id_registro in posicoes:
+                dados[posicoes[id_registro]] = entrada['registro']
+            else:
+                posicoes[id_registro] = len(dados)
+                dados.append(entrada['registro'])
+            removidos.discard(id_registro)
+        elif entrada['op'] == 'update':
+            if id_registro in posicoes and id_registro not in removidos:
+                dados[posicoes[id_registro]].update(entrada['alteracoes'])
+        elif entrada['op'] == 'delete':
+            if id_registro in posicoes:
+                removidos.add(id_registro)
+    if removidos:
+        dados = [registro for registro in dados if registro.get(chave) not in removidos]
+    return dados
+
+
+def _tem_substituicao(operacoes):
+    return any(entrada['op'] == 'replace' for entrada in operacoes)
+
+
+TENTATIVAS_CAS = 8
+
+class ConflitoDeVersao(RuntimeError):
+    """O arquivo foi alterado por outro processo em todas as tentativas de gravação condicional."""
+
+def _como_contadores(dados):
+    # config.json nasce como '[]' (igual aos outros arquivos); trata como vazio.
+    return dados if isinstance(dados, dict) else {}
+
+
+# --- PASTA LOCAL ---
+class ArmazenamentoLocal(ArmazenamentoEmArquivos):
+    """Cada arquivo lógico é um arquivo em 'pasta'. O journal é anexado de verdade (O(alteração))."""
+
+    def __init__(self, pasta, **opcoes):
+        super().__init__(**opcoes)
+        self.pasta = pasta
+        os.makedirs(pasta, exist_ok=True)
+        self._linhas_journal = {}
+
+    def abrir(self, nome):
+        caminho = os.path.join(self.pasta, nome)
+        if not os.path.exists(caminho):
+            # Criação exclusiva: outro processo pode ter acabado de criar (e
+            # gravar) o arquivo, e ele não pode ser trocado por um vazio.
+            with contextlib.suppress(FileExistsError), open(caminho, 'xb') as f:
+                f.write(b'' if nome.endswith('.jsonl') else b'[]')
+        return Colecao(self, nome, caminho)
+
+    def _ler_bytes(self, colecao):
+        with open(colecao.ref, 'rb') as f:
+            return f.read()
+
+    def _enviar_bytes(self, colecao, conteudo):
+        # Grava num temporário e troca de uma vez: leitores nunca veem arquivo pela metade.
+        # Um temporário por processo e thread, para que gravações simultâneas não se atropelem.
+        temporario = f"{colecao.ref}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, colecao.ref)
+        self._linhas_journal.pop(colecao.ref, None)
+
+    def _ler_com_versao(self, colecao):
+        conteudo = self._ler_bytes(colecao)
+        return conteudo, hashlib.md5(conteudo).hexdigest()
+
+    def _versao_arquivo(self, colecao, revalidar=False):
+        # Cada gravação troca o arquivo (os.replace, novo inode); o journal cresce.
+        try:
+            info = os.stat(colecao.ref)
+        except OSError:
+            return None
+        return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+    def _gravar_se_versao(self, colecao, conteudo, versao):
+        with self._lock, _trava_arquivo(f"{colecao.ref}.lock"):
+            if hashlib.md5(self._ler_bytes(colecao)).hexdigest() != versao:
+                return False
+            self._enviar_bytes(colecao, conteudo)
+            return True
+
+    def _anexar_linhas(self, colecao, conteudo):
+        # A trava do arquivo é a do _gravar_se_versao: a compactação de outro
+        # processo não troca o journal entre a conferência e a gravação dela.
+        with self._lock, _trava_arquivo(f"{colecao.ref}.lock"):
+            with open(colecao.ref, 'a+b') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        # Última linha cortada por uma queda: as novas começam numa linha própria.
+                        conteudo = b'\n' + conteudo
+                f.write(conteudo)
+                f.flush()
+                os.fsync(f.fileno())
+            # Só para decidir a compactação: conta as linhas uma vez e depois incrementa.
+            if colecao.ref not in self._linhas_journal:
+                self._linhas_journal[colecao.ref] = self._ler_bytes(colecao).count(b'\n')
+            else:
+                self._linhas_journal[colecao.ref] += conteudo.count(b'\n')
+            return self._linhas_journal[colecao.ref]
+
+
+@contextlib.contextmanager
+def _trava_arquivo(caminho, espera_maxima=10.0):
+    # Trava entre processos baseada em criação exclusiva (funciona também no
+    # Windows). Uma trava mais velha que 'espera_maxima' é de um processo que
+    # morreu e pode ser removida.
+    limite = time.monotonic() + espera_maxima
+    while True:
+        try:
+            fd = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(caminho) > espera_maxima:
+                    os.remove(caminho)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > limite:
+                raise TimeoutError(f"Não foi possível obter a trava {caminho}")
+            time.sleep(0.02)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(caminho)
+
+
+# --- SQLITE ---
+# Cada registro das coleções é uma linha de 'registros', com o JSON completo em
+# 'dados'. Os campos usados em filtros e ordenações têm índices de expressão
+# sobre json_extract, então status, datas, números e CPF/CNPJ viram consultas
+# indexadas e as alterações gravam uma linha só. Os demais arquivos (config,
+# usuários) ficam inteiros em 'documentos'.
+CAMPOS_INDEXADOS = (
+    "status", "data_geracao", "data_emissao", "data_vencimento",
+    "numero_contrato", "numero_fatura", "id_contrato", "cpf_cnpj", "nome_razao_social",
+)
+_NOME_CAMPO = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def _expressao_campo(campo):
+    if not _NOME_CAMPO.match(campo):
+        raise ValueError(f"Campo inválido para consulta: '{campo}'")
+    return f"json_extract(dados, '$.{campo}')"
+
+
+class ArmazenamentoSQLite(Armazenamento):
+
+    def __init__(self, caminho):
+        super().__init__()
+        self.caminho = caminho
+        self._local = threading.local()
+        with self._transacao() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS registros (
+                    colecao TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    posicao INTEGER NOT NULL,
+                    dados TEXT NOT NULL,
+                    PRIMARY KEY (colecao, id)
+                )""")
+            con.execute("CREATE INDEX IF NOT EXISTS ix_registros_posicao ON registros (colecao, posicao)")
+            for campo in CAMPOS_INDEXADOS:
+                con.execute(f"CREATE INDEX IF NOT EXISTS ix_registros_{campo} ON registros (colecao, {_expressao_campo(campo)})")
+            con.execute("CREATE TABLE IF NOT EXISTS documentos (nome TEXT PRIMARY KEY, dados TEXT NOT NULL)")
+            # Contador de alterações por arquivo lógico (ver Armazenamento.versao).
+            con.execute("CREATE TABLE IF NOT EXISTS versoes (nome TEXT PRIMARY KEY, versao INTEGER NOT NULL)")
+
+    def _conexao(self):
+        # sqlite3 não compartilha conexões entre threads: uma por thread de sessão.
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _transacao(self):
+        return _TransacaoSQLite(self._conexao())
+
+    def abrir(self, nome):
+        return Colecao(self, nome)
+
+    def ler(self, colecao):
+        con = self._conexao()
+        if colecao.chave is None:
+            linha = con.execute("SELECT dados FROM documentos WHERE nome = ?", (colecao.nome,)).fetchone()
+            return json.loads(linha[0]) if linha else []
+        linhas = con.execute("SELECT dados FROM registros WHERE colecao = ? ORDER BY posicao", (colecao.nome,))
+        return [json.loads(dados) for (dados,) in linhas]
+
+    def gravar(self, colecao, dados):
+        with self._transacao() as con:
+            self._gravar(con, colecao, dados)
+            self._nova_versao(con, colecao.nome)
+
+    def inserir(self, colecao, registro):
+        with self._transacao() as con:
+            self._inserir(con, colecao, registro)
+            self._nova_versao(con, colecao.nome)
+
+    def atualizar(self, colecao, id_registro, alteracoes):
+        with self._transacao() as con:
+            self._atualizar(con, colecao, id_registro, alteracoes)
+            self._nova_versao(con, colecao.nome)
+
+    def excluir(self, colecao, id_registro):
+        with self._transacao() as con:
+            con.execute("DELETE FROM registros WHERE colecao = ? AND id = ?", (colecao.nome, str(id_registro)))
+            self._nova_versao(con, colecao.nome)
+
+    def versao(self, colecao, revalidar=False):
+        linha = self._conexao().execute("SELECT versao FROM versoes WHERE nome = ?", (colecao.nome,)).fetchone()
+        return linha[0] if linha else 0
+
+    def _nova_versao(self, con, nome):
+        con.execute("INSERT INTO versoes (nome, versao) VALUES (?, 1) "
+                    "ON CONFLICT(nome) DO UPDATE SET versao = versao + 1", (nome,))
+
+    def aplicar_operacoes(self, colecao, operacoes):
+        # Uma transação só; cada operação continua mexendo apenas na sua linha.
+        with self._transacao() as con:
+            self._nova_versao(con, colecao.nome)
+            for entrada in operacoes:
+                if entrada['op'] == 'replace':
+                    self._gravar(con, colecao, entrada['dados'])
+                elif entrada['op'] == 'insert':
+                    self._inserir(con, colecao, entrada['registro'])
+                elif entrada['op'] == 'update':
+                    self._atualizar(con, colecao, entrada['id'], entrada['alteracoes'])
+                elif entrada['op'] == 'delete':
+                    con.execute("DELETE FROM registros WHERE colecao = ? AND id = ?", (colecao.nome, str(entrada['id'])))
+
+    def _gravar(self, con, colecao, dados):
+        if colecao.chave is None:
+            con.execute(
+                "INSERT INTO documentos (nome, dados) VALUES (?, ?) "
+                "ON CONFLICT(nome) DO UPDATE SET dados = excluded.dados",
+                (colecao.nome, json.dumps(dados, ensure_ascii=False)))
+            return
+        con.execute("DELETE FROM registros WHERE colecao = ?", (colecao.nome,))
+        con.executemany(
+            "INSERT OR REPLACE INTO registros (colecao, id, posicao, dados) VALUES (?, ?, ?, ?)",
+            ((colecao.nome, str(r[colecao.chave]), i, json.dumps(r, ensure_ascii=False)) for i, r in enumerate(dados)))
+
+    def _inserir(self, con, colecao, registro):
+        (posicao,) = con.execute("SELECT COALESCE(MAX(posicao), -1) + 1 FROM registros WHERE colecao = ?", (colecao.nome,)).fetchone()
+        con.execute(
+            "INSERT INTO registros (colecao, id, posicao, dados) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(colecao, id) DO UPDATE SET dados = excluded.dados",
+            (colecao.nome, str(registro[colecao.chave]), posicao, json.dumps(registro, ensure_ascii=False)))
+
+    def _atualizar(self, con, colecao, id_registro, alteracoes):
+        linha = con.execute("SELECT dados FROM registros WHERE colecao = ? AND id = ?", (colecao.nome, str(id_registro))).fetchone()
+        if linha:
+            registro = json.loads(linha[0])
+            registro.update(alteracoes)
+            con.execute("UPDATE registros SET dados = ? WHERE colecao = ? AND id = ?",
+                        (json.dumps(registro, ensure_ascii=False), colecao.nome, str(id_registro)))
+
+    def _where(self, colecao, filtros, periodo=None):
+        condicoes, parametros = ["colecao = ?"], [colecao.nome]
+        for campo, valor in (filtros or {}).items():
+            condicoes.append(f"{_expressao_campo(campo)} = ?")
+            parametros.append(valor)
+        if periodo:
+            # substr: datas gravadas com hora também entram no intervalo do dia.
+            condicoes.append(f"substr({_expressao_campo(CAMPOS_PERIODO[colecao.nome])}, 1, 10) BETWEEN ? AND ?")
+            parametros.extend(_intervalo(periodo))
+        return " AND ".join(condicoes), parametros
+
+    def consultar(self, colecao, filtros=None, ordenar_por=None, decrescente=False, periodo=None):
+        if colecao.chave is None:
+            return super().consultar(colecao, filtros, ordenar_por, decrescente, periodo)
+        where, parametros = self._where(colecao, filtros, periodo)
+        ordem = "posicao"
+        if ordenar_por:
+            ordem = f"{_expressao_campo(ordenar_por)} {'DESC' if decrescente else 'ASC'}, posicao"
+        linhas = self._conexao().execute(f"SELECT dados FROM registros WHERE {where} ORDER BY {ordem}", parametros)
+        return [json.loads(dados) for (dados,) in linhas]
+
+    def reservar_numeros(self, nome, campo, quantidade=1):
+        # BEGIN IMMEDIATE já serializa os escritores: leitura e incremento são atômicos.
+        with self._transacao() as con:
+            linha = con.execute("SELECT dados FROM documentos WHERE nome = ?", (nome,)).fetchone()
+            dados = _como_contadores(json.loads(linha[0]) if linha else None)
+            primeiro = dados.get(campo, 0) + 1
+            dados[campo] = primeiro + quantidade - 1
+            con.execute(
+                "INSERT INTO documentos (nome, dados) VALUES (?, ?) "
+                "ON CONFLICT(nome) DO UPDATE SET dados = excluded.dados",
+                (nome, json.dumps(dados, ensure_ascii=False)))
+            self._nova_versao(con, nome)
+            return primeiro
+
+    def contar(self, colecao, filtros=None, periodo=None):
+        if colecao.chave is None:
+            return super().contar(colecao, filtros, periodo)
+        where, parametros = self._where(colecao, filtros, periodo)
+        return self._conexao().execute(f"SELECT COUNT(*) FROM registros WHERE {where}", parametros).fetchone()[0]
+
+
+class _TransacaoSQLite:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK: leitura e escrita de uma alteração ficam atômicas."""
+
+    def __init__(self, con):
+        self.con = con
+
+    def __enter__(self):
+        self.con.execute("BEGIN IMMEDIATE")
+        return self.con
+
+    def __exit__(self, tipo, valor, traceback):
+        self.con.execute("COMMIT" if tipo is None else "ROLLBACK")
+
+
+# --- PARTICIONAMENTO POR PERÍODO ---
+# contracts.json e invoices.json viram um arquivo por mês do campo de data da
+# coleção (CAMPOS_PERIODO): contracts-2026-10.json, invoices-2026-10.json...
+# O manifesto 'particoes.json' guarda, por coleção, o total e a contagem por
+# status de cada partição, mais o mês de cada ID (para alterar/excluir por ID
+# sem procurar em todas). Consultas com período, data exata ou status só leem
+# as partições que podem ter resultado, e contar() sem outros filtros sai do
+# manifesto sem ler partição nenhuma.
+#
+# Na primeira vez que uma coleção é aberta com particionamento, o arquivo único
+# existente é dividido em partições; ele fica como estava, como cópia de
+# segurança. Assim como as coleções, o manifesto é regravado inteiro a cada
+# alteração (o último a gravar vale).
+#
+# Cada partição tem no manifesto uma versão, trocada a cada gravação dela.
+# O processo guarda as partições que leu ou gravou junto com essa versão: uma
+# leitura confere só o manifesto (no Drive, uma requisição) e lê de novo
+# apenas as partições cuja versão mudou. Um registro que muda de mês é gravado na
+# partição nova antes de sair da antiga, e um manifesto desatualizado (outra
+# instância gravou por último, ou o processo caiu antes de gravá-lo) é
+# corrigido na próxima alteração do registro.
+NOME_MANIFESTO = "particoes.json"
+SEM_PERIODO = "sem-data"
+_PERIODO = re.compile(r'^\d{4}-\d{2}')
+
+def _periodo_do_registro(registro, campo):
+    valor = str(registro.get(campo) or '')
+    return valor[:7] if _PERIODO.match(valor) else SEM_PERIODO
+
+def nome_particao(nome, periodo):
+    return nome.replace('.json', f'-{periodo}.json')
+
+
+class ArmazenamentoParticionado(Armazenamento):
+
+    def __init__(self, interno):
+        super().__init__()
+        self.interno = interno
+        self._cache_lock = threading.Lock()
+        self._cache = {}  # arquivo da partição -> (versão no manifesto, JSON)
+        self._cache_stats = {"hits": 0, "misses": 0}
+
+    def _particionada(self, colecao):
+        return colecao.nome in CAMPOS_PERIODO
+
+    def abrir(self, nome):
+        if nome in CAMPOS_PERIODO:
+            return Colecao(self, nome)  # as partições são abertas conforme a necessidade
+        return Colecao(self, nome, self.interno.abrir(nome))
+
+    # --- Manifesto ---
+    def _ler_manifesto(self):
+        manifesto = self.interno.ler(self.interno.abrir(NOME_MANIFESTO))
+        return manifesto if isinstance(manifesto, dict) else {}
+
+    def _gravar_manifesto(self, manifesto):
+        # Partições de antes das versões no manifesto ganham uma aqui: o
+        # conteúdo atual delas passa a valer com essa versão.
+        for entrada in manifesto.values():
+            for resumo in entrada["particoes"].values():
+                resumo.setdefault("versao", uuid.uuid4().hex)
+        self.interno.gravar(self.interno.abrir(NOME_MANIFESTO), manifesto)
+
+    def _entrada(self, manifesto, nome):
+        entrada = manifesto.get(nome)
+        if entrada is None:
+            entrada = manifesto[nome] = {"particoes": {}, "ids": {}}
+            legado = self.interno.ler(self.interno.abrir(nome))
+            self._gravar_particoes(nome, entrada, self._agrupar(nome, legado))
+            self._gravar_manifesto(manifesto)
+        return entrada
+
+    def _agrupar(self, nome, registros):
+        grupos = {}
+        for registro in registros:
+            grupos.setdefault(_periodo_do_registro(registro, CAMPOS_PERIODO[nome]), []).append(registro)
+        return grupos
+
+    def _gravar_particoes(self, nome, entrada, grupos):
+        chave = CHAVES_COLECOES[nome]
+        for periodo, registros in grupos.items():
+            arquivo = nome_particao(nome, periodo)
+            self.interno.gravar(self.interno.abrir(arquivo), registros)
+            # Resumo da partição: reflete exatamente o que acabou de ser gravado.
+            status = {}
+            for registro in registros:
+                status[registro.get('status')] = status.get(registro.get('status'), 0) + 1
+            versao = uuid.uuid4().hex
+            entrada["particoes"][periodo] = {"total": len(registros), "status": status, "versao": versao}
+            self._guardar_particao(arquivo, versao, registros)
+            entrada["ids"] = {i: p for i, p in entrada["ids"].items() if p != periodo}
+            entrada["ids"].update({str(registro.get(chave)): periodo for registro in registros})
+
+    def _periodos(self, nome, entrada, filtros=None, periodo=None):
+        """Partições que podem ter registros com esses filtros, em ordem cronológica."""
+        filtros = filtros or {}
+        campo = CAMPOS_PERIODO[nome]
+        intervalo = _intervalo(periodo) if periodo else None
+        selecionados = []
+        for p, resumo in sorted(entrada["particoes"].items()):
+            if not resumo["total"]:
+                continue
+            if 'status' in filtros and not resumo["status"].get(filtros['status']):
+                continue
+            if campo in filtros and _periodo_do_registro(filtros, campo) != p:
+                continue
+            if intervalo and (p == SEM_PERIODO or not intervalo[0][:7] <= p <= intervalo[1][:7]):
+                continue
+            selecionados.append(p)
+        return selecionados
+
+    def _guardar_particao(self, arquivo, versao, registros):
+        conteudo = json.dumps(registros, ensure_ascii=False, separators=(',', ':'))
+        with self._cache_lock:
+            self._cache[arquivo] = (versao, conteudo)
+
+    def _ler_particao(self, nome, entrada, periodo):
+        arquivo = nome_particao(nome, periodo)
+        versao = entrada["particoes"].get(periodo, {}).get("versao")
+        with self._cache_lock:
+            guardada = self._cache.get(arquivo)
+            if versao is not None and guardada is not None and guardada[0] == versao:
+                self._cache_stats["hits"] += 1
+                # Uma lista nova a cada leitura: quem recebe pode alterá-la à vontade.
+                return json.loads(guardada[1])
+            self._cache_stats["misses"] += 1
+        registros = self.interno.ler(self.interno.abrir(arquivo))
+        if versao is not None:
+            self._guardar_particao(arquivo, versao, registros)
+        return registros
+
+    def _ler_particoes(self, nome, entrada, periodos):
+        # Cada partição que precisa ser lida é uma ida ao backend: busca todas ao mesmo tempo.
+        def ler(p):
+            return self._ler_particao(nome, entrada, p)
+        lidas = dict(zip(periodos, _executar_em_paralelo("particoes", ler, periodos)))
+        # Uma mudança de partição interrompida deixa o registro nas duas (ver
+        # aplicar_operacoes): vale a cópia da partição que o manifesto aponta,
+        # se ele estiver mesmo lá. Sem queda nem manifesto desatualizado, todo
+        # registro está na partição do manifesto e nada é descartado.
+        chave = CHAVES_COLECOES[nome]
+        ids_lidos = {}
+        def esta_em(p, id_registro):
+            if p not in ids_lidos:
+                if p not in lidas:
+                    lidas[p] = ler(p) if entrada["particoes"].get(p, {}).get("total") else []
+                ids_lidos[p] = {str(r.get(chave)) for r in lidas[p]}
+            return id_registro in ids_lidos[p]
+        registros = []
+        for p in periodos:
+            for registro in lidas[p]:
+                id_registro = str(registro.get(chave))
+                outra = entrada["ids"].get(id_registro, p)
+                if outra == p or not esta_em(outra, id_registro):
+                    registros.append(registro)
+        return registros
+
+    def _localizar(self, entrada, id_registro, contem):
+        """Partição onde o registro está de fato (None se não está em nenhuma).
+
+        É a do manifesto, a não ser que ele esteja desatualizado (outra
+        instância gravou o dela por último, ou o processo caiu antes de
+        gravá-lo): aí procura nas outras partições e corrige o manifesto.
+        """
+        atual = entrada["ids"].get(id_registro)
+        for p in [atual] + sorted(p for p in entrada["particoes"] if p != atual):
+            if p is not None and contem(p, id_registro):
+                entrada["ids"][id_registro] = p
+                return p
+        return None
+
+    # --- Interface de Armazenamento ---
+    def ler(self, colecao):
+        if not self._particionada(colecao):
+            return self.interno.ler(colecao.ref)
+        entrada = self._entrada(self._ler_manifesto(), colecao.nome)
+        return self._ler_particoes(colecao.nome, entrada, self._periodos(colecao.nome, entrada))
+
+    def gravar(self, colecao, dados):
+        self.aplicar_operacoes(colecao, [{'op': 'replace', 'dados': dados}])
+
+    def inserir(self, colecao, registro):
+        self.aplicar_operacoes(colecao, [{'op': 'insert', 'id': registro[colecao.chave], 'registro': registro}])
+
+    def atualizar(self, colecao, id_registro, alteracoes):
+        self.aplicar_operacoes(colecao, [{'op': 'update', 'id': id_registro, 'alteracoes': alteracoes}])
+
+    def excluir(self, colecao, id_registro):
+        self.aplicar_operacoes(colecao, [{'op': 'delete', 'id': id_registro}])
+
+    def aplicar_operacoes(self, colecao, operacoes):
+        if not self._particionada(colecao):
+            return self.interno.aplicar_operacoes(colecao.ref, operacoes)
+        nome, chave, campo = colecao.nome, colecao.chave, CAMPOS_PERIODO[colecao.nome]
+        with self._lock:
+            manifesto = self._ler_manifesto()
+            entrada = self._entrada(manifesto, nome)
+            if _tem_substituicao(operacoes):
+                dados = aplicar_journal([], operacoes, chave)
+                grupos = {p: [] for p in entrada["particoes"]}  # partições que ficaram vazias
+                grupos.update(self._agrupar(nome, dados))
+                self._gravar_particoes(nome, entrada, grupos)
+                entrada.pop("limpar", None)
+                self._gravar_manifesto(manifesto)
+                return
+
+            lidas = {}
+            def base(p):
+                if p not in lidas:
+                    lidas[p] = self._ler_particoes(nome, entrada, [p]) if entrada["particoes"].get(p, {}).get("total") else []
+                return lidas[p]
+            ids_lidos = {}
+            def contem(p, id_registro):
+                if p not in ids_lidos:
+                    ids_lidos[p] = {str(r.get(chave)) for r in base(p)}
+                return id_registro in ids_lidos[p]
+
+            # Distribui as operações pelas partições; um registro inserido com
+            # outro mês sai da partição antiga.
+            por_periodo = {}
+            inseridos = set()
+            for entrada_op in operacoes:
+                id_registro = str(entrada_op['id'])
+                if entrada_op['op'] == 'insert':
+                    atual = entrada["ids"].get(id_registro)
+                    destino = _periodo_do_registro(entrada_op['registro'], campo)
+                    if atual and atual != destino:
+                        por_periodo.setdefault(atual, []).append({'op': 'delete', 'id': entrada_op['id']})
+                    por_periodo.setdefault(destino, []).append(entrada_op)
+                    entrada["ids"][id_registro] = destino
+                    inseridos.add(id_registro)
+                    continue
+                if id_registro in inseridos:
+                    atual = entrada["ids"].get(id_registro)
+                else:
+                    atual = self._localizar(entrada, id_registro, contem)
+                if atual:
+                    por_periodo.setdefault(atual, []).append(entrada_op)
+            if not por_periodo:
+                return
+
+            grupos = {p: aplicar_journal(list(base(p)), operacoes_p, chave) for p, operacoes_p in por_periodo.items()}
+            # Uma alteração da data pode mudar o registro de mês.
+            for p in list(grupos):
+                fora = [r for r in grupos[p] if _periodo_do_registro(r, campo) != p]
+                if fora:
+                    grupos[p] = [r for r in grupos[p] if _periodo_do_registro(r, campo) == p]
+                    for destino, registros in self._agrupar(nome, fora).items():
+                        if destino not in grupos:
+                            grupos[destino] = list(base(destino))
+                        grupos[destino] = aplicar_journal(grupos[destino], [
+                            {'op': 'insert', 'id': r[chave], 'registro': r} for r in registros], chave)
+            for p in entrada.pop("limpar", []):
+                # Uma mudança anterior foi interrompida: regrava a partição sem as cópias que sobraram.
+                grupos.setdefault(p, list(base(p)))
+
+            # Registros que mudaram de partição: primeiro são gravadas as
+            # partições que os recebem (ainda com os que saem delas) e o
+            # manifesto apontando para elas; só depois as que os perdem. Uma
+            # queda no meio deixa o registro nas duas partições, nunca em
+            # nenhuma, e a leitura fica com a cópia que o manifesto aponta.
+            antes = {str(r.get(chave)): p for p in grupos for r in base(p)}
+            movidos = {str(r.get(chave)): p for p, registros in grupos.items() for r in registros
+                       if antes.get(str(r.get(chave)), p) != p}
+            if movidos:
+                saem = {antes[id_registro] for id_registro in movidos}
+                recebem = {p: grupos[p] + [r for r in base(p) if str(r.get(chave)) in movidos]
+                           for p in set(movidos.values())}
+                self._gravar_particoes(nome, entrada, recebem)
+                entrada["ids"].update(movidos)
+                entrada["limpar"] = sorted(saem)
+                self._gravar_manifesto(manifesto)
+                grupos = {p: registros for p, registros in grupos.items() if p not in recebem or p in saem}
+            self._gravar_particoes(nome, entrada, grupos)
+            entrada.pop("limpar", None)
+            self._gravar_manifesto(manifesto)
+
+    def consultar(self, colecao, filtros=None, ordenar_por=None, decrescente=False, periodo=None):
+        if not self._particionada(colecao):
+            return self.interno.consultar(colecao.ref, filtros, ordenar_por, decrescente, periodo)
+        entrada = self._entrada(self._ler_manifesto(), colecao.nome)
+        registros = self._ler_particoes(colecao.nome, entrada, self._periodos(colecao.nome, entrada, filtros, periodo))
+        return filtrar_registros(registros, colecao.nome, filtros, ordenar_por, decrescente, periodo)
+
+    def contar(self, colecao, filtros=None, periodo=None):
+        if not self._particionada(colecao):
+            return self.interno.contar(colecao.ref, filtros, periodo)
+        if periodo or set(filtros or {}) - {'status'}:
+            return super().contar(colecao, filtros, periodo)
+        # Só status (ou nada): o manifesto já tem a resposta.
+        entrada = self._entrada(self._ler_manifesto(), colecao.nome)
+        if filtros:
+            return sum(resumo["status"].get(filtros['status'], 0) for resumo in entrada["particoes"].values())
+        return sum(resumo["total"] for resumo in entrada["particoes"].values())
+
+    def reservar_numeros(self, nome, campo, quantidade=1):
+        return self.interno.reservar_numeros(nome, campo, quantidade)
+
+    def compactar_journal(self, colecao):
+        # As partições são sempre gravadas inteiras; só os outros arquivos têm journal.
+        if not self._particionada(colecao):
+            self.interno.compactar_journal(colecao.ref)
+
+    def migrar_formato(self, formato, arquivos=None):
+        if arquivos is None:
+            manifesto = self._ler_manifesto()
+            arquivos = [NOME_MANIFESTO, "config.json", *(
+                nome_particao(nome, p)
+                for nome in CAMPOS_PERIODO
+                for p in self._entrada(manifesto, nome)["particoes"])]
+        return self.interno.migrar_formato(formato, arquivos)
+
+    def versao(self, colecao, revalidar=False):
+        if not self._particionada(colecao):
+            return self.interno.versao(colecao.ref, revalidar)
+        # Toda alteração de partição regrava o manifesto.
+        return self.interno.versao(self.interno.abrir(NOME_MANIFESTO), revalidar)
+
+    def estatisticas(self):
+        with self._cache_lock:
+            particoes = {**self._cache_stats, "entries": len(self._cache)}
+        return {**self.interno.estatisticas(), "partitions": particoes}
+
+
+# --- FILA DE ESCRITA (WRITE-BEHIND) ---
+# Envolve outro backend. As alterações voltam na hora para a página: cada uma
+# é anexada (com fsync) a um spool local e entra na fila do seu arquivo. Uma
+# thread de fundo espera 'atraso' segundos a partir da primeira pendência do
+# arquivo, junta tudo o que chegou nesse intervalo e envia com uma gravação só
+# (aplicar_operacoes). O spool só é limpo depois que o envio deu certo; se o
+# processo cair antes, as pendências são reenviadas quando a fila é recriada
+# sobre a mesma pasta. Uma pasta de spool deve ser usada por um processo só.
+#
+# As leituras aplicam as pendências sobre o que está no backend, então quem
+# alterou já enxerga a alteração antes do envio. A reserva de números não
+# passa pela fila: ela precisa da resposta do backend para ser única.
+SUFIXO_SPOOL = ".pendente.jsonl"
+ESPERA_MAXIMA_FALHA = 60.0  # segundos entre novas tentativas depois de falhas seguidas
+
+
+class FilaDeEscrita(Armazenamento):
+
+    def __init__(self, interno, pasta_spool, atraso=0.5, preparar=None):
+        super().__init__()
+        self.interno = interno
+        self.pasta_spool = pasta_spool
+        self.atraso = atraso
+        self.preparar = preparar  # chamado antes de cada envio (ex.: renovar o token do Drive)
+        self._cond = threading.Condition()
+        self._envio_lock = threading.Lock()
+        self._pendencias = {}
+        self._enfileiradas = {}
+        self._thread = None
+        self._encerrada = False
+        self._stats = {"enqueued": 0, "flushes": 0, "operations_flushed": 0, "failures": 0}
+        self._ultimo_erro = None
+        os.makedirs(pasta_spool, exist_ok=True)
+        self._recuperar_spool()
+
+    # --- Interface de Armazenamento ---
+    def abrir(self, nome):
+        return Colecao(self, nome, self.interno.abrir(nome))
+
+    def ler(self, colecao):
+        with self._cond:
+            pendencia = self._pendencias.get(colecao.nome)
+            linhas = pendencia["em_envio"] + pendencia["operacoes"] if pendencia else []
+        if not linhas:
+            return self.interno.ler(colecao.ref)
+        # Cada leitura parte do JSON guardado: quem recebe pode alterar à vontade.
+        operacoes = [json.loads(linha) for linha in linhas]
+        if colecao.chave is None:
+            return operacoes[-1]["dados"]
+        base = [] if _tem_substituicao(operacoes) else self.interno.ler(colecao.ref)
+        return aplicar_journal(base, operacoes, colecao.chave)
+
+    def gravar(self, colecao, dados):
+        self._enfileirar(colecao, [{'op': 'replace', 'dados': dados}])
+
+    def inserir(self, colecao, registro):
+        self._enfileirar(colecao, [{'op': 'insert', 'id': registro[colecao.chave], 'registro': registro}])
+
+    def atualizar(self, colecao, id_registro, alteracoes):
+        self._enfileirar(colecao, [{'op': 'update', 'id': id_registro, 'alteracoes': alteracoes}])
+
+    def excluir(self, colecao, id_registro):
+        self._enfileirar(colecao, [{'op': 'delete', 'id': id_registro}])
+
+    def aplicar_operacoes(self, colecao, operacoes):
+        self._enfileirar(colecao, operacoes)
+
+    def consultar(self, colecao, filtros=None, ordenar_por=None, decrescente=False, periodo=None):
+        if self._tem_pendencias(colecao.nome):
+            return super().consultar(colecao, filtros, ordenar_por, decrescente, periodo)
+        return self.interno.consultar(colecao.ref, filtros, ordenar_por, decrescente, periodo)
+
+    def contar(self, colecao, filtros=None, periodo=None):
+        if self._tem_pendencias(colecao.nome):
+            return super().contar(colecao, filtros, periodo)
+        return self.interno.contar(colecao.ref, filtros, periodo)
+
+    def reservar_numeros(self, nome, campo, quantidade=1):
+        return self.interno.reservar_numeros(nome, campo, quantidade)
+
+    def compactar_journal(self, colecao):
+        self.descarregar()
+        self.interno.compactar_journal(colecao.ref)
+
+    def versao(self, colecao, revalidar=False):
+        # A versão do backend só muda no envio; as pendências contam à parte.
+        with self._cond:
+            enfileiradas = self._enfileiradas.get(colecao.nome, 0)
+        return (self.interno.versao(colecao.ref, revalidar), enfileiradas)
+
+    def estatisticas(self):
+        with self._cond:
+            fila = dict(self._stats)
+            fila["pending_files"] = sum(1 for p in self._pendencias.values() if p["operacoes"] or p["em_envio"])
+            fila["pending_operations"] = sum(len(p["operacoes"]) + len(p["em_envio"]) for p in self._pendencias.values())
+            fila["last_error"] = self._ultimo_erro
+        return {**self.interno.estatisticas(), "write_behind": fila}
+
+    # --- Envio ---
+    def descarregar(self):
+        """Envia agora tudo o que está pendente; relança o erro se algum envio falhar."""
+        with self._cond:
+            nomes = [nome for nome, p in self._pendencias.items() if p["operacoes"]]
+        erros = [erro for erro in (self._enviar(nome) for nome in nomes) if erro is not None]
+        if erros:
+            raise erros[0]
+
+    def fechar(self):
+        """Para a thread de fundo e envia o que restou (registrado no atexit por utils)."""
+        with self._cond:
+            self._encerrada = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        # Se o envio falhar aqui, as pendências continuam no spool para a próxima execução.
+        self.descarregar()
+
+    def _tem_pendencias(self, nome):
+        with self._cond:
+            pendencia = self._pendencias.get(nome)
+            return bool(pendencia and (pendencia["operacoes"] or pendencia["em_envio"]))
+
+    def _pendencia(self, nome, colecao_interna):
+        pendencia = self._pendencias.get(nome)
+        if pendencia is None:
+            pendencia = self._pendencias[nome] = {
+                "colecao": colecao_interna, "operacoes": [], "em_envio": [], "prazo": None, "falhas": 0,
+            }
+        return pendencia
+
+    def _enfileirar(self, colecao, entradas):
+        # Serializa já na entrada: as páginas costumam continuar mexendo nos objetos depois.
+        linhas = [json.dumps(entrada, ensure_ascii=False, separators=(',', ':')) for entrada in entradas]
+        if not linhas:
+            return
+        substituicoes = [i for i, entrada in enumerate(entradas) if entrada['op'] == 'replace']
+        with self._cond:
+            if self._encerrada:
+                raise RuntimeError("A fila de escrita já foi encerrada.")
+            pendencia = self._pendencia(colecao.nome, colecao.ref)
+            if substituicoes:
+                # A coleção inteira substitui o que estava pendente antes dela.
+                pendencia["operacoes"] = linhas[substituicoes[-1]:]
+                self._reescrever_spool(colecao.nome, pendencia["operacoes"])
+            else:
+                pendencia["operacoes"].extend(linhas)
+                self._anexar_spool(colecao.nome, linhas)
+            if pendencia["prazo"] is None:
+                pendencia["prazo"] = time.monotonic() + self.atraso
+            self._stats["enqueued"] += len(linhas)
+            self._enfileiradas[colecao.nome] = self._enfileiradas.get(colecao.nome, 0) + len(linhas)
+            self._iniciar_thread()
+            self._cond.notify_all()
+
+    def _iniciar_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._executar, name="fila-de-escrita", daemon=True)
+            self._thread.start()
+
+    def _executar(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._encerrada:
+                        return
+                    agora = time.monotonic()
+                    prazos = {nome: p["prazo"] for nome, p in self._pendencias.items() if p["prazo"] is not None}
+                    vencidos = [nome for nome, prazo in prazos.items() if prazo <= agora]
+                    if vencidos:
+                        break
+                    self._cond.wait(min(prazos.values()) - agora if prazos else None)
+            for nome in vencidos:
+                self._enviar(nome)
+
+    def _enviar(self, nome):
+        """Envia as pendências de um arquivo; devolve a exceção em caso de falha (ou None)."""
+        with self._envio_lock:
+            with self._cond:
+                pendencia = self._pendencias.get(nome)
+                if pendencia is None or not pendencia["operacoes"]:
+                    if pendencia is not None:
+                        pendencia["prazo"] = None
+                    return None
+                linhas = pendencia["em_envio"] = pendencia["operacoes"]
+                pendencia["operacoes"], pendencia["prazo"] = [], None
+            try:
+                if self.preparar is not None:
+                    self.preparar()
+                self.interno.aplicar_operacoes(pendencia["colecao"], [json.loads(linha) for linha in linhas])
+            except Exception as e:
+                with self._cond:
+                    # Volta para a frente da fila e tenta de novo, esperando mais a cada falha.
+                    pendencia["operacoes"] = linhas + pendencia["operacoes"]
+                    pendencia["em_envio"] = []
+                    pendencia["falhas"] += 1
+                    pendencia["prazo"] = time.monotonic() + min(ESPERA_MAXIMA_FALHA, self.atraso * 2 ** pendencia["falhas"])
+                    self._stats["failures"] += 1
+                    self._ultimo_erro = f"{nome}: {e}"
+                    self._cond.notify_all()
+                return e
+            with self._cond:
+                pendencia["em_envio"] = []
+                pendencia["falhas"] = 0
+                self._stats["flushes"] += 1
+                self._stats["operations_flushed"] += len(linhas)
+                self._reescrever_spool(nome, pendencia["operacoes"])
+                if not pendencia["operacoes"]:
+                    del self._pendencias[nome]
+            return None
+
+    # --- Spool local ---
+    def _caminho_spool(self, nome):
+        return os.path.join(self.pasta_spool, nome + SUFIXO_SPOOL)
+
+    def _anexar_spool(self, nome, linhas):
+        with open(self._caminho_spool(nome), 'ab') as f:
+            f.write(b''.join(linha.encode('utf-8') + b'\n' for linha in linhas))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _reescrever_spool(self, nome, linhas):
+        caminho = self._caminho_spool(nome)
+        if not linhas:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(caminho)
+            return
+        temporario = f"{caminho}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(b''.join(linha.encode('utf-8') + b'\n' for linha in linhas))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+
+    def _recuperar_spool(self):
+        # Pendências de uma execução que não chegou a enviá-las: entram na fila já vencidas.
+        for arquivo in sorted(os.listdir(self.pasta_spool)):
+            if not arquivo.endswith(SUFIXO_SPOOL):
+                continue
+            nome = arquivo[:-len(SUFIXO_SPOOL)]
+            with open(os.path.join(self.pasta_spool, arquivo), 'rb') as f:
+                conteudo = f.read()
+            # Uma última linha sem '\n' é um acréscimo interrompido no meio: descarta.
+            linhas = [linha.decode('utf-8') for linha in conteudo.split(b'\n')[:-1] if linha.strip()]
+            if not conteudo.endswith(b'\n'):
+                # Regrava sem ela antes que um novo acréscimo se junte à linha cortada.
+                self._reescrever_spool(nome, linhas)
+            if not linhas:
+                continue
+            with self._cond:
+                pendencia = self._pendencia(nome, self.interno.abrir(nome))
+                pendencia["operacoes"] = linhas
+                pendencia["prazo"] = time.monotonic()
+        with self._cond:
+            if self._pendencias:
+                self._iniciar_thread()
+
+
+# --- CARGA CONCORRENTE ---
+# As idas ao backend de uma página (abrir + ler cada coleção) são
+# independentes; feitas em paralelo, a página custa mais ou menos uma ida só.
+# Os pools são do processo e reaproveitados: no Drive, cada thread mantém seu
+# próprio objeto http (PyDrive2), que assim continua com a conexão aberta.
+# Um pool por finalidade evita que uma carga fique esperando partições na
+# fila do próprio pool.
+MAX_CARGAS_PARALELAS = 8
+
+Carga = namedtuple("Carga", ["colecao", "dados", "erro"])
+
+_pools_lock = threading.Lock()
+_pools = {}
+
+def _executar_em_paralelo(finalidade, funcao, itens):
+    itens = list(itens)
+    if len(itens) <= 1:
+        return [funcao(item) for item in itens]
+    with _pools_lock:
+        pool = _pools.get(finalidade)
+        if pool is None:
+            pool = _pools[finalidade] = ThreadPoolExecutor(MAX_CARGAS_PARALELAS, thread_name_prefix=f"carga-{finalidade}")
+    return list(pool.map(funcao, itens))
+
+def carregar_colecoes(armazenamento, pedidos):
+    """Abre e lê várias coleções ao mesmo tempo e devolve {nome: Carga(colecao, dados, erro)}.
+
+    'pedidos' é uma lista de nomes ou um dicionário nome -> argumentos de
+    consultar() (filtros, ordenar_por, decrescente, periodo), ou None para
+    ler tudo. Uma falha fica só no 'erro' da coleção que falhou.
+    """
+    if not isinstance(pedidos, dict):
+        pedidos = dict.fromkeys(pedidos)
+
+    def carregar(item):
+        nome, consulta = item
+        try:
+            colecao = armazenamento.abrir(nome)
+            return Carga(colecao, armazenamento.consultar(colecao, **(consulta or {})), None)
+        except Exception as e:
+            return Carga(None, None, e)
+
+    return dict(zip(pedidos, _executar_em_paralelo("colecoes", carregar, pedidos.items())))
+
+
+def copiar_banco(origem, destino, arquivos=None):
+    """Copia os arquivos lógicos de um backend para outro (ex.: Drive -> SQLite para rodar offline)."""
+    copiados = {}
+    for nome in arquivos or [*CHAVES_COLECOES, "config.json", "users.json"]:
+        dados = origem.ler(origem.abrir(nome))
+        destino.gravar(destino.abrir(nome), dados)
+        copiados[nome] = len(dados)
+    return copiados
@@ -0,0 +1,251 @@
+# armazenamento_drive.py
+# Backend do Google Drive (PyDrive2). Separado de armazenamento.py porque
+# importar o PyDrive2 e o cliente da API do Google é caro: com os backends
+# local e SQLite, eles nem chegam a ser carregados.
+import io
+import json
+import os
+import threading
+
+from pydrive2.auth import LoadAuth
+from pydrive2.files import ApiRequestError
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload
+
+from armazenamento import ArmazenamentoEmArquivos, Colecao
+
+
+# --- GOOGLE DRIVE ---
+# Registro nome -> ID dos arquivos do banco. A consulta ListFile por título só
+# é feita na primeira vez; depois o arquivo é aberto direto pelo ID. Um ID só
+# é descartado quando o Drive responde 404 ao acessá-lo. Com
+# 'caminho_registro_ids', o registro também é salvo em disco.
+#
+# Cache de leitura por ID de arquivo: guarda o conteúdo junto com a versão
+# (md5Checksum/modifiedDate/etag) e só baixa de novo quando uma consulta leve
+# de metadados mostra que o arquivo mudou. Os bytes são guardados e convertidos
+# a cada leitura porque as páginas alteram as listas no lugar antes de salvar.
+CAMPOS_VERSAO = "md5Checksum,modifiedDate,etag"
+
+def _versao(metadados):
+    return {campo: metadados.get(campo) for campo in CAMPOS_VERSAO.split(',')}
+
+def _mesma_versao(a, b):
+    if a.get('md5Checksum') and b.get('md5Checksum'):
+        return a['md5Checksum'] == b['md5Checksum']
+    return a == b
+
+def _arquivo_nao_encontrado(erro):
+    return isinstance(erro, ApiRequestError) and erro.error.get('code') == 404
+
+@LoadAuth
+def _baixar_por_id(drive_file):
+    # Arquivo aberto pelo registro, ainda sem metadados: baixa direto com
+    # alt=media em vez de buscar os metadados só para obter o downloadUrl.
+    try:
+        request = drive_file.auth.service.files().get_media(fileId=drive_file['id'], supportsAllDrives=True)
+        return request.execute(http=drive_file.http)
+    except HttpError as error:
+        raise ApiRequestError(error)
+
+@LoadAuth
+def _buscar_versao(drive_file):
+    try:
+        request = drive_file.auth.service.files().get(fileId=drive_file['id'], fields=CAMPOS_VERSAO, supportsAllDrives=True)
+        return _versao(request.execute(http=drive_file.http))
+    except HttpError as error:
+        raise ApiRequestError(error)
+
+
+@LoadAuth
+def _enviar_se_etag(drive_file, conteudo, etag):
+    # Upload com If-Match: o Drive responde 412 se o arquivo mudou desde 'etag'.
+    media = MediaIoBaseUpload(io.BytesIO(conteudo), dict.get(drive_file, 'mimeType') or 'application/json')
+    request = drive_file.auth.service.files().update(fileId=drive_file['id'], media_body=media, supportsAllDrives=True)
+    request.headers['If-Match'] = etag
+    try:
+        return request.execute(http=drive_file.http)
+    except HttpError as error:
+        if error.resp.status == 412:
+            return None
+        raise ApiRequestError(error)
+
+
+class ArmazenamentoDrive(ArmazenamentoEmArquivos):
+
+    def __init__(self, drive, caminho_registro_ids=None, **opcoes):
+        super().__init__(**opcoes)
+        self.drive = drive
+        self.caminho_registro_ids = caminho_registro_ids
+        self._file_ids_lock = threading.Lock()
+        self._file_ids = None
+        self._leitura_lock = threading.Lock()
+        self._leitura_cache = {}
+        self._leitura_stats = {"hits": 0, "misses": 0, "revalidations": 0}
+
+    # --- Registro de IDs ---
+    def _registro_file_ids(self):
+        if self._file_ids is None:
+            self._file_ids = {}
+            caminho = self.caminho_registro_ids
+            if caminho and os.path.exists(caminho):
+                try:
+                    with open(caminho, 'r', encoding='utf-8') as f:
+                        self._file_ids = json.load(f)
+                except (OSError, ValueError):
+                    self._file_ids = {}
+        return self._file_ids
+
+    def _salvar_registro_file_ids(self):
+        caminho = self.caminho_registro_ids
+        if not caminho:
+            return
+        try:
+            temporario = f"{caminho}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(self._file_ids, f)
+            os.replace(temporario, caminho)
+        except OSError:
+            pass  # O cache em disco é opcional; o registro em memória continua valendo
+
+    def _registrar_file_id(self, nome, file_id):
+        with self._file_ids_lock:
+            registro = self._registro_file_ids()
+            if registro.get(nome) != file_id:
+                registro[nome] = file_id
+                self._salvar_registro_file_ids()
+
+    def _invalidar_file_id(self, nome):
+        with self._file_ids_lock:
+            if self._registro_file_ids().pop(nome, None) is not None:
+                self._salvar_registro_file_ids()
+
+    def _abrir_arquivo(self, nome):
+        with self._file_ids_lock:
+            file_id = self._registro_file_ids().get(nome)
+        if file_id:
+            # Não faz requisição: o arquivo só é buscado na leitura/escrita.
+            return self.drive.CreateFile({'id': file_id, 'title': nome, 'mimeType': 'application/json'})
+
+        file_list = self.drive.ListFile({'q': f"title='{nome}' and trashed=false"}).GetList()
+        if file_list:
+            drive_file = file_list[0]
+        else:
+            drive_file = self.drive.CreateFile({'title': nome, 'mimeType': 'application/json'})
+            # Journals (JSON Lines) começam vazios; os demais arquivos, como lista vazia.
+            drive_file.SetContentString('' if nome.endswith('.jsonl') else '[]')
+            drive_file.Upload()
+        self._registrar_file_id(nome, drive_file['id'])
+        return drive_file
+
+    def _reabrir(self, colecao):
+        # O ID registrado não existe mais: descarta e resolve o nome de novo.
+        self._invalidar_file_id(colecao.nome)
+        colecao.ref = self._abrir_arquivo(colecao.nome)
+
+    def abrir(self, nome):
+        return Colecao(self, nome, self._abrir_arquivo(nome))
+
+    # --- Leitura com cache ---
+    def _guardar_leitura(self, file_id, versao, conteudo):
+        with self._leitura_lock:
+            self._leitura_cache[file_id] = {"versao": versao, "conteudo": conteudo}
+
+    def _ler_conteudo(self, drive_file, revalidar=False):
+        file_id = drive_file['id']
+        if drive_file.uploaded and not revalidar:
+            # Handle vindo da listagem (ou de um upload): os metadados já são atuais.
+            versao = _versao(drive_file)
+        else:
+            versao = _buscar_versao(drive_file)
+            with self._leitura_lock:
+                self._leitura_stats["revalidations"] += 1
+
+        with self._leitura_lock:
+            entrada = self._leitura_cache.get(file_id)
+            if entrada and _mesma_versao(entrada["versao"], versao):
+                self._leitura_stats["hits"] += 1
+                return entrada["conteudo"], versao
+            self._leitura_stats["misses"] += 1
+
+        if drive_file.uploaded:
+            drive_file.FetchContent()
+            conteudo = drive_file.content.getvalue()
+        else:
+            conteudo = _baixar_por_id(drive_file)
+        self._guardar_leitura(file_id, versao, conteudo)
+        return conteudo, versao
+
+    def _ler_com_versao(self, colecao):
+        # Para o compare-and-swap a versão precisa ser a atual, não a da listagem.
+        try:
+            conteudo, versao = self._ler_conteudo(colecao.ref, revalidar=True)
+        except ApiRequestError as e:
+            if not _arquivo_nao_encontrado(e):
+                raise
+            self._reabrir(colecao)
+            conteudo, versao = self._ler_conteudo(colecao.ref, revalidar=True)
+        return conteudo, versao['etag']
+
+    def _gravar_se_versao(self, colecao, conteudo, versao):
+        metadados = _enviar_se_etag(colecao.ref, conteudo, versao)
+        if metadados is None:
+            return False
+        colecao.ref.UpdateMetadata(metadados)
+        colecao.ref.uploaded = True
+        self._guardar_leitura(colecao.ref['id'], _versao(metadados), conteudo)
+        return True
+
+    def _ler_bytes(self, colecao):
+        try:
+            return self._ler_conteudo(colecao.ref)[0]
+        except ApiRequestError as e:
+            if not _arquivo_nao_encontrado(e):
+                raise
+            self._reabrir(colecao)
+            return self._ler_conteudo(colecao.ref)[0]
+
+    def _enviar_bytes(self, colecao, conteudo):
+        try:
+            colecao.ref.content = io.BytesIO(conteudo)
+            colecao.ref.Upload()
+        except ApiRequestError as e:
+            if not _arquivo_nao_encontrado(e):
+                raise
+            self._reabrir(colecao)
+            colecao.ref.content = io.BytesIO(conteudo)
+            colecao.ref.Upload()
+        # A resposta do upload já traz a nova versão: a próxima leitura não baixa nada.
+        self._guardar_leitura(colecao.ref['id'], _versao(colecao.ref), conteudo)
+
+    def _versao_arquivo(self, colecao, revalidar=False):
+        if revalidar:
+            # Só os metadados: descobre alterações de outras instâncias sem baixar o arquivo.
+            try:
+                versao = _buscar_versao(colecao.ref)
+            except ApiRequestError as e:
+                if not _arquivo_nao_encontrado(e):
+                    raise
+                self._reabrir(colecao)
+                versao = _buscar_versao(colecao.ref)
+            with self._leitura_lock:
+                self._leitura_stats["revalidations"] += 1
+            return versao.get("md5Checksum") or versao.get("etag")
+        # Versão do que está no cache de leitura: o que este processo leu ou gravou por último.
+        with self._leitura_lock:
+            entrada = self._leitura_cache.get(colecao.ref['id'])
+        if entrada is None:
+            return None
+        return entrada["versao"].get("md5Checksum") or entrada["versao"].get("etag")
+
+    def estatisticas(self):
+        """Contadores do cache de leitura; 'hits' são downloads completos evitados."""
+        with self._leitura_lock:
+            stats = dict(self._leitura_stats)
+            stats["downloads_avoided"] = stats["hits"]
+            stats["entries"] = len(self._leitura_cache)
+        return stats
+
+    def limpar_cache(self):
+        with self._leitura_lock:
+            self._leitura_cache.clear()
@@ -0,0 +1,99 @@
+# ativos.py
+# Registro dos arquivos estáticos do app (por enquanto, o logo). Cada arquivo
+# é lido do disco uma única vez por processo e fica na memória com os dados já
+# extraídos do cabeçalho da imagem (tipo, largura e altura em pixels).
+#
+# Os arquivos ficam em static/, a pasta que o Streamlit serve em app/static/
+# quando server.enableStaticServing está ligado (.streamlit/config.toml): o
+# login aponta o <img> para essa URL em vez de embutir a imagem em base64 a
+# cada execução. Os geradores de documentos usam fluxo(), que não reabre o
+# arquivo.
+import base64
+import io
+import mimetypes
+import os
+import struct
+import threading
+
+PASTA_ESTATICA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+URL_ESTATICA = "app/static"
+
+# Nome do ativo -> arquivo em static/.
+ATIVOS = {
+    "logo": "logo.png",
+}
+
+_ASSINATURA_PNG = b'\x89PNG\r\n\x1a\n'
+
+
+def _dimensoes(conteudo):
+    """(largura, altura) em pixels de um PNG, JPEG ou GIF; (None, None) se o formato não é reconhecido."""
+    if conteudo[:8] == _ASSINATURA_PNG and conteudo[12:16] == b'IHDR':
+        return struct.unpack('>II', conteudo[16:24])
+    if conteudo[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', conteudo[6:10])
+    if conteudo[:2] == b'\xff\xd8':
+        # JPEG: procura o primeiro marcador SOF (início do quadro), que traz as dimensões.
+        posicao = 2
+        while posicao + 9 < len(conteudo) and conteudo[posicao] == 0xFF:
+            marcador = conteudo[posicao + 1]
+            tamanho = struct.unpack('>H', conteudo[posicao + 2:posicao + 4])[0]
+            if 0xC0 <= marcador <= 0xCF and marcador not in (0xC4, 0xC8, 0xCC):
+                altura, largura = struct.unpack('>HH', conteudo[posicao + 5:posicao + 9])
+                return largura, altura
+            posicao += 2 + tamanho
+    return None, None
+
+
+class Ativo:
+    """Um arquivo estático carregado na memória."""
+
+    def __init__(self, nome, arquivo, conteudo):
+        self.nome = nome
+        self.arquivo = arquivo
+        self.conteudo = conteudo
+        self.mime = mimetypes.guess_type(arquivo)[0] or "application/octet-stream"
+        self.largura, self.altura = _dimensoes(conteudo)
+        self._base64 = None
+
+    @property
+    def url(self):
+        """Caminho do arquivo no servidor de estáticos do Streamlit."""
+        return f"{URL_ESTATICA}/{self.arquivo}"
+
+    def data_uri(self):
+        """A imagem embutida (data:), para quando o servidor de estáticos está desligado."""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.conteudo).decode()
+        return f"data:{self.mime};base64,{self._base64}"
+
+    def fluxo(self):
+        """Um BytesIO novo sobre os bytes em memória (ex.: para o add_picture do python-docx)."""
+        return io.BytesIO(self.conteudo)
+
+    def altura_proporcional(self, largura):
+        """Altura que mantém a proporção da imagem para a 'largura' dada (None sem dimensões)."""
+        if not self.largura or not self.altura:
+            return None
+        return round(largura * self.altura / self.largura)
+
+
+_lock = threading.Lock()
+_carregados = {}
+
+
+def obter(nome):
+    """O Ativo registrado com esse nome, ou None se o arquivo não existe.
+
+    A ausência também fica guardada: um arquivo que aparecer depois só é
+    lido quando o processo reiniciar.
+    """
+    with _lock:
+        if nome not in _carregados:
+            arquivo = ATIVOS[nome]
+            try:
+                with open(os.path.join(PASTA_ESTATICA, arquivo), 'rb') as f:
+                    _carregados[nome] = Ativo(nome, arquivo, f.read())
+            except FileNotFoundError:
+                _carregados[nome] = None
+        return _carregados[nome]
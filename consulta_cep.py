@@ -0,0 +1,169 @@
+# consulta_cep.py
+# Consulta de endereço pelo CEP (ViaCEP), importada por utils no primeiro uso.
+#
+# As respostas ficam num cache em disco (SQLite) compartilhado pelas sessões e
+# pelos processos: LRU limitado a 'max_entradas', com validade de 'ttl'
+# segundos para endereços e 'ttl_negativo' para CEPs que a API disse não
+# existirem. Falhas de rede não entram no cache; se houver um endereço
+# vencido para o CEP, ele é devolvido no lugar do erro.
+#
+# As requisições saem de uma requests.Session com keep-alive e timeouts de
+# conexão/leitura. A URL da API é configurável ('{cep}' é substituído pelos 8
+# dígitos) para apontar para um servidor local em testes ou uso offline.
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+URL_VIACEP = "https://viacep.com.br/ws/{cep}/json/"
+TIMEOUT = (3.05, 5)  # segundos para conectar, para ler
+TTL = 30 * 24 * 3600
+TTL_NEGATIVO = 24 * 3600
+MAX_ENTRADAS = 20000
+
+
+class ResolvedorCep:
+    """Consulta CEPs com cache persistente e conexões reaproveitadas."""
+
+    def __init__(self, url=URL_VIACEP, caminho_cache=None, timeout=TIMEOUT, ttl=TTL,
+                 ttl_negativo=TTL_NEGATIVO, max_entradas=MAX_ENTRADAS, sessao=None, limite=None):
+        self.url = url
+        self.limite = limite  # LimiteDeTaxa para as idas à API (o cache não conta)
+        self.timeout = timeout
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self.max_entradas = max_entradas
+        self.sessao = sessao or _nova_sessao()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "negative_hits": 0, "network_errors": 0, "stale_served": 0}
+        # Sem caminho, o cache fica só na memória do processo.
+        self._con = sqlite3.connect(caminho_cache or ":memory:", timeout=10, isolation_level=None, check_same_thread=False)
+        if caminho_cache:
+            self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""CREATE TABLE IF NOT EXISTS ceps (
+            cep TEXT PRIMARY KEY, dados TEXT, gravado_em REAL NOT NULL, usado_em REAL NOT NULL)""")
+        self._con.execute("CREATE INDEX IF NOT EXISTS ceps_usado_em ON ceps (usado_em)")
+
+    def consultar(self, cep):
+        """Endereço do CEP no formato do ViaCEP, ou None (CEP inválido/inexistente ou API fora do ar)."""
+        cep_limpo = "".join(filter(str.isdigit, cep or ""))
+        if len(cep_limpo) != 8:
+            return None
+        agora = time.time()
+        entrada = self._do_cache(cep_limpo, agora)
+        if entrada is not None and agora - entrada["gravado_em"] < (self.ttl if entrada["dados"] else self.ttl_negativo):
+            self._contar("hits" if entrada["dados"] else "negative_hits")
+            return entrada["dados"]
+
+        self._contar("misses")
+        try:
+            dados = self._buscar(cep_limpo)
+        except requests.RequestException:
+            self._contar("network_errors")
+            if entrada is not None and entrada["dados"]:
+                self._contar("stale_served")
+                return entrada["dados"]
+            return None
+        self._guardar(cep_limpo, dados, agora)
+        return dados
+
+    def _buscar(self, cep_limpo):
+        if self.limite is not None:
+            self.limite.esperar()
+        resposta = self.sessao.get(self.url.format(cep=cep_limpo), timeout=self.timeout)
+        if resposta.status_code == 400:
+            return None  # formato recusado pela API: tão inexistente quanto {"erro": true}
+        resposta.raise_for_status()
+        dados = resposta.json()
+        return None if dados.get("erro") else dados
+
+    # --- Cache em disco ---
+    def _do_cache(self, cep_limpo, agora):
+        with self._lock:
+            linha = self._con.execute("SELECT dados, gravado_em FROM ceps WHERE cep = ?", (cep_limpo,)).fetchone()
+            if linha is None:
+                return None
+            self._con.execute("UPDATE ceps SET usado_em = ? WHERE cep = ?", (agora, cep_limpo))
+        return {"dados": json.loads(linha[0]) if linha[0] else None, "gravado_em": linha[1]}
+
+    def _guardar(self, cep_limpo, dados, agora):
+        conteudo = json.dumps(dados, ensure_ascii=False) if dados else None
+        with self._lock:
+            self._con.execute("INSERT OR REPLACE INTO ceps (cep, dados, gravado_em, usado_em) VALUES (?, ?, ?, ?)",
+                              (cep_limpo, conteudo, agora, agora))
+            # LRU: passou do limite, descarta os menos usados recentemente.
+            excesso = self._con.execute("SELECT COUNT(*) FROM ceps").fetchone()[0] - self.max_entradas
+            if excesso > 0:
+                self._con.execute("DELETE FROM ceps WHERE cep IN (SELECT cep FROM ceps ORDER BY usado_em LIMIT ?)", (excesso,))
+
+    def _contar(self, contador):
+        with self._lock:
+            self._stats[contador] += 1
+
+    def estatisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._con.execute("SELECT COUNT(*) FROM ceps").fetchone()[0]
+        return stats
+
+    def fechar(self):
+        self.sessao.close()
+        with self._lock:
+            self._con.close()
+
+
+class LimiteDeTaxa:
+    """No máximo 'por_segundo' chamadas a esperar() por segundo, somando todas as threads."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo
+        self._lock = threading.Lock()
+        self._proxima = 0.0
+
+    def esperar(self):
+        with self._lock:
+            agora = time.monotonic()
+            vez = max(agora, self._proxima)
+            self._proxima = vez + self.intervalo
+        if vez > agora:
+            time.sleep(vez - agora)
+
+
+def consultar_varios(resolvedor, ceps, trabalhadores=4, progresso=None):
+    """Resolve vários CEPs com até 'trabalhadores' consultas simultâneas; devolve {cep: dados ou None}.
+
+    Cada resposta vai para o cache do resolvedor assim que chega, então uma
+    execução interrompida retoma de onde parou: os CEPs já resolvidos saem do
+    cache sem nova ida à API. 'progresso(feitos, total)' é chamado a cada CEP.
+    """
+    ceps = list(dict.fromkeys(ceps))
+    resultados = {}
+    executor = ThreadPoolExecutor(max_workers=trabalhadores)
+    try:
+        futuros = {executor.submit(resolvedor.consultar, cep): cep for cep in ceps}
+        for feitos, futuro in enumerate(as_completed(futuros), start=1):
+            resultados[futuros[futuro]] = futuro.result()
+            if progresso:
+                progresso(feitos, len(ceps))
+    finally:
+        # Se foi interrompido (Ctrl+C), não espera os CEPs que ainda estão na fila.
+        executor.shutdown(wait=True, cancel_futures=True)
+    return resultados
+
+
+def _nova_sessao():
+    # Keep-alive com algumas conexões por host (as sessões do Streamlit
+    # consultam em paralelo) e novas tentativas só para erros passageiros.
+    sessao = requests.Session()
+    tentativas = Retry(total=2, connect=2, read=1, backoff_factor=0.3,
+                       status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=10, max_retries=tentativas)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    sessao.headers["Accept"] = "application/json"
+    return sessao
@@ -0,0 +1,230 @@
+# drive_simulado.py
+# Um "Google Drive" em memória com o subconjunto da API do PyDrive2 que o
+# ArmazenamentoDrive usa (CreateFile, ListFile, Upload, FetchContent,
+# SetContentString, UpdateMetadata e as chamadas diretas files().get/
+# get_media/update). Serve para medir a camada de armazenamento sem uma conta
+# do Google (scripts/benchmark_armazenamento.py).
+#
+# Cada requisição custa 'latencia' segundos mais o tempo de transferir os
+# bytes a 'banda' bytes/s. Com dormir=False nada espera de verdade: o tempo
+# simulado só é somado em estatisticas()["tempo_rede"], o que deixa rodar
+# cenários grandes em segundos.
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httplib2
+from googleapiclient.errors import HttpError
+from pydrive2.files import ApiRequestError
+
+
+def _erro_http(status, mensagem):
+    resp = httplib2.Response({'status': status})
+    conteudo = json.dumps({'error': {'code': status, 'message': mensagem}}).encode('utf-8')
+    return HttpError(resp, conteudo)
+
+
+class DriveSimulado:
+    """Substitui o GoogleDrive do PyDrive2; os arquivos ficam num dicionário."""
+
+    def __init__(self, latencia=0.0, banda=None, dormir=True):
+        self.latencia = latencia
+        self.banda = banda  # bytes por segundo; None = sem limite
+        self.dormir = dormir
+        self.auth = _AuthSimulado(self)
+        self._lock = threading.Lock()
+        self._arquivos = {}  # id -> {"metadados": {...}, "conteudo": bytes}
+        self._stats = {"requests": 0, "bytes_down": 0, "bytes_up": 0, "tempo_rede": 0.0}
+
+    # --- API do GoogleDrive ---
+    def CreateFile(self, metadata=None):
+        return ArquivoSimulado(self, metadata)
+
+    def ListFile(self, param=None):
+        return _ListaSimulada(self, (param or {}).get('q', ''))
+
+    # --- Medição ---
+    def estatisticas(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def zerar_estatisticas(self):
+        with self._lock:
+            self._stats = {"requests": 0, "bytes_down": 0, "bytes_up": 0, "tempo_rede": 0.0}
+
+    def apagar(self, file_id):
+        """Remove um arquivo (para simular um ID que deixou de existir)."""
+        with self._lock:
+            self._arquivos.pop(file_id, None)
+
+    # --- "Servidor" ---
+    def _requisicao(self, bytes_down=0, bytes_up=0):
+        custo = self.latencia
+        if self.banda:
+            custo += (bytes_down + bytes_up) / self.banda
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["bytes_down"] += bytes_down
+            self._stats["bytes_up"] += bytes_up
+            self._stats["tempo_rede"] += custo
+        if self.dormir and custo:
+            time.sleep(custo)
+
+    def _metadados(self, file_id):
+        with self._lock:
+            arquivo = self._arquivos.get(file_id)
+            if arquivo is None:
+                raise _erro_http(404, f"File not found: {file_id}")
+            return dict(arquivo["metadados"])
+
+    def _baixar(self, file_id):
+        with self._lock:
+            arquivo = self._arquivos.get(file_id)
+            conteudo = None if arquivo is None else arquivo["conteudo"]
+        self._requisicao(bytes_down=len(conteudo or b''))
+        if conteudo is None:
+            raise _erro_http(404, f"File not found: {file_id}")
+        return conteudo
+
+    def _enviar(self, file_id, titulo, mime_type, conteudo, etag_esperado=None):
+        self._requisicao(bytes_up=len(conteudo))
+        with self._lock:
+            arquivo = self._arquivos.get(file_id) if file_id else None
+            if file_id and arquivo is None:
+                raise _erro_http(404, f"File not found: {file_id}")
+            if etag_esperado is not None and arquivo["metadados"]["etag"] != etag_esperado:
+                raise _erro_http(412, "Precondition Failed")
+            if arquivo is None:
+                file_id = uuid.uuid4().hex
+                arquivo = self._arquivos[file_id] = {"metadados": {"id": file_id, "title": titulo, "mimeType": mime_type, "versao": 0}}
+            metadados = arquivo["metadados"]
+            metadados["versao"] += 1
+            metadados.update({
+                "md5Checksum": hashlib.md5(conteudo).hexdigest(),
+                "modifiedDate": datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+                "etag": f'"{file_id}/{metadados["versao"]}"',
+                "fileSize": str(len(conteudo)),
+                "downloadUrl": f"simulado://{file_id}",
+            })
+            arquivo["conteudo"] = conteudo
+            return dict(metadados)
+
+    def _listar(self, consulta):
+        self._requisicao()
+        titulo = re.search(r"title='([^']*)'", consulta)
+        with self._lock:
+            return [dict(a["metadados"]) for a in self._arquivos.values()
+                    if titulo is None or a["metadados"]["title"] == titulo.group(1)]
+
+
+class ArquivoSimulado(dict):
+    """Substitui o GoogleDriveFile: metadados no próprio dicionário, conteúdo em .content."""
+
+    def __init__(self, drive, metadata=None):
+        super().__init__(metadata or {})
+        self.drive = drive
+        self.auth = drive.auth
+        self.http = None
+        self.content = None
+        self.uploaded = False
+
+    def SetContentString(self, conteudo, encoding='utf-8'):
+        self.content = io.BytesIO(conteudo.encode(encoding))
+
+    def GetContentString(self, encoding='utf-8'):
+        if self.content is None:
+            self.FetchContent()
+        return self.content.getvalue().decode(encoding)
+
+    def FetchContent(self):
+        try:
+            self.content = io.BytesIO(self.drive._baixar(self['id']))
+        except HttpError as erro:
+            raise ApiRequestError(erro)
+
+    def Upload(self, param=None):
+        conteudo = self.content.getvalue() if self.content is not None else b''
+        try:
+            metadados = self.drive._enviar(self.get('id'), self.get('title'), self.get('mimeType'), conteudo)
+        except HttpError as erro:
+            raise ApiRequestError(erro)
+        self.UpdateMetadata(metadados)
+        self.uploaded = True
+
+    def UpdateMetadata(self, metadata=None):
+        self.update(metadata or {})
+
+
+class _ListaSimulada:
+
+    def __init__(self, drive, consulta):
+        self.drive = drive
+        self.consulta = consulta
+
+    def GetList(self):
+        arquivos = []
+        for metadados in self.drive._listar(self.consulta):
+            arquivo = ArquivoSimulado(self.drive, metadados)
+            arquivo.uploaded = True  # como no PyDrive2: vem da listagem com metadados atuais
+            arquivos.append(arquivo)
+        return arquivos
+
+
+# --- Objetos de autenticação e serviço usados por LoadAuth e pelas chamadas diretas ---
+class _AuthSimulado:
+
+    auth_method = "service"
+    access_token_expired = False
+
+    def __init__(self, drive):
+        self.service = _ServicoSimulado(drive)
+        self.thread_local = threading.local()
+
+    def Get_Http_Object(self):
+        return object()
+
+
+class _ServicoSimulado:
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def files(self):
+        return self
+
+    def get(self, fileId, fields=None, **kwargs):
+        def executar():
+            self.drive._requisicao()
+            metadados = self.drive._metadados(fileId)
+            if fields:
+                metadados = {campo: metadados.get(campo) for campo in fields.split(',')}
+            return metadados
+        return _RequisicaoSimulada(executar)
+
+    def get_media(self, fileId, **kwargs):
+        return _RequisicaoSimulada(lambda: self.drive._baixar(fileId))
+
+    def update(self, fileId, media_body=None, **kwargs):
+        requisicao = _RequisicaoSimulada(None)
+        def executar():
+            metadados = self.drive._metadados(fileId)
+            conteudo = media_body.getbytes(0, media_body.size()) if media_body is not None else b''
+            return self.drive._enviar(fileId, metadados["title"], metadados["mimeType"], conteudo,
+                                      etag_esperado=requisicao.headers.get('If-Match'))
+        requisicao.executar = executar
+        return requisicao
+
+
+class _RequisicaoSimulada:
+
+    def __init__(self, executar):
+        self.executar = executar
+        self.headers = {}
+
+    def execute(self, http=None):
+        return self.executar()
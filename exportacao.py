@@ -0,0 +1,95 @@
+# exportacao.py
+# Exportação em lote de contratos e faturas num único .zip (fechamento do mês,
+# auditoria), importada por utils no primeiro uso.
+#
+# Os documentos são gerados em lotes de POR_TAREFA num pool de processos (cada
+# processo compila os modelos de documentos.py uma vez e gera os seus lotes) e
+# escritos no zip na ordem dos registros, assim que cada lote volta. Ficam na
+# memória no máximo 2 lotes por processo; o zip é escrito direto no arquivo de
+# destino. Exportações pequenas são geradas no próprio processo: com os
+# modelos compilados, cada documento leva ~1 ms, e subir os processos custaria
+# mais que gerá-los.
+#
+# Os .docx já são comprimidos, então entram no zip sem nova compressão
+# (ZIP_STORED): a gravação fica rápida e o tamanho é praticamente o mesmo.
+#
+# O pool sobe os processos com "spawn", não com o fork padrão do Linux: o
+# servidor do Streamlit tem várias threads, e um fork copiaria travas que
+# outras threads seguram naquele instante (logging, caches, cliente do Drive).
+# _gerar_lote só precisa de documentos, então o processo novo sai barato.
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+POR_TAREFA = 25
+MINIMO_PARA_PROCESSOS = 200
+_NOME_INVALIDO = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+def _gerar_lote(tipo, lote):
+    # Roda nos processos do pool: só importa documentos (python-docx), não o Streamlit.
+    import documentos
+    gerar = documentos.gerar_contrato_docx if tipo == "contrato" else documentos.gerar_fatura_docx
+    return [gerar(dados).getvalue() for dados in lote]
+
+def nome_seguro(nome):
+    """Nome de arquivo sem caracteres que o Windows ou o zip não aceitam."""
+    return _NOME_INVALIDO.sub('_', nome).strip(' .') or "documento"
+
+
+def exportar_zip(tipo, itens, destino, trabalhadores=None, progresso=None):
+    """Gera os documentos de 'itens' = [(nome_arquivo, dados)] e grava o .zip em 'destino' (caminho ou arquivo).
+
+    'tipo' é "contrato" ou "fatura". Nomes repetidos ganham um sufixo
+    (_2, _3...). 'progresso(feitos, total)' é chamado a cada lote gravado.
+    Devolve a quantidade de documentos exportados.
+    """
+    itens = list(itens)
+    lotes = [itens[i:i + POR_TAREFA] for i in range(0, len(itens), POR_TAREFA)]
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    usados = set()
+    feitos = 0
+    data = datetime.now().timetuple()[:6]
+
+    def gravar(zip_destino, lote, conteudos):
+        nonlocal feitos
+        for (nome_arquivo, _), conteudo in zip(lote, conteudos):
+            base, extensao = os.path.splitext(nome_seguro(nome_arquivo))
+            nome, n = base + extensao, 1
+            while nome.lower() in usados:
+                n += 1
+                nome = f"{base}_{n}{extensao}"
+            usados.add(nome.lower())
+            zip_destino.writestr(zipfile.ZipInfo(nome, date_time=data), conteudo, compress_type=zipfile.ZIP_STORED)
+        feitos += len(lote)
+        if progresso:
+            progresso(feitos, len(itens))
+
+    with zipfile.ZipFile(destino, 'w', allowZip64=True) as zip_destino:
+        if len(itens) < MINIMO_PARA_PROCESSOS or trabalhadores == 1:
+            for lote in lotes:
+                gravar(zip_destino, lote, _gerar_lote(tipo, [dados for _, dados in lote]))
+            return feitos
+
+        with ProcessPoolExecutor(max_workers=min(trabalhadores, len(lotes)),
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            pendentes = deque()
+            try:
+                for lote in lotes:
+                    pendentes.append((lote, executor.submit(_gerar_lote, tipo, [dados for _, dados in lote])))
+                    # Janela limitada: não acumula na memória lotes prontos à espera de gravação.
+                    while len(pendentes) >= 2 * trabalhadores:
+                        lote_pronto, futuro = pendentes.popleft()
+                        gravar(zip_destino, lote_pronto, futuro.result())
+                while pendentes:
+                    lote_pronto, futuro = pendentes.popleft()
+                    gravar(zip_destino, lote_pronto, futuro.result())
+            except BaseException:
+                for _, futuro in pendentes:
+                    futuro.cancel()
+                raise
+    return feitos
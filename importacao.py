@@ -0,0 +1,222 @@
+# importacao.py
+# Importação de clientes em lote a partir de CSV ou XLSX (migração do sistema
+# antigo), importada por utils no primeiro uso.
+#
+# O arquivo é lido linha a linha (csv / openpyxl em modo read_only) e
+# processado em lotes de TAMANHO_LOTE linhas: os CPF/CNPJ do lote são
+# validados de uma vez (validacao.validar_documentos) e conferidos contra a
+# base e contra as linhas anteriores do próprio arquivo. Em memória ficam só o
+# lote atual, os clientes aceitos (que vão numa gravação só, em utils) e até
+# MAX_ERROS erros detalhados.
+import csv
+import io
+import itertools
+import uuid
+from collections import namedtuple
+from datetime import date, datetime
+
+import indices
+import validacao
+
+TAMANHO_LOTE = 500
+MAX_ERROS = 1000
+EXTENSOES = ("csv", "xlsx")
+
+# Cabeçalho normalizado (sem acentos, minúsculo) -> campo do cliente.
+COLUNAS = {
+    "nome": "nome_razao_social", "nome razao social": "nome_razao_social", "razao social": "nome_razao_social",
+    "cliente": "nome_razao_social", "nome cliente": "nome_razao_social",
+    "cpf": "cpf_cnpj", "cnpj": "cpf_cnpj", "cpf cnpj": "cpf_cnpj", "cnpj cpf": "cpf_cnpj",
+    "cpf ou cnpj": "cpf_cnpj", "cnpj ou cpf": "cpf_cnpj", "documento": "cpf_cnpj",
+    "tipo": "tipo_pessoa", "tipo pessoa": "tipo_pessoa",
+    "email": "email", "e mail": "email",
+    "telefone": "telefone", "fone": "telefone", "celular": "telefone",
+    "cep": "cep",
+    "endereco": "endereco", "logradouro": "endereco", "rua": "endereco",
+    "numero": "numero", "bairro": "bairro",
+    "cidade": "cidade", "municipio": "cidade",
+    "estado": "estado", "uf": "estado",
+    "data nascimento": "data_nascimento", "data de nascimento": "data_nascimento", "nascimento": "data_nascimento",
+    "representante": "rep_nome", "representante nome": "rep_nome", "nome representante": "rep_nome",
+    "representante cpf": "rep_cpf", "cpf representante": "rep_cpf",
+}
+
+ErroLinha = namedtuple("ErroLinha", "linha mensagem")
+ResultadoImportacao = namedtuple("ResultadoImportacao", "linhas clientes erros total_erros")
+
+
+class ErroImportacao(ValueError):
+    """O arquivo não pode ser importado (formato, cabeçalho sem as colunas obrigatórias...)."""
+
+
+# --- LEITURA LINHA A LINHA ---
+def _linhas_csv(arquivo):
+    # Exportações de sistemas antigos costumam vir em Windows-1252 e com ';'.
+    inicio = arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    try:
+        inicio.decode('utf-8-sig')
+        codificacao = 'utf-8-sig'
+    except UnicodeDecodeError as erro:
+        # Um caractere multibyte cortado no fim da amostra não conta.
+        codificacao = 'utf-8-sig' if erro.start >= len(inicio) - 3 else 'cp1252'
+    tamanho = arquivo.seek(0, io.SEEK_END) or None
+    arquivo.seek(0)
+    texto = io.TextIOWrapper(arquivo, encoding=codificacao, newline='')
+    primeira = texto.readline()
+    delimitador = ';' if primeira.count(';') > primeira.count(',') else ','
+    for valores in csv.reader(itertools.chain([primeira], texto), delimiter=delimitador):
+        yield valores, (min(1.0, arquivo.tell() / tamanho) if tamanho else None)
+    texto.detach()
+
+def _linhas_xlsx(arquivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErroImportacao("Para importar planilhas .xlsx instale o openpyxl (pip install openpyxl) ou salve a planilha como CSV.")
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        planilha = livro.worksheets[0]
+        total = planilha.max_row
+        for numero, valores in enumerate(planilha.iter_rows(values_only=True), start=1):
+            yield valores, (min(1.0, numero / total) if total else None)
+    finally:
+        livro.close()
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # números do Excel (CPF sem máscara, CEP, número da casa)
+    return str(valor).strip()
+
+def _data(valor):
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    texto = _texto(valor)
+    if not texto:
+        return None
+    for formato in ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(texto, formato).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"Data de nascimento inválida: '{texto}'.")
+
+def _tipo_pessoa(valor, documento):
+    texto = indices.normalizar_texto(_texto(valor))
+    if texto in ("pf", "fisica", "pessoa fisica"):
+        return "Pessoa Física"
+    if texto in ("pj", "juridica", "pessoa juridica"):
+        return "Pessoa Jurídica"
+    if texto:
+        raise ValueError(f"Tipo de pessoa desconhecido: '{_texto(valor)}' (use PF ou PJ).")
+    return "Pessoa Jurídica" if validacao.tipo_documento(documento) == "cnpj" else "Pessoa Física"
+
+
+# --- MONTAGEM DOS CLIENTES ---
+def _cliente(campos, documento_formatado):
+    tipo_pessoa = _tipo_pessoa(campos.get("tipo_pessoa"), documento_formatado)
+    if (tipo_pessoa == "Pessoa Jurídica") != (validacao.tipo_documento(documento_formatado) == "cnpj"):
+        raise ValueError(f"O documento {documento_formatado} não confere com o tipo '{tipo_pessoa}'.")
+
+    # Como no formulário de cadastro: "rua, número, bairro" (só as partes preenchidas).
+    endereco, numero, bairro = (_texto(campos.get(c)) for c in ("endereco", "numero", "bairro"))
+    endereco_completo = ", ".join(parte for parte in (endereco, numero, bairro) if parte) if endereco else ""
+
+    representante_legal = None
+    if tipo_pessoa == "Pessoa Jurídica" and (_texto(campos.get("rep_nome")) or _texto(campos.get("rep_cpf"))):
+        rep_cpf = validacao.validar_e_formatar_cpf(_texto(campos.get("rep_cpf")))
+        if not rep_cpf:
+            raise ValueError(f"CPF do representante inválido: '{_texto(campos.get('rep_cpf'))}'.")
+        representante_legal = {"nome": _texto(campos.get("rep_nome")), "cpf": rep_cpf, "data_nascimento": None, "telefone": "", "email": ""}
+
+    return {
+        "id": str(uuid.uuid4()), "tipo_pessoa": tipo_pessoa, "nome_razao_social": _texto(campos.get("nome_razao_social")),
+        "cpf_cnpj": documento_formatado,
+        "data_nascimento": _data(campos.get("data_nascimento")) if tipo_pessoa == "Pessoa Física" else None,
+        "email": _texto(campos.get("email")), "telefone": _texto(campos.get("telefone")), "cep": _texto(campos.get("cep")),
+        "cidade": _texto(campos.get("cidade")), "estado": _texto(campos.get("estado")).upper(),
+        "endereco": endereco_completo, "bairro": bairro,
+        "representante_legal": representante_legal,
+    }
+
+def _mapear_cabecalho(valores):
+    mapa = {}
+    for posicao, titulo in enumerate(valores):
+        campo = COLUNAS.get(indices.normalizar_texto(_texto(titulo)))
+        if campo and campo not in mapa.values():
+            mapa[posicao] = campo
+    faltando = {"nome_razao_social", "cpf_cnpj"} - set(mapa.values())
+    if faltando:
+        raise ErroImportacao("O cabeçalho precisa ter as colunas de nome/razão social e de CPF/CNPJ.")
+    return mapa
+
+
+def ler_clientes(arquivo, nome_arquivo, documento_cadastrado, progresso=None):
+    """Lê e valida os clientes de um CSV/XLSX; devolve um ResultadoImportacao (nada é gravado aqui).
+
+    'documento_cadastrado(doc)' diz se o CPF/CNPJ já existe na base.
+    'progresso(fracao, linhas, aceitos, erros)' é chamado a cada lote; 'fracao'
+    vai de 0 a 1 (None se o tamanho do arquivo não é conhecido).
+    """
+    extensao = nome_arquivo.rsplit('.', 1)[-1].lower()
+    if extensao not in EXTENSOES:
+        raise ErroImportacao(f"Formato não suportado: .{extensao} (use CSV ou XLSX).")
+    linhas = _linhas_csv(arquivo) if extensao == "csv" else _linhas_xlsx(arquivo)
+
+    clientes, erros = [], []
+    total_erros, numero, fracao = 0, 0, 0.0
+    vistos = set()  # dígitos dos documentos já aceitos neste arquivo
+    mapa = None
+
+    def erro(linha, mensagem):
+        nonlocal total_erros
+        total_erros += 1
+        if len(erros) < MAX_ERROS:
+            erros.append(ErroLinha(linha, mensagem))
+
+    def processar(lote):
+        formatados = validacao.validar_documentos([campos.get("cpf_cnpj", '') for _, campos in lote])
+        for (linha, campos), documento in zip(lote, formatados):
+            if not campos.get("nome_razao_social"):
+                erro(linha, "Nome/Razão Social vazio.")
+            elif not documento:
+                erro(linha, f"CPF/CNPJ inválido: '{campos.get('cpf_cnpj', '')}'.")
+            elif indices.somente_digitos(documento) in vistos:
+                erro(linha, f"CPF/CNPJ {documento} repetido no arquivo.")
+            elif documento_cadastrado(documento):
+                erro(linha, f"CPF/CNPJ {documento} já está cadastrado.")
+            else:
+                try:
+                    clientes.append(_cliente(campos, documento))
+                    vistos.add(indices.somente_digitos(documento))
+                except ValueError as e:
+                    erro(linha, str(e))
+        if progresso:
+            progresso(fracao, numero, len(clientes), total_erros)
+
+    lote = []
+    for numero, (valores, fracao) in enumerate(linhas, start=1):
+        if not any(_texto(v) for v in valores):
+            continue
+        if mapa is None:
+            mapa = _mapear_cabecalho(valores)
+            continue
+        campos = {campo: valores[posicao] for posicao, campo in mapa.items() if posicao < len(valores)}
+        campos["nome_razao_social"] = _texto(campos.get("nome_razao_social"))
+        documento = campos.get("cpf_cnpj")
+        campos["cpf_cnpj"] = _texto(documento)
+        if isinstance(documento, (int, float)) and len(campos["cpf_cnpj"]) > 11:
+            campos["cpf_cnpj"] = campos["cpf_cnpj"].zfill(14)  # CNPJ numérico perdeu os zeros à esquerda
+        lote.append((numero, campos))
+        if len(lote) >= TAMANHO_LOTE:
+            processar(lote)
+            lote = []
+    if mapa is None:
+        raise ErroImportacao("O arquivo está vazio.")
+    fracao = 1.0
+    processar(lote)
+    return ResultadoImportacao(numero, clientes, erros, total_erros)
@@ -0,0 +1,374 @@
+# indices.py
+# Índices em memória para as buscas das páginas. Cada índice é montado uma vez
+# a partir dos registros de uma coleção e depois acompanha as alterações feitas
+# pelo próprio processo (inserir/atualizar/excluir), sem ser remontado; utils
+# guarda os índices junto com a versão da coleção (Armazenamento.versao) e só
+# remonta quando os dados mudaram por outro caminho.
+#
+# Os registros são numerados na ordem em que chegam; as buscas por documento
+# devolvem os registros nessa ordem, que é a da coleção, e a busca por nome,
+# por relevância.
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+
+_NAO_DIGITO = re.compile(r'\D')
+_PALAVRA = re.compile(r'[a-z0-9]+')
+
+def somente_digitos(texto):
+    return _NAO_DIGITO.sub('', texto or '')
+
+def valor_do_campo(registro, campo):
+    """Valor de 'campo' no registro; aceita caminho com pontos ('cliente.nome_razao_social')."""
+    valor = registro
+    for parte in campo.split('.'):
+        valor = valor.get(parte) if isinstance(valor, dict) else None
+    return valor
+
+
+class Indice:
+    """Base: guarda os registros por ID e na ordem da coleção."""
+
+    def __init__(self, chave):
+        self.chave = chave
+        self._registros = []  # posição -> registro (None = excluído)
+        self._posicoes = {}   # id -> posição
+
+    def construir(self, registros):
+        for registro in registros:
+            self.inserir(registro)
+        return self
+
+    def inserir(self, registro):
+        id_registro = registro.get(self.chave)
+        if id_registro in self._posicoes:
+            self.excluir(id_registro)
+        posicao = len(self._registros)
+        self._registros.append(registro)
+        self._posicoes[id_registro] = posicao
+        self._indexar(posicao, registro)
+
+    def atualizar(self, id_registro, alteracoes):
+        posicao = self._posicoes.get(id_registro)
+        if posicao is None:
+            return
+        registro = self._registros[posicao]
+        self._desindexar(posicao, registro)
+        registro = {**registro, **alteracoes}
+        self._registros[posicao] = registro
+        self._indexar(posicao, registro)
+
+    def excluir(self, id_registro):
+        posicao = self._posicoes.pop(id_registro, None)
+        if posicao is not None:
+            self._desindexar(posicao, self._registros[posicao])
+            self._registros[posicao] = None
+
+    def obter(self, id_registro):
+        """Registro pela chave primária (None se não existe)."""
+        posicao = self._posicoes.get(id_registro)
+        return None if posicao is None else self._registros[posicao]
+
+    def __len__(self):
+        return len(self._posicoes)
+
+    def _indexar(self, posicao, registro):
+        pass
+
+    def _desindexar(self, posicao, registro):
+        pass
+
+    def _em_ordem(self, posicoes):
+        return [self._registros[p] for p in sorted(posicoes)]
+
+
+# --- CPF/CNPJ POR TRECHO ---
+# Trigramas dos dígitos do documento -> posições. Um trecho com 3 dígitos ou
+# mais só confere os registros que têm todos os trigramas dele (começando
+# pelo trigrama mais raro); trechos de 1 ou 2 dígitos casam com quase todos
+# os registros e são conferidos direto na lista de dígitos.
+#
+# O mesmo índice guarda os dígitos completos -> posições, que respondem "este
+# CPF/CNPJ já está cadastrado?" sem percorrer a coleção. Deveria haver um
+# registro por documento, mas bases antigas podem ter repetidos; por isso o
+# mapa guarda um conjunto.
+TAMANHO_NGRAMA = 3
+
+def _ngramas(digitos):
+    return {digitos[i:i + TAMANHO_NGRAMA] for i in range(len(digitos) - TAMANHO_NGRAMA + 1)}
+
+
+class IndiceDigitos(Indice):
+    """Busca por trecho (prefixo ou meio) dos dígitos de um campo como cpf_cnpj."""
+
+    def __init__(self, chave, campo):
+        super().__init__(chave)
+        self.campo = campo
+        self._digitos = {}  # posição -> dígitos do campo
+        self._ngramas = {}  # trigrama -> set(posições)
+        self._valores = {}  # dígitos completos -> set(posições)
+
+    def _indexar(self, posicao, registro):
+        digitos = somente_digitos(valor_do_campo(registro, self.campo))
+        self._digitos[posicao] = digitos
+        if digitos:
+            self._valores.setdefault(digitos, set()).add(posicao)
+        for ngrama in _ngramas(digitos):
+            self._ngramas.setdefault(ngrama, set()).add(posicao)
+
+    def _desindexar(self, posicao, registro):
+        digitos = self._digitos.pop(posicao, '')
+        com_valor = self._valores.get(digitos)
+        if com_valor is not None:
+            com_valor.discard(posicao)
+            if not com_valor:
+                del self._valores[digitos]
+        for ngrama in _ngramas(digitos):
+            posicoes = self._ngramas.get(ngrama)
+            if posicoes is not None:
+                posicoes.discard(posicao)
+                if not posicoes:
+                    del self._ngramas[ngrama]
+
+    def com_valor(self, valor, ignorar_id=None):
+        """Registros cujo campo tem exatamente os dígitos de 'valor' (exceto o de ID 'ignorar_id')."""
+        posicoes = self._valores.get(somente_digitos(valor), ())
+        return [r for r in self._em_ordem(posicoes) if r.get(self.chave) != ignorar_id]
+
+    def buscar(self, trecho):
+        """Registros cujo campo contém os dígitos de 'trecho' (pontuação é ignorada)."""
+        trecho = somente_digitos(trecho)
+        if not trecho:
+            return []
+        if len(trecho) < TAMANHO_NGRAMA:
+            return self._em_ordem(p for p, digitos in self._digitos.items() if trecho in digitos)
+        listas = sorted((self._ngramas.get(ngrama, set()) for ngrama in _ngramas(trecho)), key=len)
+        candidatos = set(listas[0])
+        for posicoes in listas[1:]:
+            candidatos &= posicoes
+            if not candidatos:
+                return []
+        # Ter os trigramas não garante a sequência: confere o trecho inteiro.
+        return self._em_ordem(p for p in candidatos if trecho in self._digitos[p])
+
+
+# --- NOMES (BUSCA APROXIMADA) ---
+# Nomes normalizados (sem acento, minúsculos, só letras e dígitos) e
+# trigramas de cada palavra, como no pg_trgm: "  sao " -> "  s", " sa", "sao",
+# "ao ". A nota de um registro é a fração dos trigramas da busca que aparecem
+# no nome (tolera erros de digitação e palavras a mais no cadastro); empates
+# são desfeitos pela semelhança geral (Jaccard) e a frase inteira contida no
+# nome vem sempre primeiro.
+#
+# Para ter a nota mínima com N trigramas na busca, um nome precisa de pelo
+# menos 'minimo' deles; logo aparece em alguma das N - minimo + 1 listas mais
+# curtas. Os candidatos saem só dessas listas e os trigramas comuns ("lta",
+# "da "...) são conferidos candidato a candidato.
+SIMILARIDADE_MINIMA = 0.45
+MAX_CANDIDATOS = 5000
+
+def normalizar_texto(texto):
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    sem_acento = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(_PALAVRA.findall(sem_acento.lower()))
+
+def trigramas(texto_normalizado):
+    grams = set()
+    for palavra in texto_normalizado.split():
+        completa = f"  {palavra} "
+        grams.update(completa[i:i + 3] for i in range(len(completa) - 2))
+    return grams
+
+
+class IndiceNomes(Indice):
+    """Busca por nome tolerante a acentos e erros de digitação, com resultados ordenados por relevância."""
+
+    def __init__(self, chave, campo):
+        super().__init__(chave)
+        self.campo = campo
+        self._nomes = {}      # posição -> nome normalizado
+        self._tamanhos = {}   # posição -> quantidade de trigramas do nome
+        self._trigramas = {}  # trigrama -> set(posições)
+
+    def _indexar(self, posicao, registro):
+        nome = normalizar_texto(valor_do_campo(registro, self.campo))
+        grams = trigramas(nome)
+        self._nomes[posicao] = nome
+        self._tamanhos[posicao] = len(grams)
+        for grama in grams:
+            self._trigramas.setdefault(grama, set()).add(posicao)
+
+    def _desindexar(self, posicao, registro):
+        self._tamanhos.pop(posicao, None)
+        for grama in trigramas(self._nomes.pop(posicao, '')):
+            posicoes = self._trigramas.get(grama)
+            if posicoes is not None:
+                posicoes.discard(posicao)
+                if not posicoes:
+                    del self._trigramas[grama]
+
+    def buscar(self, texto, limite=50, similaridade_minima=SIMILARIDADE_MINIMA):
+        """Os 'limite' registros mais parecidos com 'texto' (limite=None: todos os que passam da nota mínima)."""
+        consulta = normalizar_texto(texto)
+        grams_consulta = trigramas(consulta)
+        if not grams_consulta:
+            return []
+        total = len(grams_consulta)
+        minimo = max(1, math.ceil(similaridade_minima * total))
+        listas = sorted((self._trigramas.get(g, set()) for g in grams_consulta), key=len)
+        raros, comuns = listas[:total - minimo + 1], listas[total - minimo + 1:]
+
+        parciais = {}
+        for posicoes in raros:
+            for posicao in posicoes:
+                parciais[posicao] = parciais.get(posicao, 0) + 1
+        if len(parciais) > MAX_CANDIDATOS:
+            parciais = dict(heapq.nlargest(MAX_CANDIDATOS, parciais.items(), key=lambda item: item[1]))
+
+        resultados = []
+        for posicao, comuns_ao_nome in parciais.items():
+            comuns_ao_nome += sum(1 for posicoes in comuns if posicao in posicoes)
+            cobertura = comuns_ao_nome / total
+            frase = consulta in self._nomes[posicao]
+            if cobertura < similaridade_minima and not frase:
+                continue
+            jaccard = comuns_ao_nome / (total + self._tamanhos[posicao] - comuns_ao_nome)
+            resultados.append(((frase, cobertura, jaccard, -posicao), posicao))
+        melhores = sorted(resultados, reverse=True) if limite is None else heapq.nlargest(limite, resultados)
+        return [self._registros[posicao] for _, posicao in melhores]
+
+
+# --- ORDEM PARA LISTAS PAGINADAS ---
+# Lista (chave de ordenação, posição) mantida em ordem: montada com um único
+# sort e depois atualizada por busca binária a cada alteração, para que as
+# páginas não precisem reordenar a coleção a cada execução. A chave ignora
+# acentos e maiúsculas e desempata pelo texto original.
+class IndiceOrdenado(Indice):
+    """Registros ordenados por um campo de texto, lidos por fatias (páginas)."""
+
+    def __init__(self, chave, campo):
+        super().__init__(chave)
+        self.campo = campo
+        self._ordem = []   # [(chave de ordenação, posição)], sempre ordenada
+        self._chaves = {}  # posição -> chave de ordenação
+        self._montando = False
+
+    def construir(self, registros):
+        self._montando = True
+        try:
+            super().construir(registros)
+        finally:
+            self._montando = False
+        self._ordem.sort()
+        return self
+
+    def _indexar(self, posicao, registro):
+        valor = valor_do_campo(registro, self.campo) or ''
+        chave = (normalizar_texto(valor), valor)
+        self._chaves[posicao] = chave
+        if self._montando:
+            self._ordem.append((chave, posicao))
+        else:
+            bisect.insort(self._ordem, (chave, posicao))
+
+    def _desindexar(self, posicao, registro):
+        chave = self._chaves.pop(posicao)
+        if self._montando:
+            self._ordem.remove((chave, posicao))  # ID repetido na própria coleção; raro
+            return
+        del self._ordem[bisect.bisect_left(self._ordem, (chave, posicao))]
+
+    def fatia(self, inicio, quantidade):
+        return [self._registros[posicao] for _, posicao in self._ordem[inicio:inicio + quantidade]]
+
+
+# --- CONTRATOS: STATUS, NÚMERO E DATA ---
+# Mapas status -> posições e número -> posições, e a lista (data, posição)
+# mantida em ordem (como em IndiceOrdenado) para os períodos: um intervalo de
+# datas é achado por busca binária e já sai ordenado. Os filtros começam pelo
+# conjunto menor (o status ou o período) e só conferem os demais nele.
+class IndiceContratos(Indice):
+    """Contratos filtrados por status, trecho do número e período da data, do mais recente ao mais antigo."""
+
+    def __init__(self, chave, campo_numero="numero_contrato", campo_data="data_geracao"):
+        super().__init__(chave)
+        self.campo_numero = campo_numero
+        self.campo_data = campo_data
+        self._status = {}   # status -> set(posições)
+        self._numeros = {}  # número (minúsculo) -> set(posições)
+        self._datas = []    # [(data ISO 'AAAA-MM-DD', posição)], sempre ordenada
+        self._chaves = {}   # posição -> (status, número, data)
+        self._montando = False
+
+    def construir(self, registros):
+        self._montando = True
+        try:
+            super().construir(registros)
+        finally:
+            self._montando = False
+        self._datas.sort()
+        return self
+
+    def _indexar(self, posicao, registro):
+        status = registro.get('status')
+        numero = str(registro.get(self.campo_numero) or '').lower()
+        data = str(registro.get(self.campo_data) or '')[:10]
+        self._chaves[posicao] = (status, numero, data)
+        self._status.setdefault(status, set()).add(posicao)
+        self._numeros.setdefault(numero, set()).add(posicao)
+        if self._montando:
+            self._datas.append((data, posicao))
+        else:
+            bisect.insort(self._datas, (data, posicao))
+
+    def _desindexar(self, posicao, registro):
+        status, numero, data = self._chaves.pop(posicao)
+        for mapa, valor in ((self._status, status), (self._numeros, numero)):
+            posicoes = mapa[valor]
+            posicoes.discard(posicao)
+            if not posicoes:
+                del mapa[valor]
+        if self._montando:
+            self._datas.remove((data, posicao))  # ID repetido na própria coleção; raro
+            return
+        del self._datas[bisect.bisect_left(self._datas, (data, posicao))]
+
+    def com_numero(self, trecho):
+        """Posições dos contratos cujo número contém 'trecho' (sem diferenciar maiúsculas)."""
+        trecho = (trecho or '').lower()
+        exatos = self._numeros.get(trecho, set())
+        # O número exato sai do mapa; trechos conferem só os números distintos, não os registros.
+        return exatos.union(*(posicoes for numero, posicoes in self._numeros.items() if trecho in numero and numero != trecho))
+
+    def consultar(self, status=None, periodo=None, numero=None):
+        """Contratos com esse 'status', no 'periodo' = (inicio, fim) (datas inclusivas) e com 'numero' no número.
+
+        Ordem: data decrescente; na mesma data, o cadastrado por último primeiro.
+        """
+        if periodo:
+            inicio, fim = (str(data)[:10] for data in periodo)
+            de = bisect.bisect_left(self._datas, (inicio,))
+            ate = bisect.bisect_left(self._datas, (fim + '\uffff',))
+        else:
+            de, ate = 0, len(self._datas)
+
+        filtros = []
+        if status is not None:
+            filtros.append(self._status.get(status, set()))
+        if numero:
+            filtros.append(self.com_numero(numero))
+        if not filtros:
+            return [self._registros[posicao] for _, posicao in reversed(self._datas[de:ate])]
+
+        filtros.sort(key=len)
+        if len(filtros[0]) < ate - de:
+            # Poucos candidatos: ordena só eles pela data em vez de percorrer o período.
+            candidatos = [p for p in filtros[0] if all(p in f for f in filtros[1:])]
+            candidatos = [(self._chaves[p][2], p) for p in candidatos]
+            if periodo:
+                candidatos = [(data, p) for data, p in candidatos if inicio <= data <= fim]
+            return [self._registros[posicao] for _, posicao in sorted(candidatos, reverse=True)]
+        return [self._registros[posicao] for _, posicao in reversed(self._datas[de:ate])
+                if all(posicao in f for f in filtros)]
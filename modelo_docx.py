@@ -0,0 +1,117 @@
+# modelo_docx.py
+# Modelos .docx compilados: um documento pronto (montado uma vez, com o
+# python-docx ou no Word) em que os dados variáveis aparecem como marcadores
+# {{CAMPO}}. A compilação separa o XML em trechos fixos e marcadores; gerar um
+# documento é só juntar os trechos com os valores escapados e acrescentar as
+# partes preenchidas a um zip com as partes fixas já comprimidas.
+#
+# Uma linha de tabela que tenha marcadores com o prefixo de linha (ex.:
+# {{ITEM_VALOR}}) vira o modelo das linhas: é repetida uma vez para cada item
+# passado em 'linhas' (nenhuma, se a lista estiver vazia).
+#
+# A saída é estável byte a byte: as entradas do zip têm data, permissões e
+# compressão fixas, e a ordem é sempre a mesma.
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+DATA_FIXA = (1980, 1, 1, 0, 0, 0)
+_MARCADOR = re.compile(r'\{\{([A-Z0-9_]+)\}\}')
+_LINHA_TABELA = re.compile(r'<w:tr[ >].*?</w:tr>', re.S)
+# <w:t> sem xml:space="preserve" perderia os espaços das pontas dos valores.
+_TEXTO_SEM_PRESERVE = re.compile(r'<w:t>(?=[^<]*\{\{)')
+# Caracteres que o XML não aceita (o python-docx recusa esses textos).
+_INVALIDOS_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_QUEBRAS = {'\n': '</w:t><w:br/><w:t xml:space="preserve">', '\t': '</w:t><w:tab/><w:t xml:space="preserve">'}
+_QUEBRA = re.compile('[\n\t]')
+
+
+def texto_xml(valor):
+    """Valor pronto para ir dentro de um <w:t>: escapado, com \\n e \\t como no python-docx (w:br, w:tab)."""
+    texto = escape(_INVALIDOS_XML.sub('', '' if valor is None else str(valor)))
+    return _QUEBRA.sub(lambda m: _QUEBRAS[m.group()], texto)
+
+def _info(nome):
+    info = zipfile.ZipInfo(nome, date_time=DATA_FIXA)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.create_system = 3
+    info.external_attr = 0o644 << 16
+    return info
+
+
+class _Trechos:
+    """XML separado em trechos fixos (posições pares) e nomes de campos (ímpares)."""
+
+    def __init__(self, xml):
+        self.pedacos = _MARCADOR.split(_TEXTO_SEM_PRESERVE.sub('<w:t xml:space="preserve">', xml))
+
+    def campos(self):
+        return set(self.pedacos[1::2])
+
+    def preencher(self, valores, saida):
+        pedacos = self.pedacos
+        for i in range(0, len(pedacos) - 1, 2):
+            saida.append(pedacos[i])
+            saida.append(valores[pedacos[i + 1]])
+        saida.append(pedacos[-1])
+
+
+class _ParteCompilada:
+
+    def __init__(self, xml, prefixo_linha):
+        self.linha = None
+        for trecho in _LINHA_TABELA.finditer(xml) if prefixo_linha else ():
+            if '{{' + prefixo_linha in trecho.group():
+                self.antes = _Trechos(xml[:trecho.start()])
+                self.linha = _Trechos(trecho.group())
+                self.depois = _Trechos(xml[trecho.end():])
+                break
+        if self.linha is None:
+            self.antes = _Trechos(xml)
+
+    def campos(self):
+        campos = self.antes.campos()
+        if self.linha is not None:
+            campos |= self.depois.campos()
+        return campos
+
+    def preencher(self, valores, linhas):
+        saida = []
+        self.antes.preencher(valores, saida)
+        if self.linha is not None:
+            for linha in linhas:
+                self.linha.preencher(linha, saida)
+            self.depois.preencher(valores, saida)
+        return ''.join(saida).encode('utf-8')
+
+
+class ModeloDocx:
+    """Um .docx com marcadores, compilado para ser preenchido muitas vezes."""
+
+    def __init__(self, conteudo_docx, prefixo_linha=None):
+        fixas = io.BytesIO()
+        self._partes = []  # (nome, _ParteCompilada) das partes com marcadores, na ordem do original
+        with zipfile.ZipFile(io.BytesIO(conteudo_docx)) as origem, zipfile.ZipFile(fixas, 'w') as destino:
+            for info in origem.infolist():
+                conteudo = origem.read(info.filename)
+                if info.filename.endswith('.xml') and b'{{' in conteudo:
+                    self._partes.append((info.filename, _ParteCompilada(conteudo.decode('utf-8'), prefixo_linha)))
+                else:
+                    destino.writestr(_info(info.filename), conteudo)
+        self._fixas = fixas.getvalue()
+        self.campos = set().union(*(parte.campos() for _, parte in self._partes))
+
+    def preencher(self, campos, linhas=()):
+        """BytesIO com o .docx: 'campos' = {CAMPO: valor}; 'linhas' = [{ITEM_CAMPO: valor}, ...]."""
+        faltando = self.campos - campos.keys()
+        if faltando:
+            raise KeyError(f"Campos sem valor no modelo: {', '.join(sorted(faltando))}")
+        valores = {nome: texto_xml(valor) for nome, valor in campos.items()}
+        linhas = [{nome: texto_xml(valor) for nome, valor in linha.items()} for linha in linhas]
+        buffer = io.BytesIO(self._fixas)
+        with zipfile.ZipFile(buffer, 'a') as destino:
+            for nome, parte in self._partes:
+                destino.writestr(_info(nome), parte.preencher(valores, linhas))
+        buffer.seek(0)
+        return buffer
@@ -1,7 +1,6 @@
 import streamlit as st
 import utils
 import uuid
-import pandas as pd
 from datetime import date
 
 st.set_page_config(page_title="Gerenciamento de Clientes", layout="wide")
@@ -25,8 +24,8 @@ st.title("Cadastro e Gerenciamento de Clientes")
 
 # --- CONEXÃO COM BANCO de DADOS de CLIENTES ---
 try:
-    drive = utils.login_gdrive()
-    clients_file = utils.get_database_file(drive, "clients.json")
+    banco = utils.conectar_banco()
+    clients_file = utils.get_database_file(banco, "clients.json")
     clientes_data = utils.read_data(clients_file)
 except Exception as e:
     st.error(f"Erro de conexão: {e}")
@@ -38,12 +37,8 @@ if 'editing_client_id' not in st.session_state:
 
 # --- FUNÇÃO PARA EXCLUIR CLIENTE ---
 def excluir_cliente(client_id_to_delete):
-    global clientes_data # Para garantir que estamos modificando a lista global
-    clientes_antes = len(clientes_data)
-    clientes_data = [c for c in clientes_data if c['id'] != client_id_to_delete]
-    
-    if len(clientes_data) < clientes_antes:
-        utils.write_data(clients_file, clientes_data)
+    if utils.obter_registro(clients_file, clientes_data, client_id_to_delete):
+        utils.excluir_registro(clients_file, client_id_to_delete)
         st.success("Cliente excluído com sucesso!")
         # Se estava editando o cliente excluído, sai do modo de edição
         if st.session_state.editing_client_id == client_id_to_delete:
@@ -56,16 +51,15 @@ def excluir_cliente(client_id_to_delete):
         st.error("Erro: Cliente não encontrado para exclusão.")
 
 # --- BUSCA de CLIENTES ---
-st.subheader("Buscar Cliente por CPF/CNPJ")
-cpf_cnpj_busca = st.text_input("Digite o CPF ou CNPJ para buscar (com ou sem pontuação)", key="search_cpf_cnpj")
+st.subheader("Buscar Cliente por Nome ou CPF/CNPJ")
+cpf_cnpj_busca = st.text_input("Digite o nome, CPF ou CNPJ para buscar (com ou sem acentos/pontuação)", key="search_cpf_cnpj")
 if cpf_cnpj_busca:
-    busca_limpa = "".join(filter(str.isdigit, cpf_cnpj_busca))
-    clientes_encontrados = []
-    if busca_limpa:
-        for c in clientes_data:
-            doc_armazenado_limpo = "".join(filter(str.isdigit, c.get('cpf_cnpj', '')))
-            if busca_limpa in doc_armazenado_limpo:
-                clientes_encontrados.append(c)
+    # Índices montados uma vez por versão da base de clientes: com letras, busca
+    # aproximada pelo nome (por relevância); só números, trecho do CPF/CNPJ.
+    if any(c.isalpha() for c in cpf_cnpj_busca):
+        clientes_encontrados = utils.buscar_por_nome(clients_file, cpf_cnpj_busca, clientes_data)
+    else:
+        clientes_encontrados = utils.buscar_por_documento(clients_file, clientes_data, cpf_cnpj_busca)
 
     if clientes_encontrados:
         st.write(f"{len(clientes_encontrados)} cliente(s) encontrado(s):")
@@ -120,7 +114,7 @@ st.markdown("---")
 # --- SEÇÃO DE EDIÇÃO DE CLIENTE ---
 if st.session_state.editing_client_id:
     st.subheader("Editar Cliente Existente")
-    client_to_edit = next((c for c in clientes_data if c['id'] == st.session_state.editing_client_id), None)
+    client_to_edit = utils.obter_registro(clients_file, clientes_data, st.session_state.editing_client_id)
 
     if client_to_edit:
         full_address = client_to_edit.get('endereco', '')
@@ -201,7 +195,7 @@ if st.session_state.editing_client_id:
                 col_rep_edit1, col_rep_edit2 = st.columns(2)
                 with col_rep_edit1:
                     rep_nome_edit = st.text_input("Nome do Representante*", value=rep_legal_data.get('nome', ''), key="rep_nome_edit")
-                    rep_cpf_edit = st.text_input("CPF do Representante*", value=utils.validar_e_formatar_cpf(rep_legal_data.get('cpf', '')) if rep_legal_data.get('cpf') else '', key="rep_cpf_edit")
+                    rep_cpf_edit = st.text_input("CPF do Representante*", value=rep_legal_data.get('cpf', ''), key="rep_cpf_edit")
                 with col_rep_edit2:
                     rep_nascimento_val = None
                     if rep_legal_data.get('data_nascimento'):
@@ -237,11 +231,7 @@ if st.session_state.editing_client_id:
                 if not doc_formatado_edit:
                     st.error("CPF ou CNPJ do cliente inválido. Verifique a digitação.")
                 else:
-                    cpf_cnpj_existente = False
-                    for c in clientes_data:
-                        if c['id'] != st.session_state.editing_client_id and c['cpf_cnpj'] == doc_formatado_edit:
-                            cpf_cnpj_existente = True
-                            break
+                    cpf_cnpj_existente = utils.documento_cadastrado(clients_file, clientes_data, doc_formatado_edit, ignorar_id=st.session_state.editing_client_id)
                     
                     if cpf_cnpj_existente:
                         st.error("Este CPF/CNPJ já está cadastrado para outro cliente!")
@@ -263,25 +253,20 @@ if st.session_state.editing_client_id:
                                 "telefone": rep_telefone_edit, "email": rep_email_edit
                             }
                         
-                        for i, c in enumerate(clientes_data):
-                            if c['id'] == st.session_state.editing_client_id:
-                                clientes_data[i].update({
-                                    "tipo_pessoa": tipo_pessoa_edit,
-                                    "nome_razao_social": nome_razao_social_edit,
-                                    "cpf_cnpj": doc_formatado_edit,
-                                    "data_nascimento": str(data_nascimento_pf_edit) if data_nascimento_pf_edit else None,
-                                    "email": email_edit,
-                                    "telefone": telefone_edit,
-                                    "cep": cep_edit,
-                                    "cidade": cidade_edit,
-                                    "estado": estado_edit,
-                                    "endereco": endereco_completo_edit,
-                                    "bairro": bairro_edit,
-                                    "representante_legal": representante_legal_edit
-                                })
-                                break
-                        
-                        utils.write_data(clients_file, clientes_data)
+                        utils.atualizar_registro(clients_file, st.session_state.editing_client_id, {
+                            "tipo_pessoa": tipo_pessoa_edit,
+                            "nome_razao_social": nome_razao_social_edit,
+                            "cpf_cnpj": doc_formatado_edit,
+                            "data_nascimento": str(data_nascimento_pf_edit) if data_nascimento_pf_edit else None,
+                            "email": email_edit,
+                            "telefone": telefone_edit,
+                            "cep": cep_edit,
+                            "cidade": cidade_edit,
+                            "estado": estado_edit,
+                            "endereco": endereco_completo_edit,
+                            "bairro": bairro_edit,
+                            "representante_legal": representante_legal_edit
+                        })
                         st.success(f"Cliente '{nome_razao_social_edit}' atualizado com sucesso!")
                         st.session_state.editing_client_id = None
                         for key in ['cep_pesquisado', 'endereco', 'bairro', 'cidade', 'estado', 'numero']:
@@ -379,7 +364,7 @@ if not st.session_state.editing_client_id:
                 if not doc_formatado:
                     st.error("CPF ou CNPJ do cliente inválido. Verifique a digitação.")
                 else:
-                    if any(c['cpf_cnpj'] == doc_formatado for c in clientes_data):
+                    if utils.documento_cadastrado(clients_file, clientes_data, doc_formatado):
                         st.error("Este CPF/CNPJ já está cadastrado!")
                     else:
                         endereco_completo = f"{endereco}, {numero}, {bairro}" if numero and bairro else endereco
@@ -402,8 +387,7 @@ if not st.session_state.editing_client_id:
                             "endereco": endereco_completo, "bairro": bairro,
                             "representante_legal": representante_legal
                         }
-                        clientes_data.append(novo_cliente)
-                        utils.write_data(clients_file, clientes_data)
+                        utils.inserir_registro(clients_file, novo_cliente)
                         st.success(f"Cliente '{nome_razao_social}' salvo com sucesso!")
                         
                         for key in ['cep_pesquisado', 'endereco', 'bairro', 'cidade', 'estado']:
@@ -412,57 +396,113 @@ if not st.session_state.editing_client_id:
 
 st.markdown("---")
 
+# --- IMPORTAÇÃO EM LOTE ---
+# Para migrar clientes de outro sistema: o arquivo é lido e validado em lotes,
+# com o progresso na tela, e os clientes aceitos são gravados de uma vez.
+with st.expander("Importar Clientes de Planilha (CSV/XLSX)"):
+    st.caption("Colunas obrigatórias: Nome/Razão Social e CPF/CNPJ. Opcionais: Tipo (PF/PJ), E-mail, Telefone, CEP, Endereço, Número, Bairro, Cidade, UF, Data de Nascimento, Representante e CPF Representante.")
+    arquivo_importacao = st.file_uploader("Arquivo", type=["csv", "xlsx"], key="arquivo_importacao")
+    if arquivo_importacao is not None and st.button("Importar Clientes", key="importar_clientes_btn"):
+        barra = st.progress(0.0, text="Lendo o arquivo...")
+        def mostrar_progresso(fracao, linhas, aceitos, com_erro):
+            barra.progress(fracao or 0.0, text=f"{linhas} linha(s) lida(s) — {aceitos} cliente(s) válido(s), {com_erro} com erro")
+        try:
+            resultado = utils.importar_clientes(clients_file, arquivo_importacao, arquivo_importacao.name, mostrar_progresso)
+        except ValueError as e:
+            st.error(f"Não foi possível importar o arquivo: {e}")
+        except Exception as e:
+            st.error(f"Erro ao gravar os clientes importados: {e}")
+        else:
+            st.session_state.resultado_importacao = {
+                "importados": len(resultado.clientes), "total_erros": resultado.total_erros,
+                "erros": [{"Linha": e.linha, "Erro": e.mensagem} for e in resultado.erros],
+            }
+            st.rerun()
+
+    resultado_importacao = st.session_state.get('resultado_importacao')
+    if resultado_importacao:
+        st.success(f"{resultado_importacao['importados']} cliente(s) importado(s).")
+        if resultado_importacao['total_erros']:
+            st.warning(f"{resultado_importacao['total_erros']} linha(s) não importada(s)" + (f" (mostrando as {len(resultado_importacao['erros'])} primeiras)." if len(resultado_importacao['erros']) < resultado_importacao['total_erros'] else "."))
+            st.dataframe(resultado_importacao['erros'], hide_index=True, use_container_width=True)
+
+st.markdown("---")
+
 # --- LISTA DE CLIENTES CADASTRADOS ---
+# Paginada: a ordem por nome fica num índice que acompanha as alterações (não
+# é refeita a cada execução) e só a página visível é desenhada. Os detalhes e
+# os botões de um cliente só são montados quando ele é aberto.
 st.subheader("Clientes Cadastrados")
 if clientes_data:
-    clientes_ordenados = sorted(clientes_data, key=lambda c: c['nome_razao_social'])
-    for cliente in clientes_ordenados:
-        with st.expander(f"**{cliente['nome_razao_social']}** - {cliente['cpf_cnpj']}"):
-            st.markdown(f"**Tipo:** {cliente['tipo_pessoa']}")
-            if cliente.get('data_nascimento'):
-                st.markdown(f"**Data de Nascimento:** {cliente['data_nascimento']}")
+    col_por_pagina, col_pagina, col_info = st.columns([1, 1, 2])
+    with col_por_pagina:
+        por_pagina = st.selectbox("Clientes por página", options=[25, 50, 100], key="clientes_por_pagina")
+    total_paginas = max(1, -(-len(clientes_data) // por_pagina))
+    # Depois de excluir clientes ou aumentar o tamanho da página, a página guardada pode não existir mais.
+    if st.session_state.get('pagina_clientes', 1) > total_paginas:
+        st.session_state.pagina_clientes = total_paginas
+    with col_pagina:
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, step=1, key="pagina_clientes")
+    with col_info:
+        st.caption(f"{len(clientes_data)} cliente(s) cadastrado(s) — página {pagina} de {total_paginas}")
+
+    clientes_pagina = utils.pagina_ordenada(clients_file, clientes_data, "nome_razao_social", (pagina - 1) * por_pagina, por_pagina)
+    for cliente in clientes_pagina:
+        aberto = st.session_state.get('cliente_aberto') == cliente['id']
+        col_nome, col_doc, col_cidade, col_detalhes = st.columns([4, 2, 2, 1])
+        col_nome.markdown(f"**{cliente['nome_razao_social']}**")
+        col_doc.write(cliente['cpf_cnpj'])
+        col_cidade.write(f"{cliente.get('cidade') or 'N/A'} / {cliente.get('estado') or 'N/A'}")
+        if col_detalhes.button("Fechar" if aberto else "Detalhes", key=f"detalhes_{cliente['id']}", use_container_width=True):
+            st.session_state.cliente_aberto = None if aberto else cliente['id']
+            st.rerun()
+        if aberto:
+            with st.container(border=True):
+                st.markdown(f"**Tipo:** {cliente['tipo_pessoa']}")
+                if cliente.get('data_nascimento'):
+                    st.markdown(f"**Data de Nascimento:** {cliente['data_nascimento']}")
             
-            st.markdown(f"**E-mail:** {cliente.get('email', 'N/A')}")
-            st.markdown(f"**Telefone:** {cliente.get('telefone', 'N/A')}")
+                st.markdown(f"**E-mail:** {cliente.get('email', 'N/A')}")
+                st.markdown(f"**Telefone:** {cliente.get('telefone', 'N/A')}")
             
-            st.markdown("---")
-            st.markdown("##### Endereço")
-            st.markdown(f"**CEP:** {cliente.get('cep', 'N/A')}")
-            st.markdown(f"**Endereço:** {cliente.get('endereco', 'N/A')}")
+                st.markdown("---")
+                st.markdown("##### Endereço")
+                st.markdown(f"**CEP:** {cliente.get('cep', 'N/A')}")
+                st.markdown(f"**Endereço:** {cliente.get('endereco', 'N/A')}")
             
-            if cliente.get('bairro'):
-                st.markdown(f"**Bairro:** {cliente.get('bairro', 'N/A')}")
-            st.markdown(f"**Cidade/UF:** {cliente.get('cidade', 'N/A')} / {cliente.get('estado', 'N/A')}")
+                if cliente.get('bairro'):
+                    st.markdown(f"**Bairro:** {cliente.get('bairro', 'N/A')}")
+                st.markdown(f"**Cidade/UF:** {cliente.get('cidade', 'N/A')} / {cliente.get('estado', 'N/A')}")
             
-            if cliente.get('representante_legal'):
-                rep = cliente['representante_legal']
-                st.markdown("---")
-                st.markdown("##### Representante Legal")
-                st.markdown(f"**Nome:** {rep.get('nome', 'N/A')}")
-                st.markdown(f"**CPF:** {rep.get('cpf', 'N/A')}")
-                st.markdown(f"**Data de Nascimento:** {rep.get('data_nascimento', 'N/A')}")
-                st.markdown(f"**Contato:** {rep.get('telefone', 'N/A')} / {rep.get('email', 'N/A')}")
+                if cliente.get('representante_legal'):
+                    rep = cliente['representante_legal']
+                    st.markdown("---")
+                    st.markdown("##### Representante Legal")
+                    st.markdown(f"**Nome:** {rep.get('nome', 'N/A')}")
+                    st.markdown(f"**CPF:** {rep.get('cpf', 'N/A')}")
+                    st.markdown(f"**Data de Nascimento:** {rep.get('data_nascimento', 'N/A')}")
+                    st.markdown(f"**Contato:** {rep.get('telefone', 'N/A')} / {rep.get('email', 'N/A')}")
 
-            st.markdown("---")
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Editar Cliente", key=f"edit_{cliente['id']}", use_container_width=True):
-                    st.session_state.editing_client_id = cliente['id']
-                    st.rerun()
-            with col2:
-                # Botão de exclusão com lógica de confirmação
-                if st.button("Excluir Cliente", key=f"delete_{cliente['id']}", use_container_width=True, type="primary"):
-                    # O Streamlit lida com cliques duplos sequenciais se o estado não for resetado rapidamente
-                    if st.session_state.get(f"confirm_delete_{cliente['id']}", False): 
-                        excluir_cliente(cliente['id'])
-                        # Resetar a flag de confirmação para este cliente após a exclusão
-                        st.session_state[f"confirm_delete_{cliente['id']}"] = False 
-                    else:
-                        st.warning(f"Tem certeza que deseja excluir o cliente '{cliente['nome_razao_social']}'? Clique novamente no botão para confirmar.")
-                        # Marcar a flag de confirmação para o próximo clique
-                        st.session_state[f"confirm_delete_{cliente['id']}"] = True 
-                        # Isso fará com que o aviso apareça e o usuário tenha que clicar novamente.
-                        # Não precisa de rerun aqui, o Streamlit já re-renderiza o botão.
+                st.markdown("---")
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("Editar Cliente", key=f"edit_{cliente['id']}", use_container_width=True):
+                        st.session_state.editing_client_id = cliente['id']
+                        st.rerun()
+                with col2:
+                    # Botão de exclusão com lógica de confirmação
+                    if st.button("Excluir Cliente", key=f"delete_{cliente['id']}", use_container_width=True, type="primary"):
+                        # O Streamlit lida com cliques duplos sequenciais se o estado não for resetado rapidamente
+                        if st.session_state.get(f"confirm_delete_{cliente['id']}", False): 
+                            excluir_cliente(cliente['id'])
+                            # Resetar a flag de confirmação para este cliente após a exclusão
+                            st.session_state[f"confirm_delete_{cliente['id']}"] = False 
+                        else:
+                            st.warning(f"Tem certeza que deseja excluir o cliente '{cliente['nome_razao_social']}'? Clique novamente no botão para confirmar.")
+                            # Marcar a flag de confirmação para o próximo clique
+                            st.session_state[f"confirm_delete_{cliente['id']}"] = True 
+                            # Isso fará com que o aviso apareça e o usuário tenha que clicar novamente.
+                            # Não precisa de rerun aqui, o Streamlit já re-renderiza o botão.
 else:
     st.info("Nenhum cliente cadastrado ainda.")
 
@@ -1,7 +1,6 @@
 # pages/3_Elaboracao_de_Contratos.py
 import streamlit as st
 import utils
-import pandas as pd
 from datetime import date
 import uuid # Import para gerar IDs únicos
 
@@ -22,8 +21,8 @@ st.title("Elaboração de Contratos")
 
 # --- CONEXÃO COM BANCOS DE DADOS ---
 try:
-    drive = utils.login_gdrive()
-    clients_file = utils.get_database_file(drive, "clients.json")
+    banco = utils.conectar_banco()
+    clients_file = utils.get_database_file(banco, "clients.json")
     clientes_data = utils.read_data(clients_file)
 except Exception as e:
     st.error(f"Erro de conexão: {e}")
@@ -101,7 +100,7 @@ if submitted:
             itens_para_contrato.append(item_data)
         
         # Gera o próximo número de contrato sequencial
-        numero_contrato = utils.get_next_contract_number(drive)
+        numero_contrato = utils.get_next_contract_number(banco)
         
         if numero_contrato:
             # Monta o dicionário completo com todos os dados do contrato
@@ -123,10 +122,8 @@ if submitted:
             }
 
             # --- LÓGICA DE SALVAMENTO NO contracts.json ---
-            contracts_file = utils.get_database_file(drive, "contracts.json")
-            contratos_existentes = utils.read_data(contracts_file)
-            contratos_existentes.append(dados_contrato)
-            utils.write_data(contracts_file, contratos_existentes)
+            contracts_file = utils.get_database_file(banco, "contracts.json")
+            utils.inserir_registro(contracts_file, dados_contrato)
             
             # ATUALIZADO: Chama a função a partir de utils para gerar o .docx
             st.session_state.contrato_gerado = utils.gerar_contrato_docx(dados_contrato)
@@ -1,24 +1,16 @@
 # pages/4_Gerenciamento_de_Contratos.py
 import streamlit as st
 import utils
-import pandas as pd
 from datetime import datetime
 
 st.set_page_config(page_title="Gerenciamento de Contratos", layout="wide")
 
+LIMITE_POR_NOME = 200  # contratos encontrados pelo nome do cliente, dos mais parecidos
+
 # --- Função para atualizar o status de um contrato ---
-def atualizar_status_contrato(drive, id_contrato, novo_status):
-    contracts_file = utils.get_database_file(drive, "contracts.json")
-    contratos_data = utils.read_data(contracts_file)
-    
-    # Encontra o contrato e atualiza o status
-    for contrato in contratos_data:
-        if contrato['id_contrato'] == id_contrato:
-            contrato['status'] = novo_status
-            break
-            
-    # Salva a lista inteira de volta no arquivo
-    utils.write_data(contracts_file, contratos_data)
+def atualizar_status_contrato(banco, id_contrato, novo_status):
+    contracts_file = utils.get_database_file(banco, "contracts.json")
+    utils.atualizar_registro(contracts_file, id_contrato, {'status': novo_status})
     st.success(f"Status do contrato atualizado para '{novo_status}'.")
     st.rerun()
 
@@ -37,9 +29,8 @@ st.title("Gerenciamento de Contratos")
 
 # --- CONEXÃO COM BANCOS DE DADOS ---
 try:
-    drive = utils.login_gdrive()
-    contracts_file = utils.get_database_file(drive, "contracts.json")
-    contratos_data = utils.read_data(contracts_file)
+    banco = utils.conectar_banco()
+    contracts_file = utils.get_database_file(banco, "contracts.json")
 except Exception as e:
     st.error(f"Erro de conexão: {e}")
     st.stop()
@@ -54,16 +45,35 @@ with col2:
     status_selecionado = st.selectbox("Filtrar por Status", options=status_opcoes)
 with col3:
     data_hoje = datetime.now().date()
-    busca_data = st.date_input("Filtrar por Data de Geração", value=None, max_value=data_hoje)
+    # Um dia só (um clique) ou um período (dois cliques).
+    busca_periodo = st.date_input("Filtrar por Data de Geração", value=(), max_value=data_hoje, format="DD/MM/YYYY")
 
-contratos_filtrados = contratos_data
+# Status, período e ordem (mais recentes primeiro) saem do índice de
+# contratos; o nome, abaixo. A coleção não é lida a cada execução: os índices
+# conferem a versão no backend e só a leem quando ela mudou (contratos
+# alterados por outra instância também aparecem).
+status = None if status_selecionado == "Todos" else status_selecionado
+periodo = (busca_periodo[0], busca_periodo[-1]) if busca_periodo else None
+try:
+    contratos_filtrados = utils.consultar_contratos(contracts_file, status, periodo)
+    if busca_texto:
+        por_numero = utils.consultar_contratos(contracts_file, status, periodo, numero=busca_texto)
+        # Todos os parecidos: o corte só vale depois de cruzar com os filtros.
+        por_nome = utils.buscar_por_nome(contracts_file, busca_texto, limite=None)
+except Exception as e:
+    st.error(f"Erro de conexão: {e}")
+    st.stop()
 if busca_texto:
-    busca_texto_lower = busca_texto.lower()
-    contratos_filtrados = [c for c in contratos_filtrados if busca_texto_lower in c['numero_contrato'].lower() or busca_texto_lower in c['cliente']['nome_razao_social'].lower()]
-if status_selecionado != "Todos":
-    contratos_filtrados = [c for c in contratos_filtrados if c.get('status') == status_selecionado]
-if busca_data:
-    contratos_filtrados = [c for c in contratos_filtrados if c['data_geracao'] == busca_data.isoformat()]
+    # Nº do contrato por trecho; nome do cliente pelo índice de busca aproximada
+    # (sem acentos, tolera erros), mantendo só os contratos que passaram nos
+    # filtros acima. Contratos pelo número vêm primeiro, depois por relevância.
+    ids_filtrados = {c['id_contrato'] for c in contratos_filtrados}
+    ids_por_numero = {c['id_contrato'] for c in por_numero}
+    por_nome = [c for c in por_nome if c['id_contrato'] in ids_filtrados and c['id_contrato'] not in ids_por_numero]
+    contratos_filtrados = por_numero + por_nome[:LIMITE_POR_NOME]
+
+utils.exibir_exportacao(contracts_file, "Exportar contratos em lote (.zip)",
+                        ["Ativo", "Encerrado", "Encerrado com Pendências"], "CONTRATOS")
 
 st.markdown("---")
 st.subheader("Contratos Encontrados")
@@ -71,9 +81,7 @@ st.subheader("Contratos Encontrados")
 if not contratos_filtrados:
     st.info("Nenhum contrato encontrado com os filtros atuais.")
 else:
-    contratos_ordenados = sorted(contratos_filtrados, key=lambda c: c['data_geracao'], reverse=True)
-    
-    for contrato in contratos_ordenados:
+    for contrato in contratos_filtrados:
         cliente = contrato['cliente']
         status_atual = contrato.get('status', 'N/A')
         
@@ -97,11 +105,10 @@ else:
             botoes_col1, botoes_col2, botoes_col3, botoes_col4 = st.columns(4)
             
             with botoes_col1:
-                # Botão de Download habilitado
-                contrato_docx = utils.gerar_contrato_docx(contrato)
+                # O contrato só é gerado quando o botão é clicado.
                 st.download_button(
                     label="Baixar Novamente",
-                    data=contrato_docx,
+                    data=utils.contrato_docx_sob_demanda(contrato),
                     file_name=f"CONTRATO_{contrato['numero_contrato']}_{cliente['nome_razao_social']}.docx",
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                     key=f"download_{contrato['id_contrato']}",
@@ -112,19 +119,18 @@ else:
             if status_atual == "Ativo":
                 with botoes_col2:
                     if st.button("Encerrar Contrato", key=f"end_{contrato['id_contrato']}", use_container_width=True):
-                        atualizar_status_contrato(drive, contrato['id_contrato'], "Encerrado")
+                        atualizar_status_contrato(banco, contrato['id_contrato'], "Encerrado")
                 with botoes_col3:
                     if st.button("Encerrar com Pendências", key=f"pend_{contrato['id_contrato']}", use_container_width=True):
-                        atualizar_status_contrato(drive, contrato['id_contrato'], "Encerrado com Pendências")
+                        atualizar_status_contrato(banco, contrato['id_contrato'], "Encerrado com Pendências")
             else:
                 with botoes_col2:
                     if st.button("Reativar Contrato", key=f"reactivate_{contrato['id_contrato']}", use_container_width=True):
-                        atualizar_status_contrato(drive, contrato['id_contrato'], "Ativo")
+                        atualizar_status_contrato(banco, contrato['id_contrato'], "Ativo")
 
             with botoes_col4:
                 if st.button("Excluir", type="primary", key=f"delete_{contrato['id_contrato']}", use_container_width=True):
-                    contratos_atualizados = [c for c in contratos_data if c['id_contrato'] != contrato['id_contrato']]
-                    utils.write_data(contracts_file, contratos_atualizados)
+                    utils.excluir_registro(contracts_file, contrato['id_contrato'])
                     st.success(f"Contrato Nº {contrato['numero_contrato']} foi excluído.")
                     st.rerun()
 
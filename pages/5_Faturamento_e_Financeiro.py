@@ -6,14 +6,16 @@ from datetime import date, datetime, timedelta
 
 st.set_page_config(page_title="Faturamento e Financeiro", layout="wide")
 
+# Período de emissão mostrado ao abrir a página. Com as faturas particionadas
+# por mês, só esses meses são lidos; limpar o filtro mostra todas.
+DIAS_PERIODO_PADRAO = 90
+
 # --- Função de Ação para Atualizar Status ---
-def atualizar_status_fatura(drive, invoices_file, faturas_data, id_fatura, novo_status):
-    """Encontra uma fatura na lista, atualiza seu status e salva o arquivo de volta no Drive."""
-    for fatura in faturas_data:
-        if fatura['id_fatura'] == id_fatura:
-            fatura['status'] = novo_status
-            break
-    utils.write_data(invoices_file, faturas_data)
+def atualizar_status_fatura(banco, invoices_file, faturas_data, id_fatura, novo_status):
+    """Encontra uma fatura na lista e grava somente a alteração do seu status."""
+    fatura = next(f for f in faturas_data if f['id_fatura'] == id_fatura)
+    fatura['status'] = novo_status
+    utils.atualizar_registro(invoices_file, id_fatura, {'status': novo_status})
     st.success(f"Status da fatura Nº {fatura['numero_fatura']} atualizado para '{novo_status}'.")
     st.rerun() # Recarrega a página para refletir a mudança
 
@@ -31,15 +33,33 @@ with st.sidebar:
 st.title("Faturamento e Gerenciamento Financeiro")
 
 # --- Carregamento dos Dados ---
+# Contratos e faturas são buscados juntos. Os filtros da aba "Gerenciar
+# Faturas" já estão no session_state (chaves dos widgets) quando a página roda.
+status_selecionado = st.session_state.get('filtro_status_fatura', "Todas")
+periodo_emissao = st.session_state.setdefault(
+    'filtro_periodo_emissao', (date.today() - timedelta(days=DIAS_PERIODO_PADRAO), date.today()))
+filtros = {} if status_selecionado == "Todas" else {'status': status_selecionado}
+# Com as faturas particionadas por mês, só os meses do período são lidos. Uma
+# data só (um clique) é o período de um dia, como na página de contratos.
+periodo = (periodo_emissao[0], periodo_emissao[-1]) if periodo_emissao else None
 try:
-    drive = utils.login_gdrive()
-    contracts_file = utils.get_database_file(drive, "contracts.json")
-    contratos_data = utils.read_data(contracts_file)
-    invoices_file = utils.get_database_file(drive, "invoices.json")
-    faturas_data = utils.read_data(invoices_file)
+    banco = utils.conectar_banco()
 except Exception as e:
     st.error(f"Erro de conexão: {e}")
     st.stop()
+cargas = utils.carregar_colecoes(banco, {
+    "contracts.json": {'filtros': {'status': 'Ativo'}},
+    "invoices.json": {'filtros': filtros, 'ordenar_por': 'data_emissao', 'decrescente': True, 'periodo': periodo},
+})
+for nome, carga in cargas.items():
+    if carga.erro:
+        st.error(f"Erro de conexão ao carregar {nome}: {carga.erro}")
+if any(carga.erro for carga in cargas.values()):
+    st.stop()
+contracts_file, contratos_ativos = cargas["contracts.json"].colecao, cargas["contracts.json"].dados
+invoices_file, faturas_filtradas = cargas["invoices.json"].colecao, cargas["invoices.json"].dados
+
+fatura_lancada = False
 
 # --- Abas ---
 tab1, tab2 = st.tabs([" Lançar Nova Fatura ", " Gerenciar Faturas Existentes "])
@@ -48,7 +68,6 @@ tab1, tab2 = st.tabs([" Lançar Nova Fatura ", " Gerenciar Faturas Existentes "]
 with tab1:
     st.header("Criar Nova Fatura")
     
-    contratos_ativos = [c for c in contratos_data if c.get('status') == 'Ativo']
     if not contratos_ativos:
         st.warning("Não há contratos ativos para faturar.")
     else:
@@ -90,7 +109,7 @@ with tab1:
                     cliente_estado = contrato_obj['cliente'].get('estado', 'SC') # Padrão SC se não houver
                     cliente_cep = contrato_obj['cliente'].get('cep', '')
 
-                    novo_numero_fatura = utils.get_next_fatura_number(drive)
+                    novo_numero_fatura = utils.get_next_fatura_number(banco)
                     if novo_numero_fatura:
                         nova_fatura = {
                             "id_fatura": str(uuid.uuid4()),
@@ -106,8 +125,8 @@ with tab1:
                             "cliente_info": contrato_obj['cliente'],
                             "contrato_info": {"numero": contrato_obj['numero_contrato']}
                         }
-                        faturas_data.append(nova_fatura)
-                        utils.write_data(invoices_file, faturas_data)
+                        utils.inserir_registro(invoices_file, nova_fatura)
+                        fatura_lancada = True
                         
                         # Prepare os dados para o template DOCX
                         dados_template_para_docx = {
@@ -143,17 +162,28 @@ with tab1:
 with tab2:
     st.header("Consultar e Gerenciar Faturas")
     
-    status_opcoes = ["Todas", "Pendente", "Liquidada", "Cancelada"]
-    status_selecionado = st.selectbox("Filtrar por Status", options=status_opcoes)
-    
-    faturas_filtradas = faturas_data
-    if status_selecionado != "Todas":
-        faturas_filtradas = [f for f in faturas_data if f.get('status') == status_selecionado]
+    # As faturas já vieram filtradas no carregamento, no topo da página.
+    col_status, col_periodo = st.columns(2)
+    with col_status:
+        status_opcoes = ["Todas", "Pendente", "Liquidada", "Cancelada"]
+        st.selectbox("Filtrar por Status", options=status_opcoes, key='filtro_status_fatura')
+    with col_periodo:
+        st.date_input("Filtrar por Período de Emissão", format="DD/MM/YYYY", key='filtro_periodo_emissao')
+    utils.exibir_exportacao(invoices_file, "Exportar faturas em lote (.zip)",
+                            ["Pendente", "Liquidada", "Cancelada"], "FATURAS")
+
+    if fatura_lancada:
+        # A fatura lançada na outra aba nesta execução ainda não está na lista carregada.
+        try:
+            faturas_filtradas = utils.consultar_registros(invoices_file, filtros, ordenar_por='data_emissao', decrescente=True, periodo=periodo)
+        except Exception as e:
+            st.error(f"Erro de conexão: {e}")
+            st.stop()
         
     if not faturas_filtradas:
         st.info("Nenhuma fatura encontrada com os filtros atuais.")
     else:
-        for f in sorted(faturas_filtradas, key=lambda i: i['data_emissao'], reverse=True):
+        for f in faturas_filtradas:
             status = f.get('status', 'N/A')
             cor_status = {"Pendente": "🟠", "Liquidada": "🟢", "Cancelada": "⚫"}.get(status, "⚪")
             
@@ -174,38 +204,19 @@ with tab2:
                 cols_acoes = st.columns(4)
                 
                 with cols_acoes[0]:
-                    # Ao baixar novamente, garanta que todos os dados do cliente são passados
-                    # incluindo bairro, cidade, estado e CEP, para que o utils.py possa usá-los com .get()
-                    fatura_info_para_download = {
-                        "NUMERO_FATURA": f.get("numero_fatura"), 
-                        "DATA_EMISSAO": datetime.fromisoformat(f.get("data_emissao")).strftime('%d/%m/%Y'),
-                        "NOME_CLIENTE": f['cliente_info'].get('nome_razao_social', ''), 
-                        "CNPJ_CLIENTE": f['cliente_info'].get('cpf_cnpj', ''),
-                        "ENDERECO_CLIENTE": f['cliente_info'].get('endereco', ''),
-                        "BAIRRO_CLIENTE": f['cliente_info'].get('bairro', ''),
-                        "CIDADE_CLIENTE": f['cliente_info'].get('cidade', ''),
-                        "ESTADO_CLIENTE": f['cliente_info'].get('estado', ''),
-                        "CEP_CLIENTE": f['cliente_info'].get('cep', ''),
-                        "FORMA_PAGAMENTO": f.get("forma_pagamento", ''), 
-                        "DATA_VENCIMENTO": datetime.fromisoformat(f.get("data_vencimento")).strftime('%d/%m/%Y'),
-                        "DESCRICAO_SERVICO": f.get("descricao_servico", ''), 
-                        "VALOR_TOTAL": f.get("valor_total", ''), 
-                        "OBSERVACAO": f.get("observacao", '') # Passa a observação existente
-                    }
-                    fatura_docx = utils.gerar_fatura_docx(fatura_info_para_download)
-                    st.download_button("Baixar Novamente", data=fatura_docx, file_name=f"FATURA_{f['numero_fatura']}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", key=f"dl_{f['id_fatura']}")
+                    st.download_button("Baixar Novamente", data=utils.fatura_docx_sob_demanda(utils.dados_fatura_docx(f)), file_name=f"FATURA_{f['numero_fatura']}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", key=f"dl_{f['id_fatura']}")
 
                 if status == "Pendente":
                     with cols_acoes[1]:
                         if st.button("Marcar como Liquidada", key=f"paid_{f['id_fatura']}", use_container_width=True):
-                            atualizar_status_fatura(drive, invoices_file, faturas_data, f['id_fatura'], "Liquidada")
+                            atualizar_status_fatura(banco, invoices_file, faturas_filtradas, f['id_fatura'], "Liquidada")
                     with cols_acoes[2]:
                         if st.button("Cancelar Fatura", type="primary", key=f"cancel_{f['id_fatura']}", use_container_width=True):
-                            atualizar_status_fatura(drive, invoices_file, faturas_data, f['id_fatura'], "Cancelada")
+                            atualizar_status_fatura(banco, invoices_file, faturas_filtradas, f['id_fatura'], "Cancelada")
                 
                 elif status in ["Liquidada", "Cancelada"]:
                     with cols_acoes[1]:
                         if st.button("Reverter para Pendente", key=f"revert_{f['id_fatura']}", use_container_width=True):
-                            atualizar_status_fatura(drive, invoices_file, faturas_data, f['id_fatura'], "Pendente")
+                            atualizar_status_fatura(banco, invoices_file, faturas_filtradas, f['id_fatura'], "Pendente")
 
 utils.exibir_rodape()
\ No newline at end of file
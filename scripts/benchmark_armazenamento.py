@@ -0,0 +1,205 @@
+# scripts/benchmark_armazenamento.py
+"""Mede a camada de armazenamento sobre o Drive simulado (drive_simulado.py).
+
+Uso (na raiz do projeto; não precisa de credenciais):
+    python scripts/benchmark_armazenamento.py
+    python scripts/benchmark_armazenamento.py --tamanhos 100,1000 --latencia 150 --banda 10
+    python scripts/benchmark_armazenamento.py --formato json-gzip --journal --json resultado.json
+
+Para cada tamanho de base (número de clientes, contratos e faturas), roda os
+cenários abaixo 'repeticoes' vezes usando as mesmas funções de utils que as
+páginas usam, e mostra p50/p95 do tempo, bytes transferidos e requisições:
+
+- carga_fria: página de faturamento num processo recém-iniciado (sem cache)
+- carga_pagina: a mesma página com o processo já aquecido
+- criar_cliente: cadastro de um cliente
+- gerar_contrato: número do contrato + gravação (sem montar o .docx)
+- status_fatura: troca de status de uma fatura
+
+Por padrão o tempo de rede é simulado (somado, sem esperar); --dormir faz o
+Drive simulado esperar de verdade. Como o modo simulado soma também as
+requisições feitas em paralelo (carregar_colecoes, partições), use --dormir
+para medir o ganho da carga concorrente.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from armazenamento import ArmazenamentoParticionado, FORMATOS
+from armazenamento_drive import ArmazenamentoDrive
+from drive_simulado import DriveSimulado
+
+STATUS_FATURA = ["Pendente", "Liquidada", "Cancelada"]
+
+
+# --- Dados sintéticos ---
+def _cliente(i):
+    return {
+        "id": str(uuid.uuid4()),
+        "tipo_pessoa": "Pessoa Jurídica",
+        "nome_razao_social": f"Cliente Exemplo {i} Ltda",
+        "cpf_cnpj": f"{i:02d}.000.000/0001-{i % 100:02d}",
+        "endereco": f"Rua das Flores, {i}",
+        "bairro": "Centro", "cidade": "Florianópolis", "estado": "SC", "cep": "88000-000",
+        "telefone": "(48) 99999-0000", "email": f"cliente{i}@exemplo.com.br",
+    }
+
+def _contrato(i, cliente, data):
+    return {
+        "id_contrato": str(uuid.uuid4()),
+        "numero_contrato": f"{i:05d}-{data.year}",
+        "data_geracao": data.isoformat(),
+        "status": random.choice(["Ativo", "Encerrado", "Encerrado com Pendências"]),
+        "tipo_contrato": "Locação",
+        "cliente": cliente,
+        "itens_contrato": [{"produto": "Andaime", "plataforma": "Sim", "quantidade": 10, "valor_unitario": 35.0}],
+        "valor_entrega": 150.0, "valor_recolha": 150.0,
+        "endereco_obra": "Rua da Obra, 100", "contato_nome": "Fulano", "contato_telefone": "(48) 3333-0000",
+        "data_inicio": data.strftime("%d/%m/%Y"), "data_assinatura": data.strftime("%d de %B de %Y").lower(),
+    }
+
+def _fatura(i, contrato, data):
+    return {
+        "id_fatura": str(uuid.uuid4()),
+        "numero_fatura": f"{i:07d}",
+        "id_contrato": contrato["id_contrato"],
+        "status": random.choice(STATUS_FATURA),
+        "data_emissao": data.isoformat(),
+        "data_vencimento": (data + timedelta(days=30)).isoformat(),
+        "descricao_servico": "Locação de equipamentos",
+        "valor_total": "1500.00", "forma_pagamento": "Boleto", "observacao": "",
+        "cliente_info": contrato["cliente"],
+        "contrato_info": {"numero": contrato["numero_contrato"]},
+    }
+
+def gerar_base(tamanho):
+    hoje = date.today()
+    clientes = [_cliente(i) for i in range(tamanho)]
+    contratos, faturas = [], []
+    for i in range(tamanho):
+        # Datas espalhadas pelos últimos três anos.
+        data = hoje - timedelta(days=random.randrange(3 * 365))
+        contratos.append(_contrato(i, random.choice(clientes), data))
+        faturas.append(_fatura(i, contratos[-1], data))
+    config = {"ultimo_numero_contrato": tamanho, "ultimo_numero_fatura": tamanho}
+    return {"clients.json": clientes, "contracts.json": contratos, "invoices.json": faturas, "config.json": config}
+
+
+# --- Cenários (o mesmo caminho das páginas) ---
+DIAS_PERIODO_PADRAO = 90  # o período de emissão com que a página de faturamento abre
+
+def carga_pagina(banco, contexto):
+    periodo = (date.today() - timedelta(days=DIAS_PERIODO_PADRAO), date.today())
+    cargas = utils.carregar_colecoes(banco, {
+        "contracts.json": {'filtros': {'status': 'Ativo'}},
+        "invoices.json": {'ordenar_por': 'data_emissao', 'decrescente': True, 'periodo': periodo},
+    })
+    for carga in cargas.values():
+        if carga.erro:
+            raise carga.erro
+
+def criar_cliente(banco, contexto):
+    clients_file = utils.get_database_file(banco, "clients.json")
+    utils.inserir_registro(clients_file, _cliente(random.randrange(10 ** 6)))
+
+def gerar_contrato(banco, contexto):
+    numero = utils.get_next_contract_number(banco)
+    contrato = _contrato(0, _cliente(0), date.today())
+    contrato["numero_contrato"] = numero
+    utils.inserir_registro(utils.get_database_file(banco, "contracts.json"), contrato)
+
+def status_fatura(banco, contexto):
+    invoices_file = utils.get_database_file(banco, "invoices.json")
+    utils.atualizar_registro(invoices_file, random.choice(contexto["ids_faturas"]), {'status': random.choice(STATUS_FATURA)})
+
+
+# --- Medição ---
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def _medir(drive, funcao, repeticoes, dormir):
+    tempos, transferidos, requisicoes = [], [], []
+    for _ in range(repeticoes):
+        antes = drive.estatisticas()
+        inicio = time.perf_counter()
+        funcao()
+        decorrido = time.perf_counter() - inicio
+        depois = drive.estatisticas()
+        if not dormir:
+            decorrido += depois["tempo_rede"] - antes["tempo_rede"]
+        tempos.append(decorrido * 1000)
+        transferidos.append(depois["bytes_down"] + depois["bytes_up"] - antes["bytes_down"] - antes["bytes_up"])
+        requisicoes.append(depois["requests"] - antes["requests"])
+    return {
+        "p50_ms": round(_percentil(tempos, 50), 1),
+        "p95_ms": round(_percentil(tempos, 95), 1),
+        "bytes_medio": int(sum(transferidos) / len(transferidos)),
+        "requisicoes_medio": round(sum(requisicoes) / len(requisicoes), 1),
+    }
+
+def rodar(tamanho, args):
+    drive = DriveSimulado(latencia=args.latencia / 1000, banda=args.banda * 125_000 or None, dormir=args.dormir)
+    opcoes = {"formato": args.formato, "journal": args.journal}
+
+    def novo_banco():
+        banco = ArmazenamentoDrive(drive, **opcoes)
+        return ArmazenamentoParticionado(banco) if args.particionado else banco
+
+    # Popula a base sem contar na medição.
+    base = gerar_base(tamanho)
+    banco = novo_banco()
+    for nome, dados in base.items():
+        banco.gravar(banco.abrir(nome), dados)
+    contexto = {"ids_faturas": [f["id_fatura"] for f in base["invoices.json"]]}
+    del base
+    utils._blocos_numeros.clear()  # cada base começa sem bloco de números reservado
+
+    resultados = {
+        # Um backend novo por repetição: processo recém-iniciado, caches vazios.
+        "carga_fria": _medir(drive, lambda: carga_pagina(novo_banco(), contexto), args.repeticoes, args.dormir),
+    }
+    banco = novo_banco()
+    carga_pagina(banco, contexto)  # aquece o registro de IDs e o cache de leitura
+    for nome, cenario in (("carga_pagina", carga_pagina), ("criar_cliente", criar_cliente),
+                          ("gerar_contrato", gerar_contrato), ("status_fatura", status_fatura)):
+        resultados[nome] = _medir(drive, lambda: cenario(banco, contexto), args.repeticoes, args.dormir)
+    return resultados
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark da camada de armazenamento sobre o Drive simulado.")
+    parser.add_argument("--tamanhos", default="100,1000,10000,100000", help="tamanhos de base, separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--latencia", type=float, default=100, help="latência por requisição, em ms")
+    parser.add_argument("--banda", type=float, default=20, help="banda em Mbit/s (0 = sem limite)")
+    parser.add_argument("--formato", default="json-indent", choices=FORMATOS)
+    parser.add_argument("--journal", action="store_true", help="usa storage_mode = journal")
+    parser.add_argument("--particionado", action="store_true", help="usa partition_by_period")
+    parser.add_argument("--dormir", action="store_true", help="espera de verdade a latência/banda simuladas")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args(argv[1:])
+
+    random.seed(0)
+    todos = {}
+    print(f"{'tamanho':>8}  {'cenário':<15} {'p50 ms':>10} {'p95 ms':>10} {'bytes':>12} {'reqs':>6}")
+    for tamanho in (int(t) for t in args.tamanhos.split(',')):
+        todos[tamanho] = rodar(tamanho, args)
+        for cenario, r in todos[tamanho].items():
+            print(f"{tamanho:>8}  {cenario:<15} {r['p50_ms']:>10} {r['p95_ms']:>10} {r['bytes_medio']:>12} {r['requisicoes_medio']:>6}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"parametros": vars(args), "resultados": todos}, f, indent=4, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
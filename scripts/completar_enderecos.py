@@ -0,0 +1,89 @@
+# scripts/completar_enderecos.py
+"""Completa bairro, cidade, UF e logradouro dos clientes a partir do CEP.
+
+Uso (na raiz do projeto, com as mesmas configurações do app):
+    python scripts/completar_enderecos.py --simular        # só mostra o que mudaria
+    python scripts/completar_enderecos.py
+    python scripts/completar_enderecos.py --trabalhadores 8 --por-segundo 10
+
+Junta os CEPs distintos dos clientes que têm algum campo de endereço vazio
+(ou o CEP digitado fora do formato 00000-000), consulta esses CEPs em
+paralelo pelo mesmo resolvedor do app (utils.resolvedor_cep), respeitando o
+limite de consultas por segundo, e grava todas as correções de uma vez.
+Só preenche campos vazios; o que já foi digitado não é sobrescrito.
+
+Pode ser interrompido (Ctrl+C) e rodado de novo: os CEPs já consultados ficam
+no cache de CEPs e não voltam à API, e nada é gravado antes do fim.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from consulta_cep import LimiteDeTaxa, consultar_varios
+
+CAMPOS = {"bairro": "bairro", "cidade": "localidade", "estado": "uf", "endereco": "logradouro"}
+
+
+def cep_formatado(cep):
+    digitos = "".join(filter(str.isdigit, cep or ""))
+    return f"{digitos[:5]}-{digitos[5:]}" if len(digitos) == 8 else None
+
+def precisa_completar(cliente):
+    cep = cep_formatado(cliente.get("cep"))
+    return cep is not None and (cep != cliente.get("cep") or any(not cliente.get(campo) for campo in CAMPOS))
+
+def correcoes(cliente, endereco):
+    alteracoes = {campo: endereco[origem] for campo, origem in CAMPOS.items()
+                  if not cliente.get(campo) and endereco.get(origem)}
+    if cliente.get("cep") != cep_formatado(cliente.get("cep")):
+        alteracoes["cep"] = cep_formatado(cliente.get("cep"))
+    return alteracoes
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Completa os endereços dos clientes pelo CEP.")
+    parser.add_argument("--trabalhadores", type=int, default=4, help="consultas simultâneas à API de CEP")
+    parser.add_argument("--por-segundo", type=float, default=5, help="máximo de consultas à API por segundo")
+    parser.add_argument("--simular", action="store_true", help="não grava nada, só mostra o resumo")
+    args = parser.parse_args(argv[1:])
+
+    banco = utils.conectar_banco()
+    clients_file = utils.get_database_file(banco, "clients.json")
+    clientes = [c for c in utils.read_data(clients_file) if precisa_completar(c)]
+    ceps = sorted({cep_formatado(c["cep"]) for c in clientes})
+    print(f"{len(clientes)} cliente(s) para completar, {len(ceps)} CEP(s) distinto(s).")
+    if not ceps:
+        return 0
+
+    resolvedor = utils.resolvedor_cep()
+    resolvedor.limite = LimiteDeTaxa(args.por_segundo)
+    def progresso(feitos, total):
+        print(f"\r{feitos}/{total} CEP(s) consultado(s)", end="", flush=True)
+    enderecos = consultar_varios(resolvedor, ceps, args.trabalhadores, progresso)
+    print()
+
+    alteracoes = {}
+    for cliente in clientes:
+        endereco = enderecos.get(cep_formatado(cliente["cep"]))
+        if endereco:
+            mudancas = correcoes(cliente, endereco)
+            if mudancas:
+                alteracoes[cliente["id"]] = mudancas
+    nao_encontrados = sorted(cep for cep, endereco in enderecos.items() if not endereco)
+
+    print(f"{len(alteracoes)} cliente(s) com correções; {len(nao_encontrados)} CEP(s) não encontrado(s) ou sem resposta.")
+    for cep in nao_encontrados[:20]:
+        print(f"  {cep}")
+    print(f"Cache de CEPs: {resolvedor.estatisticas()}")
+    if alteracoes and not args.simular:
+        utils.atualizar_registros(clients_file, alteracoes)
+        utils.salvar_pendencias()
+        print("Correções gravadas.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
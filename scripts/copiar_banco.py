@@ -0,0 +1,32 @@
+# scripts/copiar_banco.py
+"""Copia os dados de um backend de armazenamento para outro.
+
+Uso (na raiz do projeto):
+    python scripts/copiar_banco.py drive sqlite     # baixa tudo do Drive para o SQLite
+    python scripts/copiar_banco.py drive local      # ... ou para a pasta local
+
+Os caminhos de destino vêm de 'sqlite_path' e 'local_storage_path'. Útil para
+rodar e medir o app offline com os dados reais.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from armazenamento import copiar_banco
+
+
+def main(argv):
+    if len(argv) != 3 or argv[1] not in utils.BACKENDS or argv[2] not in utils.BACKENDS or argv[1] == argv[2]:
+        print(f"Uso: python {argv[0]} <origem> <destino>   ({'|'.join(utils.BACKENDS)})")
+        return 2
+    origem = utils.criar_banco(argv[1])
+    destino = utils.criar_banco(argv[2])
+    for nome, quantidade in copiar_banco(origem, destino).items():
+        print(f"{nome}: {quantidade} item(ns)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,30 @@
+# scripts/migrar_formato.py
+"""Regrava os arquivos do banco (backends drive e local) em outro formato.
+
+Uso (na raiz do projeto, com as mesmas credenciais do app):
+    python scripts/migrar_formato.py json-gzip
+
+Depois da migração, configure 'storage_format' com o mesmo valor; caso
+contrário a próxima gravação volta a usar o formato anterior.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from armazenamento import FORMATOS
+
+
+def main(argv):
+    if len(argv) != 2 or argv[1] not in FORMATOS:
+        print(f"Uso: python {argv[0]} <{'|'.join(FORMATOS)}>")
+        return 2
+    banco = utils.conectar_banco()
+    for filename, (antes, depois) in utils.migrar_formato(banco, argv[1]).items():
+        print(f"{filename}: {antes} -> {depois} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,76 @@
+# scripts/tempo_importacao.py
+"""Mostra quanto cada página gasta importando módulos antes de desenhar algo.
+
+Uso (na raiz do projeto):
+    python scripts/tempo_importacao.py            # páginas e módulos carregados sob demanda
+    python scripts/tempo_importacao.py --top 10   # mais módulos no detalhamento
+
+Para cada página, os imports do topo do arquivo rodam num processo Python
+novo com '-X importtime' (com o streamlit já carregado, como no servidor); o
+relatório traz o tempo total e os pacotes mais caros. Os módulos que utils carrega só no primeiro uso (Drive, documentos,
+validação, CEP) são medidos à parte, já com utils importado, para mostrar o
+custo que deixou de ser pago na abertura.
+"""
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOB_DEMANDA = ["armazenamento_drive", "documentos", "validacao", "consulta_cep"]
+MARCA = "--- inicio da medicao ---"
+
+
+def imports_do_topo(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        arvore = ast.parse(f.read(), caminho)
+    return "\n".join(ast.unparse(no) for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom)))
+
+def medir(codigo, preparo=""):
+    """Roda 'codigo' num processo novo e devolve [(cumulativo_us, modulo)] dos imports de primeiro nível."""
+    programa = f"{preparo}\nimport sys\nprint({MARCA!r}, file=sys.stderr, flush=True)\n{codigo}\n"
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", programa],
+                           cwd=RAIZ, capture_output=True, text=True)
+    if saida.returncode != 0:
+        raise RuntimeError(saida.stderr.strip().splitlines()[-1])
+    linhas = saida.stderr.split(MARCA, 1)[1].splitlines()
+    modulos = []
+    for linha in linhas:
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        # Só os de primeiro nível (sem recuo): o cumulativo deles já inclui os filhos.
+        if not nome.startswith("  "):
+            modulos.append((int(cumulativo), nome.strip()))
+    return modulos
+
+def relatorio(titulo, modulos, top):
+    total = sum(us for us, _ in modulos)
+    print(f"{titulo:<45} {total / 1000:>9.1f} ms")
+    for us, nome in sorted(modulos, reverse=True)[:top]:
+        print(f"    {nome:<41} {us / 1000:>9.1f} ms")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Tempo de importação de cada página.")
+    parser.add_argument("--top", type=int, default=5, help="quantos módulos mostrar por página")
+    args = parser.parse_args(argv[1:])
+
+    paginas = [os.path.join(RAIZ, "1_Login.py"), *sorted(glob.glob(os.path.join(RAIZ, "pages", "*.py")))]
+    # No 'streamlit run' o streamlit já está carregado quando a página roda.
+    print("Páginas (imports do topo do arquivo, com streamlit já importado):")
+    for caminho in paginas:
+        relatorio(os.path.relpath(caminho, RAIZ), medir(imports_do_topo(caminho), preparo="import streamlit"), args.top)
+    print("\nCarregados sob demanda (com utils já importado):")
+    for modulo in SOB_DEMANDA:
+        try:
+            relatorio(modulo, medir(f"import {modulo}", preparo="import utils"), args.top)
+        except RuntimeError as e:
+            print(f"{modulo:<45} não importou: {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
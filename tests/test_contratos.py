@@ -0,0 +1,151 @@
+# tests/test_contratos.py
+# utils.consultar_contratos: filtros do índice de contratos, manutenção
+# incremental pelas alterações feitas por utils e revalidação contra
+# alterações de outra instância (Drive simulado), sem reler a coleção quando
+# nada mudou.
+import threading
+
+import pytest
+
+import utils
+from armazenamento import ArmazenamentoLocal, ArmazenamentoParticionado
+from armazenamento_drive import ArmazenamentoDrive
+from drive_simulado import DriveSimulado
+
+
+def contrato(id_contrato, numero, status, data):
+    return {"id_contrato": id_contrato, "numero_contrato": numero, "status": status, "data_geracao": data,
+            "cliente": {"nome_razao_social": f"Cliente {id_contrato}", "cpf_cnpj": ""}}
+
+CONTRATOS = [
+    contrato("1", "2025-001", "Ativo", "2025-01-10"),
+    contrato("2", "2025-002", "Encerrado", "2025-01-31"),
+    contrato("3", "2025-003", "Ativo", "2025-02-01"),
+    contrato("4", "2025-010", "Ativo", "2025-02-28"),
+    contrato("5", "2025-011", "Encerrado com Pendências", "2025-03-01"),
+    contrato("6", "ABC-7", "Ativo", "2025-02-01"),
+]
+
+
+@pytest.fixture(autouse=True)
+def indices_vazios(monkeypatch):
+    # O cache de índices é do processo; cada teste começa sem nenhum.
+    monkeypatch.setattr(utils, "_indices", {})
+
+@pytest.fixture
+def colecao(tmp_path):
+    banco = ArmazenamentoLocal(str(tmp_path))
+    colecao = banco.abrir("contracts.json")
+    banco.gravar(colecao, [dict(c) for c in CONTRATOS])
+    return colecao
+
+def ids(registros):
+    return [r["id_contrato"] for r in registros]
+
+def consultar(colecao, **filtros):
+    return ids(utils.consultar_contratos(colecao, **filtros))
+
+
+def test_sem_filtros_do_mais_recente_ao_mais_antigo(colecao):
+    # Mesma data: o cadastrado por último primeiro.
+    assert consultar(colecao) == ["5", "4", "6", "3", "2", "1"]
+
+def test_status(colecao):
+    assert consultar(colecao, status="Ativo") == ["4", "6", "3", "1"]
+    assert consultar(colecao, status="Encerrado") == ["2"]
+    assert consultar(colecao, status="Cancelado") == []
+
+def test_numero_por_trecho_sem_diferenciar_maiusculas(colecao):
+    assert consultar(colecao, numero="2025-01") == ["5", "4"]
+    assert consultar(colecao, numero="2025-003") == ["3"]
+    assert consultar(colecao, numero="abc") == ["6"]
+    assert consultar(colecao, numero="999") == []
+
+def test_periodo_inclui_as_duas_pontas(colecao):
+    assert consultar(colecao, periodo=("2025-01-31", "2025-02-28")) == ["4", "6", "3", "2"]
+    assert consultar(colecao, periodo=("2025-02-01", "2025-02-01")) == ["6", "3"]
+    # Antes do primeiro e depois do último contrato.
+    assert consultar(colecao, periodo=("2024-12-01", "2025-01-09")) == []
+    assert consultar(colecao, periodo=("2025-03-02", "2025-12-31")) == []
+
+def test_periodo_aceita_date_e_datetime(colecao):
+    from datetime import date, datetime
+    assert consultar(colecao, periodo=(date(2025, 1, 10), datetime(2025, 1, 31, 23, 59))) == ["2", "1"]
+
+def test_filtros_combinados(colecao):
+    assert consultar(colecao, status="Ativo", periodo=("2025-02-01", "2025-03-31")) == ["4", "6", "3"]
+    assert consultar(colecao, status="Ativo", numero="2025-0", periodo=("2025-01-01", "2025-02-01")) == ["3", "1"]
+    assert consultar(colecao, status="Encerrado", numero="2025-01") == []
+
+
+def test_alteracoes_por_utils_atualizam_o_indice_sem_remontar(colecao):
+    consultar(colecao)
+    indice = utils._indices[("contracts.json", "contratos")]["indice"]
+
+    utils.atualizar_registro(colecao, "1", {"status": "Encerrado"})
+    utils.inserir_registro(colecao, contrato("7", "2025-020", "Ativo", "2025-02-15"))
+    utils.excluir_registro(colecao, "4")
+
+    # O índice em uso recebeu as três alterações pelo _alterar_com_indices...
+    assert utils._indices[("contracts.json", "contratos")]["indice"] is indice
+    assert ids(indice.consultar("Ativo")) == ["7", "6", "3"]
+    assert ids(indice.consultar("Encerrado")) == ["2", "1"]
+    # ...e continua em dia com o arquivo: a próxima consulta não o remonta.
+    assert consultar(colecao, status="Ativo") == ["7", "6", "3"]
+    assert utils._indices[("contracts.json", "contratos")]["indice"] is indice
+
+
+def test_alteracao_de_outra_instancia_no_drive_aparece_na_proxima_execucao():
+    drive = DriveSimulado(dormir=False)
+    esta, outra = ArmazenamentoDrive(drive), ArmazenamentoDrive(drive)
+    esta.gravar(esta.abrir("contracts.json"), [dict(c) for c in CONTRATOS])
+    assert consultar(esta.abrir("contracts.json"), status="Ativo") == ["4", "6", "3", "1"]
+
+    # Outro processo (outra instância do app, um script) grava direto no Drive.
+    colecao_outra = outra.abrir("contracts.json")
+    outra.inserir(colecao_outra, contrato("7", "2025-020", "Ativo", "2025-03-05"))
+    outra.atualizar(colecao_outra, "1", {"status": "Encerrado"})
+
+    # Próxima execução da página: a versão conferida no Drive mudou e o índice é remontado.
+    assert consultar(esta.abrir("contracts.json"), status="Ativo") == ["7", "4", "6", "3"]
+
+
+@pytest.mark.parametrize("particionado", [False, True])
+def test_sem_alteracao_a_execucao_so_confere_a_versao(particionado):
+    drive = DriveSimulado(dormir=False)
+    banco = ArmazenamentoDrive(drive)
+    if particionado:
+        banco = ArmazenamentoParticionado(banco)
+    banco.gravar(banco.abrir("contracts.json"), [dict(c) for c in CONTRATOS])
+    assert consultar(banco.abrir("contracts.json"), status="Ativo") == ["4", "6", "3", "1"]
+
+    # Execuções seguintes da página: uma consulta de metadados, nada baixado.
+    drive.zerar_estatisticas()
+    for _ in range(3):
+        assert consultar(banco.abrir("contracts.json"), status="Ativo") == ["4", "6", "3", "1"]
+    assert drive.estatisticas()["requests"] == 3
+    assert drive.estatisticas()["bytes_down"] == 0
+
+
+def test_alteracoes_simultaneas_de_duas_sessoes_chegam_ao_indice(colecao, monkeypatch):
+    consultar(colecao)
+    banco = colecao.armazenamento
+    inserir = banco.inserir
+    outra_sessao = []
+    def inserir_e_deixar_outra_sessao_gravar(colecao, registro):
+        inserir(colecao, registro)
+        if not outra_sessao:
+            # Outra sessão (outra thread do servidor) grava logo depois desta gravação.
+            sessao = threading.Thread(target=utils.atualizar_registro, args=(colecao, "1", {"status": "Encerrado"}))
+            outra_sessao.append(sessao)
+            sessao.start()
+            sessao.join(timeout=0.2)
+    monkeypatch.setattr(banco, "inserir", inserir_e_deixar_outra_sessao_gravar)
+
+    utils.inserir_registro(colecao, contrato("7", "2025-020", "Ativo", "2025-02-15"))
+    outra_sessao[0].join()
+    # O índice em dia com a versão atual tem as duas alterações.
+    entrada = utils._indices[("contracts.json", "contratos")]
+    assert entrada["versao"] == banco.versao(colecao)
+    assert ids(entrada["indice"].consultar("Ativo")) == ["4", "7", "6", "3"]
+    assert consultar(colecao, status="Encerrado") == ["2", "1"]
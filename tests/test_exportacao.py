@@ -0,0 +1,87 @@
+# tests/test_exportacao.py
+# exportacao.exportar_zip: nomes dentro do zip, ordem e o mesmo resultado
+# gerando no próprio processo ou no pool de processos.
+import io
+import zipfile
+
+import pytest
+
+import exportacao
+
+
+def fatura(numero):
+    return {"NUMERO_FATURA": numero, "DATA_EMISSAO": "10/01/2025", "NOME_CLIENTE": f"Cliente {numero}",
+            "CNPJ_CLIENTE": "11.222.333/0001-81", "ENDERECO_CLIENTE": "Rua A, 1", "CIDADE_CLIENTE": "São José",
+            "DESCRICAO_SERVICO": "Locação de andaimes", "VALOR_TOTAL": "150,00", "DATA_VENCIMENTO": "10/02/2025",
+            "FORMA_PAGAMENTO": "PIX", "OBSERVACAO": ""}
+
+def exportar(itens, **opcoes):
+    destino = io.BytesIO()
+    quantidade = exportacao.exportar_zip("fatura", itens, destino, **opcoes)
+    destino.seek(0)
+    with zipfile.ZipFile(destino) as arquivo:
+        assert arquivo.testzip() is None
+        return quantidade, [(info.filename, arquivo.read(info.filename)) for info in arquivo.infolist()]
+
+
+@pytest.mark.parametrize("nome, esperado", [
+    ("FATURA_12.docx", "FATURA_12.docx"),
+    ('CONTRATO_1_A/B: "C"*?.docx', "CONTRATO_1_A_B_ _C_.docx"),
+    ("CONTRATO_2_Empresa\\Filial|<x>.docx", "CONTRATO_2_Empresa_Filial_x_.docx"),
+    ("linha\nquebrada.docx", "linha_quebrada.docx"),
+    (" . ", "documento"),
+])
+def test_nome_seguro(nome, esperado):
+    assert exportacao.nome_seguro(nome) == esperado
+
+def test_nomes_repetidos_ganham_sufixo():
+    itens = [("FATURA_1.docx", fatura("1")), ("FATURA_1.docx", fatura("1")), ("fatura_1.docx", fatura("1")),
+             ("FATURA_2.docx", fatura("2")), ("FATURA_1.docx", fatura("1"))]
+    quantidade, entradas = exportar(itens)
+    assert quantidade == 5
+    assert [nome for nome, _ in entradas] == ["FATURA_1.docx", "FATURA_1_2.docx", "fatura_1_3.docx", "FATURA_2.docx", "FATURA_1_4.docx"]
+
+def test_ordem_dos_itens_e_progresso():
+    itens = [(f"FATURA_{n}.docx", fatura(str(n))) for n in (30, 2, 17, 5) * 20]
+    chamadas = []
+    _, entradas = exportar(itens, progresso=lambda feitos, total: chamadas.append((feitos, total)))
+    numeros = [nome.split("_")[1].split(".")[0] for nome, _ in entradas]
+    assert numeros == [str(n) for n in (30, 2, 17, 5) * 20]
+    assert chamadas[-1] == (80, 80)
+    assert [feitos for feitos, _ in chamadas] == sorted(feitos for feitos, _ in chamadas)
+
+def test_docx_entra_sem_nova_compressao():
+    destino = io.BytesIO()
+    exportacao.exportar_zip("fatura", [("FATURA_1.docx", fatura("1"))], destino)
+    with zipfile.ZipFile(destino) as arquivo:
+        assert arquivo.infolist()[0].compress_type == zipfile.ZIP_STORED
+
+@pytest.fixture
+def pools(monkeypatch):
+    criados = []
+    class Pool(exportacao.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            criados.append((kwargs.get("max_workers"), kwargs["mp_context"].get_start_method()))
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(exportacao, "ProcessPoolExecutor", Pool)
+    return criados
+
+def test_pool_de_processos_gera_o_mesmo_zip_que_o_processo_atual(pools):
+    itens = [(f"FATURA_{n % 150}.docx", fatura(str(n))) for n in range(exportacao.MINIMO_PARA_PROCESSOS + 40)]
+    quantidade_local, no_processo = exportar(itens, trabalhadores=1)
+    assert pools == []
+    quantidade_pool, no_pool = exportar(itens, trabalhadores=2)
+    assert pools == [(2, "spawn")]
+    assert quantidade_local == quantidade_pool == len(itens)
+    assert [nome for nome, _ in no_pool] == [nome for nome, _ in no_processo]
+    assert no_pool == no_processo
+
+def test_exportacao_pequena_e_a_do_pool_geram_os_mesmos_documentos(pools):
+    # Abaixo de MINIMO_PARA_PROCESSOS o pool não é usado mesmo com vários trabalhadores.
+    pequena = [(f"FATURA_{n}.docx", fatura(str(n))) for n in range(10)]
+    grande = pequena + [(f"FATURA_{n}.docx", fatura(str(n))) for n in range(10, exportacao.MINIMO_PARA_PROCESSOS)]
+    _, sem_pool = exportar(pequena, trabalhadores=4)
+    assert pools == []
+    _, com_pool = exportar(grande, trabalhadores=4)
+    assert pools == [(4, "spawn")]
+    assert com_pool[:len(sem_pool)] == sem_pool
@@ -0,0 +1,156 @@
+# tests/test_fila_escrita.py
+# FilaDeEscrita: pendências que sobrevivem a uma queda do processo no spool
+# local e são enviadas pela próxima execução, inclusive com o spool cortado no
+# meio de um acréscimo ou já aplicado no backend.
+import os
+import time
+
+import pytest
+
+from armazenamento import SUFIXO_SPOOL, ArmazenamentoLocal, FilaDeEscrita
+from armazenamento_drive import ArmazenamentoDrive
+from drive_simulado import DriveSimulado
+
+
+def cliente(id_cliente, nome):
+    return {"id": id_cliente, "nome_razao_social": nome, "cpf_cnpj": ""}
+
+def nomes(registros):
+    return [r["nome_razao_social"] for r in registros]
+
+@pytest.fixture
+def spool(tmp_path):
+    return str(tmp_path / "spool")
+
+@pytest.fixture
+def drive():
+    return DriveSimulado(dormir=False)
+
+@pytest.fixture
+def filas():
+    abertas = []
+    yield abertas
+    for fila in abertas:
+        parar(fila)
+
+def abrir_fila(filas, interno, spool, atraso=60):
+    fila = FilaDeEscrita(interno, spool, atraso=atraso)
+    filas.append(fila)
+    return fila
+
+def parar(fila):
+    # Queda do processo: a thread de fundo para sem enviar nada.
+    with fila._cond:
+        fila._encerrada = True
+        fila._cond.notify_all()
+    if fila._thread is not None:
+        fila._thread.join(timeout=5)
+
+def esperar(condicao, limite=5.0):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, "a fila não enviou as pendências"
+        time.sleep(0.01)
+
+def caminho_spool(spool, nome="clients.json"):
+    return os.path.join(spool, nome + SUFIXO_SPOOL)
+
+
+def test_pendencias_ficam_no_spool_ate_o_envio(filas, drive, spool):
+    fila = abrir_fila(filas, ArmazenamentoDrive(drive), spool)
+    colecao = fila.abrir("clients.json")
+    fila.inserir(colecao, cliente("1", "Ana"))
+    fila.atualizar(colecao, "1", {"nome_razao_social": "Ana Maria"})
+    # Quem lê pela fila já vê as alterações; o Drive ainda não.
+    assert nomes(fila.ler(colecao)) == ["Ana Maria"]
+    assert ArmazenamentoDrive(drive).ler(ArmazenamentoDrive(drive).abrir("clients.json")) == []
+    with open(caminho_spool(spool), 'rb') as f:
+        assert f.read().count(b'\n') == 2
+    fila.descarregar()
+    assert not os.path.exists(caminho_spool(spool))
+    outra = ArmazenamentoDrive(drive)
+    assert nomes(outra.ler(outra.abrir("clients.json"))) == ["Ana Maria"]
+
+def test_spool_enviado_depois_de_reiniciar(filas, drive, spool):
+    fila = abrir_fila(filas, ArmazenamentoDrive(drive), spool)
+    colecao = fila.abrir("clients.json")
+    fila.gravar(colecao, [cliente("1", "Ana"), cliente("2", "Bruno")])
+    fila.excluir(colecao, "2")
+    fila.inserir(colecao, cliente("3", "Carla"))
+    fila.gravar(fila.abrir("config.json"), {"ultimo_numero_contrato": 7})
+    parar(fila)
+
+    # Próxima execução: as pendências entram na fila já vencidas e são enviadas sozinhas.
+    interno = ArmazenamentoDrive(drive)
+    reiniciada = abrir_fila(filas, interno, spool)
+    assert nomes(reiniciada.ler(reiniciada.abrir("clients.json"))) == ["Ana", "Carla"]
+    esperar(lambda: not os.listdir(spool))
+    assert nomes(interno.ler(interno.abrir("clients.json"))) == ["Ana", "Carla"]
+    assert interno.ler(interno.abrir("config.json")) == {"ultimo_numero_contrato": 7}
+    assert reiniciada.estatisticas()["write_behind"]["operations_flushed"] == 4
+
+def test_spool_cortado_no_meio_de_um_acrescimo(filas, tmp_path, spool, monkeypatch):
+    interno = ArmazenamentoLocal(str(tmp_path / "banco"))
+    fila = abrir_fila(filas, interno, spool)
+    colecao = fila.abrir("clients.json")
+    fila.inserir(colecao, cliente("1", "Ana"))
+    fila.inserir(colecao, cliente("2", "Bruno"))
+    parar(fila)
+    with open(caminho_spool(spool), 'ab') as f:
+        f.write(b'{"op":"insert","id":"3","registro":{"id":"3","nome_razao_so')
+
+    # A linha cortada é descartada, e o que a próxima execução enfileirar
+    # antes do envio (que cai de novo sem enviar) não se mistura com ela.
+    monkeypatch.setattr(FilaDeEscrita, "_iniciar_thread", lambda self: None)
+    reiniciada = abrir_fila(filas, interno, spool)
+    reiniciada.atualizar(reiniciada.abrir("clients.json"), "1", {"nome_razao_social": "Ana Maria"})
+    terceira = abrir_fila(filas, interno, spool)
+    terceira.descarregar()
+    assert nomes(interno.ler(interno.abrir("clients.json"))) == ["Ana Maria", "Bruno"]
+
+def test_spool_so_com_linha_cortada(filas, tmp_path, spool, monkeypatch):
+    interno = ArmazenamentoLocal(str(tmp_path / "banco"))
+    os.makedirs(spool)
+    with open(caminho_spool(spool), 'wb') as f:
+        f.write(b'{"op":"insert","id":"1","regi')
+    monkeypatch.setattr(FilaDeEscrita, "_iniciar_thread", lambda self: None)
+    fila = abrir_fila(filas, interno, spool)
+    fila.inserir(fila.abrir("clients.json"), cliente("2", "Bruno"))
+    abrir_fila(filas, interno, spool).descarregar()
+    assert nomes(interno.ler(interno.abrir("clients.json"))) == ["Bruno"]
+
+def test_queda_depois_do_envio_e_antes_de_limpar_o_spool(filas, tmp_path, spool):
+    interno = ArmazenamentoLocal(str(tmp_path / "banco"), journal=True)
+    fila = abrir_fila(filas, interno, spool)
+    colecao = fila.abrir("clients.json")
+    fila.inserir(colecao, cliente("1", "Ana"))
+    fila.inserir(colecao, cliente("2", "Bruno"))
+    fila.atualizar(colecao, "1", {"nome_razao_social": "Ana Maria"})
+    fila.excluir(colecao, "2")
+    with open(caminho_spool(spool), 'rb') as f:
+        pendente = f.read()
+    fila.descarregar()
+    parar(fila)
+    # O backend recebeu as operações, mas o spool ficou como estava.
+    with open(caminho_spool(spool), 'wb') as f:
+        f.write(pendente)
+
+    abrir_fila(filas, interno, spool).descarregar()
+    assert interno.ler(interno.abrir("clients.json")) == [cliente("1", "Ana Maria")]
+
+def test_falha_no_envio_mantem_as_pendencias(filas, drive, spool, monkeypatch):
+    interno = ArmazenamentoDrive(drive)
+    fila = abrir_fila(filas, interno, spool)
+    colecao = fila.abrir("clients.json")
+    fila.inserir(colecao, cliente("1", "Ana"))
+    def fora_do_ar(colecao, operacoes):
+        raise ConnectionError("sem rede")
+    monkeypatch.setattr(interno, "aplicar_operacoes", fora_do_ar)
+    with pytest.raises(ConnectionError):
+        fila.descarregar()
+    fila.inserir(colecao, cliente("2", "Bruno"))
+    assert nomes(fila.ler(colecao)) == ["Ana", "Bruno"]
+    monkeypatch.undo()
+    fila.descarregar()
+    assert nomes(interno.ler(interno.abrir("clients.json"))) == ["Ana", "Bruno"]
+    assert not os.path.exists(caminho_spool(spool))
@@ -0,0 +1,138 @@
+# tests/test_journal.py
+# Modo journal (storage_mode = "journal") na pasta local: replay sobre o
+# snapshot, journal cortado por uma queda no meio do acréscimo e compactação
+# interrompida. No Drive simulado: acréscimos e compactação de duas instâncias
+# ao mesmo tempo (upload com If-Match).
+import json
+import os
+
+import pytest
+
+import armazenamento
+from armazenamento import ArmazenamentoLocal
+from armazenamento_drive import ArmazenamentoDrive
+from drive_simulado import DriveSimulado
+
+
+def cliente(id_cliente, nome):
+    return {"id": id_cliente, "nome_razao_social": nome, "cpf_cnpj": ""}
+
+@pytest.fixture
+def banco(tmp_path):
+    return ArmazenamentoLocal(str(tmp_path), journal=True, journal_max_entradas=1000)
+
+def caminho_journal(banco):
+    return os.path.join(banco.pasta, "clients.journal.jsonl")
+
+def nomes(banco):
+    # Uma instância nova, como depois de reiniciar o processo.
+    reaberto = ArmazenamentoLocal(banco.pasta, journal=True, journal_max_entradas=1000)
+    return [r["nome_razao_social"] for r in reaberto.ler(reaberto.abrir("clients.json"))]
+
+
+def test_replay_aplica_o_journal_sobre_o_snapshot(banco):
+    colecao = banco.abrir("clients.json")
+    banco.gravar(colecao, [cliente("1", "Ana"), cliente("2", "Bruno")])
+    banco.inserir(colecao, cliente("3", "Carla"))
+    banco.atualizar(colecao, "1", {"nome_razao_social": "Ana Maria"})
+    banco.excluir(colecao, "2")
+    assert nomes(banco) == ["Ana Maria", "Carla"]
+    # O snapshot continua o de antes: as alterações estão só no journal.
+    with open(caminho_journal(banco), "rb") as f:
+        assert f.read().count(b"\n") == 3
+
+def test_ultima_linha_cortada_e_ignorada(banco):
+    colecao = banco.abrir("clients.json")
+    banco.inserir(colecao, cliente("1", "Ana"))
+    banco.inserir(colecao, cliente("2", "Bruno"))
+    # Queda no meio do acréscimo: só o começo da linha chegou ao disco.
+    with open(caminho_journal(banco), "ab") as f:
+        f.write(b'{"op":"insert","id":"3","registro":{"id":"3","nome_ra')
+    assert nomes(banco) == ["Ana", "Bruno"]
+
+def test_acrescimo_depois_de_linha_cortada_nao_se_perde(banco):
+    colecao = banco.abrir("clients.json")
+    banco.inserir(colecao, cliente("1", "Ana"))
+    with open(caminho_journal(banco), "ab") as f:
+        f.write(b'{"op":"update","id":"1","alteracoes":{"nome_')
+    reaberto = ArmazenamentoLocal(banco.pasta, journal=True, journal_max_entradas=1000)
+    colecao = reaberto.abrir("clients.json")
+    reaberto.inserir(colecao, cliente("2", "Bruno"))
+    reaberto.atualizar(colecao, "1", {"nome_razao_social": "Ana Maria"})
+    assert nomes(banco) == ["Ana Maria", "Bruno"]
+
+def test_linha_completa_sem_quebra_final_vale(banco):
+    colecao = banco.abrir("clients.json")
+    banco.inserir(colecao, cliente("1", "Ana"))
+    # O registro inteiro foi escrito; só o '\n' não chegou.
+    with open(caminho_journal(banco), "ab") as f:
+        f.write(b'{"op":"insert","id":"2","registro":{"id":"2","nome_razao_social":"Bruno","cpf_cnpj":""}}')
+    assert nomes(banco) == ["Ana", "Bruno"]
+    banco.inserir(colecao, cliente("3", "Carla"))
+    assert nomes(banco) == ["Ana", "Bruno", "Carla"]
+
+def test_compactacao_interrompida_nao_duplica(banco):
+    colecao = banco.abrir("clients.json")
+    banco.gravar(colecao, [cliente("1", "Ana")])
+    banco.inserir(colecao, cliente("2", "Bruno"))
+    banco.atualizar(colecao, "1", {"nome_razao_social": "Ana Maria"})
+    with open(caminho_journal(banco), "rb") as f:
+        journal = f.read()
+    # Queda depois de gravar o snapshot compactado e antes de esvaziar o journal.
+    banco.compactar_journal(colecao)
+    with open(caminho_journal(banco), "wb") as f:
+        f.write(journal)
+    assert nomes(banco) == ["Ana Maria", "Bruno"]
+
+def test_compactacao_automatica_ao_passar_do_limite(tmp_path):
+    banco = ArmazenamentoLocal(str(tmp_path), journal=True, journal_max_entradas=3)
+    colecao = banco.abrir("clients.json")
+    for i in range(4):
+        banco.inserir(colecao, cliente(str(i), f"Cliente {i}"))
+    assert os.path.getsize(caminho_journal(banco)) < 200
+    assert nomes(banco) == [f"Cliente {i}" for i in range(4)]
+
+
+@pytest.fixture
+def instancias_drive(monkeypatch):
+    """Duas instâncias do app sobre o mesmo Drive, em modo journal."""
+    monkeypatch.setattr(armazenamento.random, "uniform", lambda a, b: 0)
+    drive = DriveSimulado(dormir=False)
+    esta, outra = (ArmazenamentoDrive(drive, journal=True, journal_max_entradas=1000) for _ in range(2))
+    esta.gravar(esta.abrir("clients.json"), [cliente("1", "Ana")])
+    return esta, outra
+
+def antes_da_gravacao(monkeypatch, banco, numero, acao):
+    # A outra instância grava ('acao') logo antes da gravação condicional nº 'numero' desta.
+    gravacoes = []
+    original = banco._gravar_se_versao
+    def gravar_se_versao(colecao, conteudo, versao):
+        gravacoes.append(colecao.nome)
+        if len(gravacoes) == numero:
+            acao()
+        return original(colecao, conteudo, versao)
+    monkeypatch.setattr(banco, "_gravar_se_versao", gravar_se_versao)
+    return gravacoes
+
+def nomes_no_drive(banco):
+    return [r["nome_razao_social"] for r in banco.ler(banco.abrir("clients.json"))]
+
+def test_acrescimos_simultaneos_no_drive_nao_se_perdem(instancias_drive, monkeypatch):
+    esta, outra = instancias_drive
+    gravacoes = antes_da_gravacao(monkeypatch, esta, 1, lambda: outra.inserir(outra.abrir("clients.json"), cliente("2", "Bruno")))
+    esta.inserir(esta.abrir("clients.json"), cliente("3", "Carla"))
+    # A primeira tentativa recebe 412 e a segunda acrescenta depois da linha da outra instância.
+    assert gravacoes == ["clients.journal.jsonl"] * 2
+    assert nomes_no_drive(esta) == nomes_no_drive(outra) == ["Ana", "Bruno", "Carla"]
+
+@pytest.mark.parametrize("numero", [1, 2], ids=["antes_do_snapshot", "antes_de_esvaziar_o_journal"])
+def test_acrescimo_durante_a_compactacao_no_drive_fica_no_journal(instancias_drive, monkeypatch, numero):
+    esta, outra = instancias_drive
+    esta.inserir(esta.abrir("clients.json"), cliente("2", "Bruno"))
+    antes_da_gravacao(monkeypatch, esta, numero,
+                      lambda: outra.atualizar(outra.abrir("clients.json"), "1", {"nome_razao_social": "Ana Maria"}))
+    esta.compactar_journal(esta.abrir("clients.json"))
+    assert nomes_no_drive(esta) == nomes_no_drive(outra) == ["Ana Maria", "Bruno"]
+    # A compactação tirou do journal só o que incorporou ao snapshot.
+    conteudo = esta._ler_com_versao(esta.abrir("clients.journal.jsonl"))[0]
+    assert [json.loads(linha)["op"] for linha in conteudo.splitlines()] == ["update"]
@@ -0,0 +1,114 @@
+# tests/test_numeros.py
+# reservar_numeros (compare-and-swap no config.json): conflito com outra
+# instância entre a leitura e a gravação, na pasta local e no Drive simulado
+# (upload com If-Match), e a alocação em blocos de utils.
+import threading
+
+import pytest
+
+import armazenamento
+import utils
+from armazenamento import ArmazenamentoLocal, ConflitoDeVersao
+from armazenamento_drive import ArmazenamentoDrive
+from drive_simulado import DriveSimulado
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    # As novas tentativas esperam um intervalo aleatório; aqui não precisa.
+    monkeypatch.setattr(armazenamento.random, "uniform", lambda a, b: 0)
+
+@pytest.fixture(params=["local", "drive"])
+def instancias(request, tmp_path):
+    """Duas instâncias do backend sobre os mesmos arquivos (dois processos do app)."""
+    if request.param == "local":
+        esta, outra = ArmazenamentoLocal(str(tmp_path)), ArmazenamentoLocal(str(tmp_path))
+    else:
+        drive = DriveSimulado(dormir=False)
+        esta, outra = ArmazenamentoDrive(drive), ArmazenamentoDrive(drive)
+    esta.gravar(esta.abrir("config.json"), {"ultimo_numero_contrato": 10, "empresa": "Rocker"})
+    return esta, outra
+
+def contar_chamadas(monkeypatch, banco, metodo, antes=None):
+    chamadas = []
+    original = getattr(banco, metodo)
+    def espiao(*args):
+        chamadas.append(args)
+        resultado = original(*args)
+        if antes and len(chamadas) == 1:
+            antes()
+        return resultado
+    monkeypatch.setattr(banco, metodo, espiao)
+    return chamadas
+
+def config(banco):
+    return banco.ler(banco.abrir("config.json"))
+
+
+def test_sem_conflito_grava_na_primeira_tentativa(instancias, monkeypatch):
+    esta, _ = instancias
+    gravacoes = contar_chamadas(monkeypatch, esta, "_gravar_se_versao")
+    assert esta.reservar_numeros("config.json", "ultimo_numero_contrato", 5) == 11
+    assert len(gravacoes) == 1
+    assert config(esta) == {"ultimo_numero_contrato": 15, "empresa": "Rocker"}
+
+def test_conflito_rele_e_reaplica(instancias, monkeypatch):
+    esta, outra = instancias
+    # Entre a leitura e a gravação condicional desta instância, a outra
+    # reserva um bloco e altera outro campo do config.json.
+    def outra_grava():
+        assert outra.reservar_numeros("config.json", "ultimo_numero_contrato", 3) == 11
+        outra.reservar_numeros("config.json", "ultimo_numero_fatura", 1)
+    leituras = contar_chamadas(monkeypatch, esta, "_ler_com_versao", antes=outra_grava)
+    gravacoes = contar_chamadas(monkeypatch, esta, "_gravar_se_versao")
+
+    assert esta.reservar_numeros("config.json", "ultimo_numero_contrato", 5) == 14
+    assert len(leituras) == 2 and len(gravacoes) == 2
+    # A alteração foi reaplicada sobre o que a outra instância gravou, sem perdê-lo.
+    esperado = {"ultimo_numero_contrato": 18, "empresa": "Rocker", "ultimo_numero_fatura": 1}
+    assert config(esta) == esperado
+    assert config(outra) == esperado
+
+def test_conflito_em_todas_as_tentativas(instancias, monkeypatch):
+    esta, _ = instancias
+    monkeypatch.setattr(esta, "_gravar_se_versao", lambda colecao, conteudo, versao: False)
+    with pytest.raises(ConflitoDeVersao):
+        esta.reservar_numeros("config.json", "ultimo_numero_contrato")
+    assert config(esta)["ultimo_numero_contrato"] == 10
+
+def test_config_vazio_comeca_do_um(tmp_path):
+    banco = ArmazenamentoLocal(str(tmp_path))
+    assert banco.reservar_numeros("config.json", "ultimo_numero_fatura", 2) == 1
+    assert banco.reservar_numeros("config.json", "ultimo_numero_fatura") == 3
+
+def test_instancias_concorrentes_nao_repetem_numeros(tmp_path):
+    reservados = []
+    def processo():
+        banco = ArmazenamentoLocal(str(tmp_path))
+        for _ in range(25):
+            reservados.append(banco.reservar_numeros("config.json", "ultimo_numero_contrato"))
+    threads = [threading.Thread(target=processo) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(reservados) == list(range(1, 101))
+
+
+def test_blocos_de_utils_vem_de_reservas_sem_sobreposicao(instancias, monkeypatch):
+    esta, outra = instancias
+    monkeypatch.setattr(utils, "get_config", lambda chave, padrao=None: 4)
+    monkeypatch.setattr(utils, "_blocos_numeros", {})
+    numeros = [utils._alocar_numero(esta, "ultimo_numero_contrato") for _ in range(3)]
+    # Outro processo reserva o bloco seguinte; esta instância ainda usa o seu.
+    assert outra.reservar_numeros("config.json", "ultimo_numero_contrato", 4) == 15
+    numeros += [utils._alocar_numero(esta, "ultimo_numero_contrato") for _ in range(3)]
+    assert numeros == [11, 12, 13, 14, 19, 20]
+
+def test_abrir_nao_troca_arquivo_criado_por_outro_processo(tmp_path, monkeypatch):
+    banco = ArmazenamentoLocal(str(tmp_path))
+    banco.reservar_numeros("config.json", "ultimo_numero_contrato", 5)
+    # Outro processo viu o arquivo como inexistente um instante antes de ele ser criado.
+    monkeypatch.setattr(armazenamento.os.path, "exists", lambda caminho: False)
+    outro = ArmazenamentoLocal(str(tmp_path))
+    assert outro.reservar_numeros("config.json", "ultimo_numero_contrato") == 6
@@ -0,0 +1,233 @@
+# tests/test_particoes.py
+# ArmazenamentoParticionado: registros que mudam de mês (de partição), o
+# manifesto 'particoes.json', quedas no meio de uma mudança e um manifesto
+# desatualizado (sobrescrito por outra instância: o último a gravar vale).
+import pytest
+
+from armazenamento import NOME_MANIFESTO, ArmazenamentoLocal, ArmazenamentoParticionado, nome_particao
+from armazenamento_drive import ArmazenamentoDrive
+from drive_simulado import DriveSimulado
+
+
+def contrato(id_contrato, status, data):
+    return {"id_contrato": id_contrato, "numero_contrato": f"2025-{id_contrato}", "status": status, "data_geracao": data}
+
+CONTRATOS = [
+    contrato("1", "Ativo", "2025-01-10"),
+    contrato("2", "Encerrado", "2025-01-20"),
+    contrato("3", "Ativo", "2025-02-05"),
+]
+
+class Queda(Exception):
+    pass
+
+@pytest.fixture(params=["local", "drive"])
+def interno(request, tmp_path):
+    if request.param == "local":
+        return ArmazenamentoLocal(str(tmp_path))
+    return ArmazenamentoDrive(DriveSimulado(dormir=False))
+
+@pytest.fixture
+def banco(interno):
+    banco = ArmazenamentoParticionado(interno)
+    banco.gravar(banco.abrir("contracts.json"), [dict(c) for c in CONTRATOS])
+    return banco
+
+def reaberto(banco):
+    # Outra instância (ou o processo reiniciado) sobre os mesmos arquivos.
+    return ArmazenamentoParticionado(banco.interno)
+
+def ids(banco, **filtros):
+    colecao = banco.abrir("contracts.json")
+    return sorted(r["id_contrato"] for r in banco.consultar(colecao, filtros or None))
+
+def particao(banco, periodo):
+    interno = banco.interno
+    return sorted(r["id_contrato"] for r in interno.ler(interno.abrir(nome_particao("contracts.json", periodo))))
+
+def manifesto(banco):
+    return banco.interno.ler(banco.interno.abrir(NOME_MANIFESTO))["contracts.json"]
+
+def resumo(entrada, periodo):
+    return {campo: valor for campo, valor in entrada["particoes"][periodo].items() if campo != "versao"}
+
+def cair_na_gravacao(monkeypatch, banco, n):
+    """O processo cai na n-ésima gravação feita pelo backend (1 = a primeira)."""
+    original = banco.interno.gravar
+    gravacoes = []
+    def gravar(colecao, dados):
+        gravacoes.append(colecao.nome)
+        if len(gravacoes) == n:
+            raise Queda(colecao.nome)
+        return original(colecao, dados)
+    monkeypatch.setattr(banco.interno, "gravar", gravar)
+    return gravacoes
+
+
+def test_particoes_e_manifesto(banco):
+    assert particao(banco, "2025-01") == ["1", "2"]
+    assert particao(banco, "2025-02") == ["3"]
+    entrada = manifesto(banco)
+    assert entrada["ids"] == {"1": "2025-01", "2": "2025-01", "3": "2025-02"}
+    assert resumo(entrada, "2025-01") == {"total": 2, "status": {"Ativo": 1, "Encerrado": 1}}
+    assert banco.contar(banco.abrir("contracts.json"), {"status": "Ativo"}) == 2
+
+def test_atualizacao_da_data_muda_o_registro_de_particao(banco):
+    banco.atualizar(banco.abrir("contracts.json"), "1", {"data_geracao": "2025-03-01", "status": "Encerrado"})
+    assert particao(banco, "2025-01") == ["2"]
+    assert particao(banco, "2025-03") == ["1"]
+    entrada = manifesto(banco)
+    assert entrada["ids"]["1"] == "2025-03"
+    assert resumo(entrada, "2025-01") == {"total": 1, "status": {"Encerrado": 1}}
+    assert resumo(entrada, "2025-03") == {"total": 1, "status": {"Encerrado": 1}}
+    assert "limpar" not in entrada
+    outra = reaberto(banco)
+    assert ids(outra, status="Encerrado") == ["1", "2"]
+    assert ids(outra, data_geracao="2025-03-01") == ["1"]
+
+def test_insercao_com_outro_mes_sai_da_particao_antiga(banco):
+    banco.inserir(banco.abrir("contracts.json"), contrato("3", "Ativo", "2025-01-15"))
+    assert particao(banco, "2025-01") == ["1", "2", "3"]
+    assert particao(banco, "2025-02") == []
+    assert manifesto(banco)["particoes"]["2025-02"]["total"] == 0
+    assert ids(reaberto(banco)) == ["1", "2", "3"]
+
+def test_troca_de_meses_no_mesmo_lote(banco):
+    banco.aplicar_operacoes(banco.abrir("contracts.json"), [
+        {'op': 'update', 'id': "1", 'alteracoes': {"data_geracao": "2025-02-01"}},
+        {'op': 'update', 'id': "3", 'alteracoes': {"data_geracao": "2025-01-01"}},
+    ])
+    assert particao(banco, "2025-01") == ["2", "3"]
+    assert particao(banco, "2025-02") == ["1"]
+    assert ids(reaberto(banco)) == ["1", "2", "3"]
+
+@pytest.mark.parametrize("queda", [1, 2, 3, 4])
+def test_queda_no_meio_de_uma_mudanca_nao_perde_o_registro(banco, monkeypatch, queda):
+    colecao = banco.abrir("contracts.json")
+    cair_na_gravacao(monkeypatch, banco, queda)
+    try:
+        banco.atualizar(colecao, "1", {"data_geracao": "2025-03-01"})
+    except Queda:
+        pass
+    monkeypatch.undo()
+
+    outra = reaberto(banco)
+    registros = outra.ler(outra.abrir("contracts.json"))
+    # Nem perdido nem duplicado: fica no mês antigo ou no novo.
+    assert sorted(r["id_contrato"] for r in registros) == ["1", "2", "3"]
+    assert [r["data_geracao"] for r in registros if r["id_contrato"] == "1"] in (["2025-01-10"], ["2025-03-01"])
+    # E continua alterável: a próxima gravação deixa tudo consistente.
+    outra.atualizar(outra.abrir("contracts.json"), "1", {"status": "Encerrado"})
+    assert ids(reaberto(banco), status="Encerrado") == ["1", "2"]
+    assert ids(reaberto(banco)) == ["1", "2", "3"]
+    assert banco.contar(banco.abrir("contracts.json")) == 3
+
+def test_troca_de_meses_interrompida_nao_perde_nenhum(banco, monkeypatch):
+    colecao = banco.abrir("contracts.json")
+    for queda in range(1, 6):
+        cair_na_gravacao(monkeypatch, banco, queda)
+        try:
+            banco.aplicar_operacoes(colecao, [
+                {'op': 'update', 'id': "1", 'alteracoes': {"data_geracao": "2025-02-01"}},
+                {'op': 'update', 'id': "3", 'alteracoes': {"data_geracao": "2025-01-01"}},
+            ])
+        except Queda:
+            pass
+        monkeypatch.undo()
+        assert ids(reaberto(banco)) == ["1", "2", "3"], f"queda na gravação {queda}"
+        banco.gravar(colecao, [dict(c) for c in CONTRATOS])
+
+def test_manifesto_desatualizado_por_outra_instancia(banco):
+    interno = banco.interno
+    antigo = interno.ler(interno.abrir(NOME_MANIFESTO))
+    banco.atualizar(banco.abrir("contracts.json"), "3", {"data_geracao": "2025-01-25"})
+    # Outra instância, que leu o manifesto antes, grava o dela por último.
+    interno.gravar(interno.abrir(NOME_MANIFESTO), antigo)
+    assert manifesto(banco)["ids"]["3"] == "2025-02"
+
+    outra = reaberto(banco)
+    colecao = outra.abrir("contracts.json")
+    assert ids(outra) == ["1", "2", "3"]
+    # O manifesto aponta para a partição errada: a alteração não pode se perder.
+    outra.atualizar(colecao, "3", {"status": "Encerrado"})
+    assert ids(outra, status="Encerrado") == ["2", "3"]
+    assert manifesto(banco)["ids"]["3"] == "2025-01"
+    outra.excluir(colecao, "3")
+    assert ids(outra) == ["1", "2"]
+
+def test_id_que_falta_no_manifesto(banco):
+    interno = banco.interno
+    completo = interno.ler(interno.abrir(NOME_MANIFESTO))
+    del completo["contracts.json"]["ids"]["2"]
+    interno.gravar(interno.abrir(NOME_MANIFESTO), completo)
+
+    outra = reaberto(banco)
+    outra.atualizar(outra.abrir("contracts.json"), "2", {"status": "Ativo"})
+    assert ids(outra, status="Ativo") == ["1", "2", "3"]
+    assert manifesto(banco)["ids"]["2"] == "2025-01"
+
+
+@pytest.fixture
+def drive():
+    return DriveSimulado(dormir=False)
+
+def com_faturas_de_12_meses(drive):
+    banco = ArmazenamentoParticionado(ArmazenamentoDrive(drive))
+    banco.gravar(banco.abrir("invoices.json"), [
+        {"id_fatura": str(m), "status": "Pendente", "data_emissao": f"2025-{m:02d}-10"} for m in range(1, 13)])
+    return banco
+
+def test_leitura_sem_alteracoes_so_confere_o_manifesto(drive):
+    com_faturas_de_12_meses(drive)
+    banco = ArmazenamentoParticionado(ArmazenamentoDrive(drive))
+    assert len(banco.ler(banco.abrir("invoices.json"))) == 12
+
+    drive.zerar_estatisticas()
+    faturas = banco.ler(banco.abrir("invoices.json"))
+    assert len(faturas) == 12
+    assert drive.estatisticas()["requests"] == 1  # a revalidação do particoes.json
+    # Cada leitura devolve listas novas.
+    faturas[0]["status"] = "Cancelada"
+    assert banco.consultar(banco.abrir("invoices.json"), {"status": "Cancelada"}) == []
+
+def test_so_a_particao_alterada_e_lida_de_novo(drive):
+    outra = com_faturas_de_12_meses(drive)
+    banco = ArmazenamentoParticionado(ArmazenamentoDrive(drive))
+    banco.ler(banco.abrir("invoices.json"))
+
+    outra.atualizar(outra.abrir("invoices.json"), "3", {"status": "Liquidada"})
+    drive.zerar_estatisticas()
+    faturas = banco.consultar(banco.abrir("invoices.json"), {"status": "Liquidada"})
+    assert [f["id_fatura"] for f in faturas] == ["3"]
+    # Manifesto (revalidação + download) e a partição de março.
+    assert drive.estatisticas()["requests"] == 4
+    assert banco.estatisticas()["partitions"]["misses"] == 13
+
+def test_gravacao_propria_nao_le_a_particao_de_novo(drive):
+    banco = com_faturas_de_12_meses(drive)
+    banco.atualizar(banco.abrir("invoices.json"), "3", {"status": "Liquidada"})
+    drive.zerar_estatisticas()
+    assert len(banco.ler(banco.abrir("invoices.json"))) == 12
+    assert drive.estatisticas()["requests"] == 1
+
+def test_manifesto_antigo_sem_versoes(drive):
+    banco = com_faturas_de_12_meses(drive)
+    interno = banco.interno
+    manifesto_antigo = interno.ler(interno.abrir(NOME_MANIFESTO))
+    for resumo_particao in manifesto_antigo["invoices.json"]["particoes"].values():
+        del resumo_particao["versao"]
+    interno.gravar(interno.abrir(NOME_MANIFESTO), manifesto_antigo)
+
+    # Sem versão, a partição é lida do backend a cada vez...
+    leitor = ArmazenamentoParticionado(ArmazenamentoDrive(drive))
+    assert len(leitor.ler(leitor.abrir("invoices.json"))) == 12
+    drive.zerar_estatisticas()
+    leitor.ler(leitor.abrir("invoices.json"))
+    assert drive.estatisticas()["requests"] == 13
+    # ...até a próxima gravação, que dá versão a todas.
+    banco.atualizar(banco.abrir("invoices.json"), "3", {"status": "Liquidada"})
+    assert all("versao" in r for r in interno.ler(interno.abrir(NOME_MANIFESTO))["invoices.json"]["particoes"].values())
+    leitor.ler(leitor.abrir("invoices.json"))
+    drive.zerar_estatisticas()
+    assert len(leitor.ler(leitor.abrir("invoices.json"))) == 12
+    assert drive.estatisticas()["requests"] == 1
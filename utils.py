@@ -1,24 +1,41 @@
 # utils.py
+# Só o que toda página usa é importado aqui. Drive (PyDrive2/oauth2client),
+# geração de documentos (python-docx), validação de CPF/CNPJ e consulta de CEP
+# são importados no primeiro uso; veja scripts/tempo_importacao.py.
 import streamlit as st
-from pydrive2.auth import GoogleAuth
-from pydrive2.drive import GoogleDrive
-from oauth2client.service_account import ServiceAccountCredentials
-from validate_docbr import CPF, CNPJ
+import hashlib
 import json
-import requests
-from datetime import date, datetime
-from docx import Document
-from docx.shared import Pt, Inches, Cm, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.table import WD_ALIGN_VERTICAL
-import io
-import uuid
+import os
+import threading
+import atexit
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from armazenamento import (ArmazenamentoEmArquivos, ArmazenamentoLocal, ArmazenamentoParticionado,
+                           ArmazenamentoSQLite, CAMPOS_PERIODO, FilaDeEscrita, carregar_colecoes as _carregar_colecoes)
+
+# --- CONFIGURAÇÃO ---
+def get_config(chave, padrao=None):
+    """Lê uma opção de st.secrets e, na falta dela, da variável de ambiente de mesmo nome em maiúsculas."""
+    try:
+        if chave in st.secrets:
+            return st.secrets[chave]
+    except Exception:
+        pass  # Sem secrets.toml (desenvolvimento local)
+    return os.environ.get(chave.upper(), padrao)
 
 # --- FUNÇÃO DE LOGIN COM CONTA DE SERVIÇO ---
-def login_gdrive():
-    gauth = GoogleAuth()
-    scope = ["https://www.googleapis.com/auth/drive"]
-    
+# O cliente do Drive é montado uma única vez por processo e compartilhado por
+# todas as sessões. O PyDrive2 já guarda um objeto http por thread, então o
+# mesmo GoogleDrive pode ser usado pelas threads de script do Streamlit.
+DRIVE_SCOPE = ["https://www.googleapis.com/auth/drive"]
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)  # renova o token antes de expirar
+
+_drive_lock = threading.Lock()
+_drive_client = None
+_drive_stats = {"builds": 0, "cache_hits": 0, "token_refreshes": 0}
+
+def _carregar_credenciais():
+    from oauth2client.service_account import ServiceAccountCredentials
     # --- CORREÇÃO AQUI: Ler cada componente do secret individualmente ---
     if hasattr(st, 'secrets') and 'gdrive_service_account_type' in st.secrets:
         # Se os secrets individuais estiverem configurados no Streamlit Cloud
@@ -35,452 +52,593 @@ def login_gdrive():
             "client_x509_cert_url": st.secrets["gdrive_service_account_client_x509_cert_url"],
             "universe_domain": st.secrets["gdrive_service_account_universe_domain"]
         }
-        gauth.credentials = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    else:
-        # Fallback para arquivo local 'service_account.json' para desenvolvimento local
-        try:
-            with open('service_account.json', 'r') as f:
-                creds_dict = json.load(f)
-            gauth.credentials = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        except FileNotFoundError:
-            st.error("Arquivo de autenticação local 'service_account.json' não encontrado. Para deploy, configure st.secrets com chaves individuais.")
-            st.stop()
-        except Exception as e:
-            st.error(f"Erro ao carregar credenciais locais: {e}. Para deploy, configure st.secrets com chaves individuais.")
-            st.stop()
-
-    return GoogleDrive(gauth)
-
-# --- O restante do seu utils.py permanece IGUAL ---
-# ...
-# ...
-# --- FUNÇÃO PARA GERAR O CONTRATO EM WORD (COM ALTERAÇÕES DE FORMATAÇÃO) ---
-def gerar_contrato_docx(dados):
-    doc = Document()
-    style = doc.styles['Normal']
-    style.font.name = 'Times New Roman'
-    style.font.size = Pt(12)
-    p_format = style.paragraph_format
-    p_format.line_spacing = 1.5
-    p_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    
-    section = doc.sections[0]
-    header = section.header
-    p_header = header.paragraphs[0]
-    run_header = p_header.add_run()
+        return ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, DRIVE_SCOPE)
+    # Fallback para arquivo local 'service_account.json' para desenvolvimento local
     try:
-        run_header.add_picture('assets/logo.png', width=Inches(2.0))
+        with open('service_account.json', 'r') as f:
+            creds_dict = json.load(f)
+        return ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, DRIVE_SCOPE)
     except FileNotFoundError:
-        p_header.text = "Rocker Equipamentos"
-    p_header.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    titulo = doc.add_paragraph()
-    titulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run_titulo = titulo.add_run(f"CONTRATO DE {dados['tipo_contrato'].upper()} Nº {dados['numero_contrato']}\n")
-    run_titulo.bold = True
-    run_titulo.font.size = Pt(14)
-
-    def add_justified_paragraph(text=''):
-        p = doc.add_paragraph(text)
-        p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        return p
-
-    def add_clausula_heading(text):
-        p = doc.add_paragraph()
-        run = p.add_run(text)
-        run.bold = True
-        return p
-    
-    add_clausula_heading("DAS PARTES")
-    doc.add_paragraph("")
-    
-    p_locadora = add_justified_paragraph()
-    p_locadora.add_run("LOCADORA: ").bold = True
-    p_locadora.add_run("ROCKER LOCAÇÃO DE EQUIPAMENTOS PARA CONSTRUÇÃO LTDA, pessoa jurídica de direito privado, inscrita no CNPJ sob o nº 15.413.157/0001-16, com sede na Rua Carlos Adriano Rodrigues da Silva, Q40 L01, Bairro Potecas, São José/SC, CEP 88.107-493, neste ato representada na forma de seu contrato social.")
-    
-    p_locataria = add_justified_paragraph()
-    p_locataria.add_run("LOCATÁRIA: ").bold = True
-    if dados['cliente']['tipo_pessoa'] == "Pessoa Jurídica":
-        p_locataria.add_run(f"{dados['cliente']['nome_razao_social']}, pessoa jurídica de direito privado, inscrita no CNPJ sob o nº {dados['cliente']['cpf_cnpj']}, com sede na {dados['cliente']['endereco']}, {dados['cliente']['cidade']} - {dados['cliente']['estado']}, CEP: {dados['cliente']['cep']}, neste ato representada por seu representante legal, {dados['cliente']['representante_legal']['nome']}, portador(a) do CPF sob o nº {dados['cliente']['representante_legal']['cpf']}.")
-    else:
-        p_locataria.add_run(f"{dados['cliente']['nome_razao_social']}, inscrito(a) no CPF sob o nº {dados['cliente']['cpf_cnpj']}, residente e domiciliado(a) na {dados['cliente']['endereco']}, {dados['cliente']['cidade']} - {dados['cliente']['estado']}, CEP: {dados['cliente']['cep']}.")
-    
-    add_justified_paragraph("\nAs partes acima qualificadas celebram o presente contrato, que se regerá pelas cláusulas e condições a seguir.")
-    
-    add_clausula_heading("\nCLÁUSULA PRIMEIRA – DO OBJETO")
-    add_justified_paragraph("1.1. O objeto deste contrato é a locação do(s) equipamento(s) descrito(s) na Cláusula Segunda, para ser(em) utilizado(s) exclusivamente no endereço da obra informado abaixo.")
-
-    add_clausula_heading("\nCLÁUSULA SEGUNDA – DOS EQUIPAMENTOS, VALORES E CONDIÇÕES")
-    add_justified_paragraph("2.1. Equipamentos e Valores da Locação:")
-
-    tabela = doc.add_table(rows=1, cols=5)
-    tabela.style = 'Table Grid'
-    tabela.autofit = False
-    tabela.allow_autofit = False
-    
-    tabela.columns[0].width = Cm(1.3)
-    tabela.columns[1].width = Cm(1.3)
-    tabela.columns[2].width = Cm(7.0)
-    tabela.columns[3].width = Cm(3.0)
-    tabela.columns[4].width = Cm(3.0)
-
-    hdr_cells = tabela.rows[0].cells
-    hdr_cells[0].text = 'Item'
-    hdr_cells[1].text = 'Qtde'
-    hdr_cells[2].text = 'Equipamento'
-    hdr_cells[3].text = 'Vlr. Unit. Mensal (R$)'
-    hdr_cells[4].text = 'Vlr. Total Mensal (R$)'
-
-    for cell in hdr_cells:
-        for paragraph in cell.paragraphs:
-            for run in paragraph.runs:
-                run.bold = True
-            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-        
-    total_locacao_mensal = 0
-    for i, item in enumerate(dados['itens_contrato']):
-        row_cells = tabela.add_row().cells
-        row_cells[0].text = f"2.1.{i+1}"
-        row_cells[1].text = str(item['quantidade'])
-        row_cells[2].text = f"{item['produto']} COM {item['plataforma']}"
-        row_cells[3].text = f"{item['valor_unitario']:.2f}"
-        valor_total_item = item['quantidade'] * item['valor_unitario']
-        row_cells[4].text = f"{valor_total_item:.2f}"
-        total_locacao_mensal += valor_total_item
-        
-        for cell in row_cells:
-            for paragraph in cell.paragraphs:
-                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-            
-    add_justified_paragraph("\n2.2. Resumo Financeiro:")
-    add_justified_paragraph(f"Valor Total da Locação Mensal: R$ {total_locacao_mensal:.2f}")
-    add_justified_paragraph(f"Custo de Entrega (Frete): R$ {dados['valor_entrega']:.2f}")
-    add_justified_paragraph(f"Custo de Recolha (Frete): R$ {dados['valor_recolha']:.2f}")
-
-    add_justified_paragraph("\n2.3. Contato e Endereço da Obra:")
-    add_justified_paragraph(f"Contato Responsável na Obra: {dados['contato_nome']}")
-    add_justified_paragraph(f"Telefone: {dados['contato_telefone']}")
-    add_justified_paragraph(f"Endereço da Obra: {dados['endereco_obra']}")
-
-    add_clausula_heading("\nCLÁUSULA TERCEIRA – DO PRAZO")
-    add_justified_paragraph(f"3.1. A locação terá início em {dados['data_inicio']} e se encerrará com a devolução integral dos equipamentos à LOCADORA em perfeitas condições de uso. Para equipamentos não devolvidos ou danificados, a locação permanecerá vigente até a quitação da indenização correspondente.")
-    add_justified_paragraph("3.2. A vigência mínima deste contrato é de 30 (trinta) dias. Após este período, caso não haja manifestação de rescisão por escrito, o contrato será renovado automaticamente por períodos iguais e sucessivos.")
-    add_justified_paragraph("3.3. Caso a LOCATÁRIA não comunique por escrito a intenção de devolver os equipamentos com antecedência mínima de 05 (cinco) dias do vencimento do período vigente, a LOCADORA fica autorizada a faturar um novo período de 30 (trinta) dias.")
-
-    add_clausula_heading("\nCLÁUSULA QUARTA – DO FATURAMENTO")
-    add_justified_paragraph("4.1. O faturamento do primeiro período de 30 (trinta) dias será realizado no ato da entrega dos equipamentos. Os períodos subsequentes serão faturados a cada 30 (trinta) dias.")
-    
-    add_clausula_heading("\nCLÁUSULA QUINTA – DO PAGAMENTO")
-    add_justified_paragraph("5.1. O pagamento do primeiro período será efetuado na data da entrega dos equipamentos. Os pagamentos subsequentes deverão ser realizados a cada 30 (trinta) dias.")
-    add_justified_paragraph("5.2. Os pagamentos serão realizados em moeda corrente nacional, por meio de boleto bancário, que a LOCATÁRIA desde já reconhece como dívida líquida, certa e exigível em seu vencimento.")
-    add_justified_paragraph("5.3. O atraso no pagamento sujeitará a LOCATÁRIA à multa de 3% (três por cento) sobre o valor do débito, acrescido de juros e correção monetária. Após 5 (cinco) dias de atraso, o título poderá ser enviado a protesto.")
-
-    add_clausula_heading("\nCLÁUSULA SEXTA – DO LOCAL E USO DOS EQUIPAMENTOS")
-    add_justified_paragraph("6.1. Os equipamentos deverão ser utilizados exclusivamente no endereço da obra informado na Cláusula Segunda.")
-    add_justified_paragraph("6.2. É expressamente vedado à LOCATÁRIA ceder, emprestar, sublocar ou transferir os equipamentos a terceiros ou para outro local, sob qualquer pretexto.")
-    
-    add_clausula_heading("\nCLÁUSULA SÉTIMA – DA GUARDA E CONSERVAÇÃO")
-    add_justified_paragraph("7.1. Ao assinar o check list de entrega, a LOCATÁRIA declara ter recebido todos os componentes do equipamento objeto deste contrato em perfeito estado de conservação e uso.")
-    add_justified_paragraph("7.2. A LOCATÁRIA responsabiliza-se inteiramente pela guarda e conservação dos equipamentos de propriedade da LOCADORA. Eventuais danos por mau uso ou imperícia ou falta de todo ou partes dos equipamentos serão indenizados pela LOCATÁRIA.")
-    add_justified_paragraph("7.3. Será considerado o valor de indenização para cada componente, o mesmo constante no check list de entrega.")
-
-    add_clausula_heading("\nCLÁUSULA OITAVA – DA UTILIZAÇÃO")
-    add_justified_paragraph("8.1. A montagem, desmontagem e correta utilização dos equipamentos ficarão exclusivamente, a cargo da LOCATÁRIA. Caso a LOCATÁRIA queira assistência da LOCADORA, devera solicitar isso por escrito.")
-    add_justified_paragraph("8.2. A LOCADORA não se responsabiliza por eventuais acidentes decorrentes do mau uso, erro ou falha na operação e negligência em relação às normas de segurança do trabalho durante a vigência deste contrato, o mesmo será de responsabilidade da LOCATÁRIA, sejam civis, criminais ou trabalhistas.")
-    add_justified_paragraph("8.3. A LOCADORA envia junto do equipamento placas de identificação e capacidade de carga de acordo com o tamanho de cada balancim suspenso locado, sendo responsabilidade da LOCATÁRIA a fixação das mesmas antes da utilização do equipamento.")
-
-    add_clausula_heading("\nCLÁUSULA NONA – DA MANUTENÇÃO")
-    add_justified_paragraph("9.1. A LOCATÁRIA fica obrigada a zelar pela boa manutenção do equipamento, mantendo sempre todas as peças e partes em funcionamento. Fica ainda sob responsabilidade da LOCATÁRIA as manutenções preventivas que se fizerem necessárias durante a vigência deste contrato.")
-    add_justified_paragraph("9.2. Para reparos que necessitem mão de obra especializada, a LOCATÁRIA deverá solicitar por escrito a assistência técnica da LOCADORA, que deverá atender a solicitação em um prazo de 48 horas após a comunicação.")
-    add_justified_paragraph("9.3. Caso seja constatado que a danificação apresentada no equipamento seja por mau uso, erro ou falha na operação, vandalismo e/ou falta de energia elétrica, o custo de manutenção e reparos ocorrerá por conta da LOCATÁRIA.")
-
-    add_clausula_heading("\nCLÁUSULA DÉCIMA – DO DIREITO DE PROPRIEDADE")
-    add_justified_paragraph("10.1. Fica resguardado o direito de propriedade da LOCADORA sobre o equipamento contratado, acima de qualquer situação, condição ou pretexto alegados pela LOCATÁRIA ou por terceiros.")
-    
-    add_clausula_heading("\nCLÁUSULA DÉCIMA PRIMEIRA – DA RESCISÃO")
-    p_rescisao_intro = doc.add_paragraph("11.1. O presente contrato fica rescindido de pleno direito, independente de qualquer aviso, sem prejuízo das penalidades, nas seguintes hipóteses:")
-    p_rescisao_intro.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    doc.add_paragraph("")
-
-    p_item_I = doc.add_paragraph("I - Atraso no pagamento de 2 (dois) aluguéis consecutivos;")
-    p_item_I.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    doc.add_paragraph("")
-
-    p_item_II = doc.add_paragraph("II - Infração das demais cláusulas contratuais;")
-    p_item_II.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    doc.add_paragraph("")
-
-    p_item_III = doc.add_paragraph("III - Falência, insolvência ou concordata da LOCATÁRIA;")
-    p_item_III.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    doc.add_paragraph("")
-
-    p_item_IV = doc.add_paragraph("IV - Quando a LOCADORA achar e julgar necessária o encerramento do contrato.")
-    p_item_IV.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    doc.add_paragraph("")
-
-    add_clausula_heading("CLÁUSULA DÉCIMA SEGUNDA – DO FORO")
-    add_justified_paragraph("12.1. Fica eleito o foro central da comarca de São José para dirimir eventuais litígios oriundos deste contrato, se solução amigável não advir.")
-
-    p_final_intro = doc.add_paragraph("E, por estarem justas e contratadas, as partes firmam o presente instrumento em 2 (duas) vias de igual teor e forma, na presença das duas testemunhas abaixo.")
-    p_final_intro.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    
-    meses_pt = {
-        "january": "janeiro", "february": "fevereiro", "march": "março",
-        "april": "abril", "may": "maio", "june": "junho", "july": "julho",
-        "august": "agosto", "september": "setembro", "october": "outubro",
-        "november": "novembro", "december": "dezembro"
-    }
-    
-    data_assinatura_str = dados['data_assinatura']
-    partes_data = data_assinatura_str.split(' de ')
-    data_formatada_pt = data_assinatura_str
-    if len(partes_data) == 3:
-        dia = partes_data[0]
-        mes_ingles = partes_data[1]
-        ano = partes_data[2]
-        mes_portugues = meses_pt.get(mes_ingles.lower(), mes_ingles)
-        data_formatada_pt = f"{dia} de {mes_portugues} de {ano}"
-
-    assinatura_data = doc.add_paragraph(f"\nSão José, {data_formatada_pt}.")
-    assinatura_data.alignment = WD_ALIGN_PARAGRAPH.LEFT
-
-    p_assinatura_locadora_linha = doc.add_paragraph("_________________________________________")
-    p_assinatura_locadora_linha.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    p_assinatura_locadora_nome = doc.add_paragraph("ROCKER LOCAÇÃO DE EQUIPAMENTOS LTDA")
-    p_assinatura_locadora_nome.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    p_assinatura_locadora_qualif = doc.add_paragraph("(LOCADORA)")
-    p_assinatura_locadora_qualif.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    
-    doc.add_paragraph("")
-    
-    p_assinatura_locataria_linha = doc.add_paragraph("_________________________________________")
-    p_assinatura_locataria_linha.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    p_assinatura_locataria_nome = doc.add_paragraph(f"{dados['cliente']['nome_razao_social'].upper()}")
-    p_assinatura_locataria_nome.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    p_assinatura_locataria_qualif = doc.add_paragraph("(LOCATÁRIA)")
-    p_assinatura_locataria_qualif.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    
-    doc.add_paragraph("")
-    
-    p_testemunhas_titulo = doc.add_paragraph("Testemunhas:")
-    p_testemunhas_titulo.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    doc.add_paragraph("")
-
-    p_testemunha1_linha = doc.add_paragraph("_________________________________________")
-    p_testemunha1_linha.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    p_testemunha1_nome = doc.add_paragraph("Nome:")
-    p_testemunha1_nome.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    p_testemunha1_cpf = doc.add_paragraph("CPF:")
-    p_testemunha1_cpf.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    doc.add_paragraph("")
-    
-    p_testemunha2_linha = doc.add_paragraph("_________________________________________")
-    p_testemunha2_linha.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    p_testemunha2_nome = doc.add_paragraph("Nome:")
-    p_testemunha2_nome.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    p_testemunha2_cpf = doc.add_paragraph("CPF:")
-    p_testemunha2_cpf.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-# --- FUNÇÃO PARA GERAR A FATURA EM WORD (COM CORREÇÕES E MELHORIAS) ---
-def gerar_fatura_docx(dados_fatura):
-    doc = Document()
-    
-    style = doc.styles['Normal']
-    style.font.name = 'Times New Roman'
-    style.font.size = Pt(12)
-    style.paragraph_format.line_spacing = 1.5
-
-    p_logo = doc.add_paragraph()
-    p_logo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run_logo = p_logo.add_run()
-    try:
-        run_logo.add_picture('assets/logo.png', width=Cm(14.52), height=Cm(2.22)) 
-    except FileNotFoundError:
-        run_logo.text = "Rocker Equipamentos"
-    
-    tabela_principal = doc.add_table(rows=7, cols=2)
-    tabela_principal.style = 'Table Grid'
-    tabela_principal.autofit = False
-    tabela_principal.allow_autofit = False
-    
-    tabela_principal.columns[0].width = Cm(10.0)
-    tabela_principal.columns[1].width = Cm(7.0)
-
-    celula_rocker = tabela_principal.cell(0, 0)
-    celula_fatura = tabela_principal.cell(0, 1)
-    
-    celula_rocker.paragraphs[0].clear()
-    p_rocker_info = celula_rocker.add_paragraph()
-    run_rocker_name = p_rocker_info.add_run("ROCKER LOCAÇÃO DE EQUP. PARA CONST. LTDA EPP\n")
-    run_rocker_name.bold = True
-    p_rocker_info.add_run("Rua Carlos Adriano Rodrigues da Silva, S/N – Potecas – São José SC\n"
-                            "CNPJ 15.413.157/0001-16\n"
-                            "Telefones: 48 3246.9987 - 3372.6439")
-    
-    celula_fatura.paragraphs[0].clear()
-    p_titulo = celula_fatura.add_paragraph("FATURA DE LOCAÇÃO")
-    p_titulo.runs[0].bold = True
-    celula_fatura.add_paragraph(f"N°{dados_fatura['NUMERO_FATURA']}")
-    celula_fatura.add_paragraph(f"Emissão: {dados_fatura['DATA_EMISSAO']}")
-
-    celula_dest_titulo = tabela_principal.cell(1, 0).merge(tabela_principal.cell(1, 1))
-    celula_dest_titulo.text = "DESTINATÁRIO"
-    celula_dest_titulo.paragraphs[0].runs[0].bold = True
-
-    celula_cliente_info_end = tabela_principal.cell(2, 0).merge(tabela_principal.cell(2, 1))
-    
-    p_cliente = celula_cliente_info_end.paragraphs[0] if celula_cliente_info_end.paragraphs else celula_cliente_info_end.add_paragraph()
-    p_cliente.clear()
-    p_cliente.add_run(f"{dados_fatura['NOME_CLIENTE']}\nCNPJ/CPF: {dados_fatura['CNPJ_CLIENTE']}\n")
-    
-    run_endereco_label = p_cliente.add_run("Endereço: ")
-    run_endereco_label.bold = True
-    
-    endereco_completo = f"{dados_fatura['ENDERECO_CLIENTE']}, {dados_fatura.get('BAIRRO_CLIENTE', '')} - {dados_fatura.get('CIDADE_CLIENTE', '')} - {dados_fatura.get('ESTADO_CLIENTE', 'SC')}, CEP: {dados_fatura.get('CEP_CLIENTE', '')}"
-    p_cliente.add_run(endereco_completo)
-    
-    celula_desc = tabela_principal.cell(3, 0).merge(tabela_principal.cell(3, 1))
-    p_desc = celula_desc.paragraphs[0] if celula_desc.paragraphs else celula_desc.add_paragraph()
-    p_desc.clear()
-    run_desc_label = p_desc.add_run("Descrição: ")
-    run_desc_label.bold = True
-    p_desc.add_run(f"{dados_fatura['DESCRICAO_SERVICO']}")
-
-    celula_valor = tabela_principal.cell(4, 0)
-    celula_vencimento = tabela_principal.cell(4, 1)
-
-    celula_valor.paragraphs[0].clear()
-    p_valor = celula_valor.add_paragraph()
-    run_valor_label = p_valor.add_run("Valor Total: ")
-    run_valor_label.bold = True
-    p_valor.add_run(f"R$ {float(dados_fatura['VALOR_TOTAL'].replace(',', '.')):.2f}")
-
-    celula_vencimento.paragraphs[0].clear()
-    p_venc = celula_vencimento.add_paragraph()
-    run_venc_label = p_venc.add_run("Vencimento: ")
-    run_venc_label.bold = True
-    p_venc.add_run(f"{dados_fatura['DATA_VENCIMENTO']}")
-    
-    celula_forma_pag = tabela_principal.cell(5, 0).merge(tabela_principal.cell(5, 1))
-    p_forma_pag = celula_forma_pag.paragraphs[0] if celula_forma_pag.paragraphs else celula_forma_pag.add_paragraph()
-    p_forma_pag.clear()
-    run_forma_pag_label = p_forma_pag.add_run("Forma de Pagamento: ")
-    run_forma_pag_label.bold = True
-    p_forma_pag.add_run(f"{dados_fatura['FORMA_PAGAMENTO']}")
-
-    celula_obs = tabela_principal.cell(6, 0).merge(tabela_principal.cell(6, 1))
-    p_obs = celula_obs.paragraphs[0] if celula_obs.paragraphs else celula_obs.add_paragraph()
-    p_obs.clear()
-    run_obs_label = p_obs.add_run("Observações: ")
-    run_obs_label.bold = True
-    
-    observacao = dados_fatura.get('OBSERVACAO', '') 
-    if observacao:
-        run_obs_text = p_obs.add_run(observacao)
-        run_obs_text.font.color.rgb = RGBColor(0xFF, 0x00, 0x00)
-
-    section = doc.sections[0]
-    footer = section.footer
-    p_footer = footer.paragraphs[0] if footer.paragraphs else footer.add_paragraph()
-    p_footer.text = (
-        "OPERAÇÃO NÃO TRIBUTADA PELO ISS, CONFORME LEI COMPL. Nº 116 DE 31/07/03. "
-        "O serviço de locação de bens móveis não se enquadra no rol de serviço que trata do artigo 30 da lei 10833/03 não estando sujeito a retenção. "
-        "Dispensa de emissão de Nota Fiscal de Serviços conforme Lei Complementar nº 116 de 31 de Julho de 2010."
-    )
-    p_footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    p_footer.runs[0].font.size = Pt(8)
+        st.error("Arquivo de autenticação local 'service_account.json' não encontrado. Para deploy, configure st.secrets com chaves individuais.")
+        st.stop()
+    except Exception as e:
+        st.error(f"Erro ao carregar credenciais locais: {e}. Para deploy, configure st.secrets com chaves individuais.")
+        st.stop()
+
+def _token_expirando(credentials):
+    if not credentials.access_token or credentials.token_expiry is None:
+        return True
+    return credentials.token_expiry - datetime.utcnow() <= TOKEN_REFRESH_MARGIN
+
+def login_gdrive():
+    global _drive_client
+    with _drive_lock:
+        if _drive_client is None:
+            from pydrive2.auth import GoogleAuth
+            from pydrive2.drive import GoogleDrive
+            gauth = GoogleAuth()
+            gauth.credentials = _carregar_credenciais()
+            _drive_client = GoogleDrive(gauth)
+            _drive_stats["builds"] += 1
+        else:
+            _drive_stats["cache_hits"] += 1
+
+        # Renova o token antes do vencimento para que nenhuma requisição
+        # precise tomar um 401 e refazer a troca no meio do caminho.
+        credentials = _drive_client.auth.credentials
+        if _token_expirando(credentials):
+            import httplib2
+            credentials.refresh(httplib2.Http())
+            _drive_stats["token_refreshes"] += 1
+        return _drive_client
+
+def drive_pool_stats():
+    with _drive_lock:
+        return dict(_drive_stats)
+
+def reset_drive_pool():
+    """Descarta o cliente em cache (ex.: após trocar as credenciais) e o backend que o usa."""
+    global _drive_client, _banco
+    with _drive_lock:
+        _drive_client = None
+    with _banco_lock:
+        if isinstance(_banco, FilaDeEscrita):
+            _banco.fechar()
+        _banco = None
+
+# --- ARQUIVOS ESTÁTICOS ---
+def src_imagem(nome):
+    """Valor do src de um <img> para o ativo 'nome' (veja ativos.py), ou None se o arquivo não existe.
+
+    Com server.enableStaticServing ligado, é a URL em app/static/ (o navegador
+    baixa e guarda a imagem); senão, a imagem embutida em base64, codificada
+    uma vez por processo.
+    """
+    import ativos
+    ativo = ativos.obter(nome)
+    if ativo is None:
+        return None
+    return ativo.url if st.get_option("server.enableStaticServing") else ativo.data_uri()
 
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+# --- DOCUMENTOS EM WORD ---
+# A geração dos .docx fica em documentos.py, que só é importado (junto com o
+# python-docx) quando o primeiro documento é gerado.
+def gerar_contrato_docx(dados):
+    import documentos
+    return documentos.gerar_contrato_docx(dados)
+
+def gerar_fatura_docx(dados_fatura):
+    import documentos
+    return documentos.gerar_fatura_docx(dados_fatura)
+
+def dados_fatura_docx(fatura):
+    """Campos do modelo de fatura a partir de uma fatura gravada em invoices.json."""
+    cliente = fatura['cliente_info']
+    return {
+        "NUMERO_FATURA": fatura.get("numero_fatura"),
+        "DATA_EMISSAO": datetime.fromisoformat(fatura.get("data_emissao")).strftime('%d/%m/%Y'),
+        "NOME_CLIENTE": cliente.get('nome_razao_social', ''),
+        "CNPJ_CLIENTE": cliente.get('cpf_cnpj', ''),
+        "ENDERECO_CLIENTE": cliente.get('endereco', ''),
+        "BAIRRO_CLIENTE": cliente.get('bairro', ''),
+        "CIDADE_CLIENTE": cliente.get('cidade', ''),
+        "ESTADO_CLIENTE": cliente.get('estado', ''),
+        "CEP_CLIENTE": cliente.get('cep', ''),
+        "FORMA_PAGAMENTO": fatura.get("forma_pagamento", ''),
+        "DATA_VENCIMENTO": datetime.fromisoformat(fatura.get("data_vencimento")).strftime('%d/%m/%Y'),
+        "DESCRICAO_SERVICO": fatura.get("descricao_servico", ''),
+        "VALOR_TOTAL": fatura.get("valor_total", ''),
+        "OBSERVACAO": fatura.get("observacao", ''),
+    }
 
-# --- FUNÇÕES DE GERENCIAMENTO DE NÚMEROS (SEM ALTERAÇÕES) ---
-def get_next_contract_number(drive):
+# Os botões "Baixar Novamente" das listas recebem uma função em vez do arquivo
+# (st.download_button aceita um callable em 'data'): o documento só é gerado
+# quando alguém clica. Os bytes ficam num LRU de até 'docx_cache_size'
+# documentos, pela soma SHA-256 do conteúdo do registro; um registro alterado
+# tem outra soma e gera o documento de novo.
+_documentos_lock = threading.Lock()
+_documentos_cache = OrderedDict()
+
+def _documento_em_cache(tipo, dados, gerar):
+    conteudo_registro = json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+    chave = (tipo, hashlib.sha256(conteudo_registro.encode('utf-8')).hexdigest())
+    with _documentos_lock:
+        if chave in _documentos_cache:
+            _documentos_cache.move_to_end(chave)
+            return _documentos_cache[chave]
+    conteudo = gerar(dados).getvalue()
+    with _documentos_lock:
+        _documentos_cache[chave] = conteudo
+        _documentos_cache.move_to_end(chave)
+        while len(_documentos_cache) > max(1, int(get_config("docx_cache_size", 128))):
+            _documentos_cache.popitem(last=False)
+    return conteudo
+
+def contrato_docx_sob_demanda(dados):
+    """Para o 'data' do st.download_button: gera (ou tira do cache) o contrato só no clique."""
+    return lambda: _documento_em_cache("contrato", dados, gerar_contrato_docx)
+
+def fatura_docx_sob_demanda(dados_fatura):
+    """Para o 'data' do st.download_button: gera (ou tira do cache) a fatura só no clique."""
+    return lambda: _documento_em_cache("fatura", dados_fatura, gerar_fatura_docx)
+
+# --- FUNÇÕES DE GERENCIAMENTO DE NÚMEROS ---
+# Os números são reservados no config.json em blocos de 'number_block_size'
+# por processo, com gravação condicional (compare-and-swap) no backend: duas
+# sessões nunca recebem o mesmo número e a maioria das alocações não acessa o
+# banco. Números de um bloco não usado até o processo reiniciar ficam de fora
+# da sequência; com number_block_size = 1 a numeração não tem lacunas.
+_numeros_lock = threading.Lock()
+_blocos_numeros = {}
+
+def _alocar_numero(banco, campo):
+    with _numeros_lock:
+        bloco = _blocos_numeros.get(campo)
+        if not bloco or bloco["proximo"] > bloco["ultimo"]:
+            tamanho = max(1, int(get_config("number_block_size", 10)))
+            primeiro = banco.reservar_numeros("config.json", campo, tamanho)
+            bloco = _blocos_numeros[campo] = {"proximo": primeiro, "ultimo": primeiro + tamanho - 1}
+        numero = bloco["proximo"]
+        bloco["proximo"] += 1
+        return numero
+
+def get_next_contract_number(banco):
     try:
-        config_file = get_database_file(drive, "config.json")
-        config_data = read_data(config_file)
-        ultimo_numero = config_data.get("ultimo_numero_contrato", 0)
-        novo_numero = ultimo_numero + 1
+        novo_numero = _alocar_numero(banco, "ultimo_numero_contrato")
         ano_atual = date.today().year
-        config_data["ultimo_numero_contrato"] = novo_numero
-        write_data(config_file, config_data)
         return f"{str(novo_numero).zfill(5)}-{ano_atual}"
     except Exception as e:
         st.error(f"Erro ao obter número do contrato: {e}")
         return None
 
-def get_next_fatura_number(drive):
+def get_next_fatura_number(banco):
     try:
-        config_file = get_database_file(drive, "config.json")
-        config_data = read_data(config_file)
-        ultimo_numero = config_data.get("ultimo_numero_fatura", 0)
-        novo_numero = ultimo_numero + 1
-        config_data["ultimo_numero_fatura"] = novo_numero
-        write_data(config_file, config_data)
+        novo_numero = _alocar_numero(banco, "ultimo_numero_fatura")
         return f"{str(novo_numero).zfill(7)}"
     except Exception as e:
         st.error(f"Erro ao obter número da fatura: {e}")
         return None
 
-# --- FUNÇÕES DE CONEXÃO COM GOOGLE DRIVE (SEM ALTERAÇÕES) ---
-def get_database_file(drive, filename):
-    file_list = drive.ListFile({'q': f"title='{filename}' and trashed=false"}).GetList()
-    if file_list:
-        return file_list[0]
+# --- BANCO DE DADOS ---
+# O backend é escolhido por 'storage_backend': "drive" (padrão), "local" (pasta
+# 'local_storage_path') ou "sqlite" (arquivo 'sqlite_path'). Ele é criado uma
+# vez por processo; as páginas só conversam com as funções abaixo. Com
+# 'partition_by_period', contratos e faturas ficam em um arquivo por mês.
+BACKENDS = ("drive", "local", "sqlite")
+
+_banco_lock = threading.Lock()
+_banco = None
+
+def _opcao_ativa(chave):
+    return str(get_config(chave, "false")).strip().lower() in ("1", "true", "sim", "yes")
+
+def criar_banco(backend):
+    """Monta um backend a partir das opções configuradas (sem o cache de conectar_banco)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"storage_backend desconhecido: '{backend}'. Use um de {BACKENDS}.")
+    opcoes = {
+        "formato": get_config("storage_format", "json-indent"),
+        "journal": get_config("storage_mode", "snapshot") == "journal",
+        "journal_max_entradas": int(get_config("journal_max_entries", 200)),
+    }
+    if backend == "sqlite":
+        # O SQLite já filtra contratos e faturas por índice: não há o que particionar.
+        return ArmazenamentoSQLite(get_config("sqlite_path", "dados.sqlite3"))
+    if backend == "drive":
+        from armazenamento_drive import ArmazenamentoDrive
+        banco = ArmazenamentoDrive(login_gdrive(), caminho_registro_ids=get_config("file_id_cache_path"), **opcoes)
     else:
-        file = drive.CreateFile({'title': filename, 'mimeType': 'application/json'})
-        file.SetContentString('[]')
-        file.Upload()
-        return file
-
-def read_data(drive_file):
-    content = drive_file.GetContentString()
-    if not content:
-        return []
-    return json.loads(content)
-
-def write_data(drive_file, data):
-    drive_file.SetContentString(json.dumps(data, indent=4, ensure_ascii=False))
-    drive_file.Upload()
-
-# --- FUNÇÕES DE VALIDAÇÃO (SEM ALTERAÇÕES) ---
+        banco = ArmazenamentoLocal(get_config("local_storage_path", "dados"), **opcoes)
+    if _opcao_ativa("partition_by_period"):
+        banco = ArmazenamentoParticionado(banco)
+    return banco
+
+def conectar_banco():
+    """Backend configurado, compartilhado pelo processo.
+
+    Com write_behind ativo, as alterações vão para uma FilaDeEscrita e são
+    enviadas em segundo plano (ver armazenamento.py); salvar_pendencias()
+    força o envio e, ao encerrar o processo, o que restou é enviado.
+    """
+    global _banco
+    backend = get_config("storage_backend", "drive")
+    if backend == "drive":
+        # Chamado a cada rerun também para manter o token do Drive renovado.
+        login_gdrive()
+    with _banco_lock:
+        if _banco is None:
+            _banco = criar_banco(backend)
+            if _opcao_ativa("write_behind"):
+                _banco = FilaDeEscrita(
+                    _banco,
+                    get_config("write_behind_spool", ".fila_escrita"),
+                    atraso=float(get_config("write_behind_delay", 0.5)),
+                    # A thread de envio também precisa de um token válido.
+                    preparar=login_gdrive if backend == "drive" else None,
+                )
+                atexit.register(_banco.fechar)
+        return _banco
+
+def salvar_pendencias():
+    """Envia agora as alterações que estão na fila de escrita (sem efeito sem write_behind)."""
+    with _banco_lock:
+        banco = _banco
+    if isinstance(banco, FilaDeEscrita):
+        banco.descarregar()
+
+def get_database_file(banco, filename):
+    return banco.abrir(filename)
+
+def carregar_colecoes(banco, pedidos):
+    """Carrega juntas as coleções de uma página: {nome: Carga(colecao, dados, erro)}.
+
+    'pedidos' é uma lista de nomes ou {nome: argumentos de consultar_registros};
+    as buscas rodam em paralelo e o erro de uma não impede as outras.
+    """
+    return _carregar_colecoes(banco, pedidos)
+
+def read_data(colecao):
+    return colecao.armazenamento.ler(colecao)
+
+def write_data(colecao, data):
+    with _trava_alteracoes(colecao):
+        colecao.armazenamento.gravar(colecao, data)
+        _descartar_indices(colecao)
+
+def inserir_registro(colecao, registro):
+    _alterar_com_indices(colecao, lambda: colecao.armazenamento.inserir(colecao, registro),
+                         lambda indice: indice.inserir(registro))
+
+def inserir_registros(colecao, registros):
+    """Insere vários registros com uma gravação só (um append no journal, uma transação no SQLite)."""
+    operacoes = [{'op': 'insert', 'id': registro[colecao.chave], 'registro': registro} for registro in registros]
+    def repassar(indice):
+        for registro in registros:
+            indice.inserir(registro)
+    _alterar_com_indices(colecao, lambda: colecao.armazenamento.aplicar_operacoes(colecao, operacoes), repassar)
+
+def atualizar_registro(colecao, id_registro, alteracoes):
+    _alterar_com_indices(colecao, lambda: colecao.armazenamento.atualizar(colecao, id_registro, alteracoes),
+                         lambda indice: indice.atualizar(id_registro, alteracoes))
+
+def atualizar_registros(colecao, alteracoes_por_id):
+    """Aplica {id: alterações} com uma gravação só (correções em lote)."""
+    operacoes = [{'op': 'update', 'id': id_registro, 'alteracoes': alteracoes} for id_registro, alteracoes in alteracoes_por_id.items()]
+    def repassar(indice):
+        for id_registro, alteracoes in alteracoes_por_id.items():
+            indice.atualizar(id_registro, alteracoes)
+    _alterar_com_indices(colecao, lambda: colecao.armazenamento.aplicar_operacoes(colecao, operacoes), repassar)
+
+def excluir_registro(colecao, id_registro):
+    _alterar_com_indices(colecao, lambda: colecao.armazenamento.excluir(colecao, id_registro),
+                         lambda indice: indice.excluir(id_registro))
+
+def consultar_registros(colecao, filtros=None, ordenar_por=None, decrescente=False, periodo=None):
+    """Registros da coleção com os campos iguais a 'filtros', opcionalmente ordenados.
+
+    'periodo' = (inicio, fim) restringe contratos/faturas pela data de
+    geração/emissão (datas inclusivas).
+    """
+    return colecao.armazenamento.consultar(colecao, filtros, ordenar_por, decrescente, periodo)
+
+def contar_registros(colecao, filtros=None, periodo=None):
+    return colecao.armazenamento.contar(colecao, filtros, periodo)
+
+def compactar_journal(colecao):
+    colecao.armazenamento.compactar_journal(colecao)
+
+def migrar_formato(banco, formato, arquivos=None):
+    if isinstance(banco, FilaDeEscrita):
+        banco.descarregar()
+        banco = banco.interno
+    if not isinstance(banco, (ArmazenamentoEmArquivos, ArmazenamentoParticionado)):
+        raise ValueError("storage_format só se aplica aos backends 'drive' e 'local'.")
+    return banco.migrar_formato(formato, arquivos)
+
+def read_cache_stats():
+    """Contadores do cache de leitura do Drive; 'hits' são downloads completos evitados."""
+    with _banco_lock:
+        return _banco.estatisticas() if _banco else {}
+
+# --- ÍNDICES DE BUSCA ---
+# Um índice por coleção e tipo, compartilhado pelas sessões do processo e
+# guardado com a versão da coleção de quando foi montado. As alterações feitas
+# pelas funções acima são repassadas aos índices em vez de remontá-los; se a
+# coleção mudou por outro caminho (outro processo, write_data), a versão não
+# confere e o índice é remontado na próxima busca. Quando a página não leu a
+# coleção nesta execução ('registros' None), a versão é conferida no backend
+# (no Drive, uma consulta de metadados) em vez de ler a coleção inteira.
+_indices_lock = threading.Lock()
+_indices = {}  # (coleção, tipo) -> {"versao": ..., "indice": ...}
+_travas_alteracoes = {}  # coleção -> trava das alterações feitas pelas funções acima
+
+def _trava_alteracoes(colecao):
+    with _indices_lock:
+        return _travas_alteracoes.setdefault(colecao.nome, threading.Lock())
+
+def _indice(colecao, tipo, registros, fabrica):
+    versao = colecao.armazenamento.versao(colecao, revalidar=registros is None)
+    with _indices_lock:
+        atual = _indices.get((colecao.nome, tipo))
+        if atual is not None and versao is not None and atual["versao"] == versao:
+            return atual["indice"]
+        if registros is None:
+            registros = colecao.armazenamento.consultar(colecao)
+        indice = fabrica().construir(registros)
+        _indices[(colecao.nome, tipo)] = {"versao": versao, "indice": indice}
+        return indice
+
+def _alterar_com_indices(colecao, alterar, repassar):
+    # Uma alteração por vez em cada coleção: se a gravação de outra sessão
+    # entrasse entre as duas versões, o índice ficaria com a versão nova sem
+    # ter recebido essa outra alteração.
+    with _trava_alteracoes(colecao):
+        versao_antes = colecao.armazenamento.versao(colecao)
+        alterar()
+        versao_depois = colecao.armazenamento.versao(colecao)
+        with _indices_lock:
+            for (nome, _), entrada in _indices.items():
+                # Só acompanha quem estava em dia; os demais são remontados depois.
+                if nome == colecao.nome and versao_antes is not None and entrada["versao"] == versao_antes:
+                    repassar(entrada["indice"])
+                    entrada["versao"] = versao_depois
+
+def _descartar_indices(colecao):
+    with _indices_lock:
+        for chave in [chave for chave in _indices if chave[0] == colecao.nome]:
+            del _indices[chave]
+
+def _indice_documentos(colecao, registros):
+    import indices
+    return _indice(colecao, "cpf_cnpj", registros, lambda: indices.IndiceDigitos(colecao.chave, "cpf_cnpj"))
+
+def buscar_por_documento(colecao, registros, trecho):
+    """Registros cujo CPF/CNPJ contém os dígitos de 'trecho' (prefixo ou meio, com ou sem pontuação).
+
+    'registros' é a coleção já lida pela página; só é usada quando o índice
+    precisa ser (re)montado.
+    """
+    return _indice_documentos(colecao, registros).buscar(trecho)
+
+def documento_cadastrado(colecao, registros, documento, ignorar_id=None):
+    """Primeiro registro (fora 'ignorar_id') com o mesmo CPF/CNPJ, comparando só os dígitos; None se não há."""
+    encontrados = _indice_documentos(colecao, registros).com_valor(documento, ignorar_id)
+    return encontrados[0] if encontrados else None
+
+def pagina_ordenada(colecao, registros, campo, inicio, quantidade):
+    """Fatia [inicio, inicio + quantidade) da coleção ordenada por 'campo' (sem diferenciar acentos/maiúsculas).
+
+    A ordem fica no índice e acompanha as alterações; não é refeita a cada execução da página.
+    """
+    import indices
+    indice = _indice(colecao, f"ordem:{campo}", registros, lambda: indices.IndiceOrdenado(colecao.chave, campo))
+    return indice.fatia(inicio, quantidade)
+
+def obter_registro(colecao, registros, id_registro):
+    """Registro pela chave primária da coleção, pelo mapa de IDs do índice (None se não existe)."""
+    import indices
+    return _indice(colecao, "id", registros, lambda: indices.Indice(colecao.chave)).obter(id_registro)
+
+# Campo com o nome do cliente em cada coleção.
+CAMPOS_NOME = {
+    "clients.json": "nome_razao_social",
+    "contracts.json": "cliente.nome_razao_social",
+    "invoices.json": "cliente_info.nome_razao_social",
+}
+
+def buscar_por_nome(colecao, texto, registros=None, limite=50):
+    """Registros cujo nome de cliente se parece com 'texto', do mais ao menos parecido.
+
+    Ignora acentos, maiúsculas e pontuação e tolera erros de digitação
+    ("construtora sao jose" encontra "Construtora São José Ltda"). 'registros'
+    é a coleção inteira, se a página já a leu; senão o índice lê a coleção
+    quando precisa ser (re)montado.
+    """
+    import indices
+    campo = CAMPOS_NOME[colecao.nome]
+    indice = _indice(colecao, f"nome:{campo}", registros, lambda: indices.IndiceNomes(colecao.chave, campo))
+    return indice.buscar(texto, limite=limite)
+
+def consultar_contratos(colecao, status=None, periodo=None, numero=None, registros=None):
+    """Contratos pelo índice de contratos, do mais recente ao mais antigo.
+
+    'status' igual, 'periodo' = (inicio, fim) na data de geração (datas
+    inclusivas) e 'numero' como trecho do número do contrato.
+
+    A página não precisa ler a coleção: a versão é conferida no backend (no
+    Drive, só os metadados, o que também pega alterações de outra instância
+    ou dos scripts) e a coleção só é lida quando o índice precisa ser
+    remontado. O índice acompanha sozinho cadastros, mudanças de status e
+    exclusões feitos por aqui.
+    """
+    import indices
+    indice = _indice(colecao, "contratos", registros, lambda: indices.IndiceContratos(colecao.chave))
+    return indice.consultar(status, periodo, numero)
+
+# --- VALIDAÇÃO E CEP ---
+# Também carregados só no primeiro uso (validacao e requests).
 def validar_e_formatar_cpf(cpf_str):
-    cpf = CPF()
-    if cpf.validate(cpf_str):
-        return cpf.mask(cpf_str)
-    return None
+    import validacao
+    return validacao.validar_e_formatar_cpf(cpf_str)
 
 def validar_e_formatar_cnpj(cnpj_str):
-    cnpj = CNPJ()
-    if cnpj.validate(cnpj_str):
-        return cnpj.mask(cnpj_str)
-    return None
+    import validacao
+    return validacao.validar_e_formatar_cnpj(cnpj_str)
+
+def validar_documentos(documentos, tipo=None):
+    import validacao
+    return validacao.validar_documentos(documentos, tipo)
+
+# Um resolvedor de CEP por processo (sessão HTTP e cache em disco
+# compartilhados). cep_api_url troca a API (ex.: servidor local em testes;
+# '{cep}' vira os 8 dígitos) e cep_cache_path o arquivo do cache.
+_resolvedor_cep = None
+_resolvedor_cep_lock = threading.Lock()
+
+def resolvedor_cep():
+    global _resolvedor_cep
+    with _resolvedor_cep_lock:
+        if _resolvedor_cep is None:
+            import consulta_cep
+            _resolvedor_cep = consulta_cep.ResolvedorCep(
+                url=get_config("cep_api_url", consulta_cep.URL_VIACEP),
+                caminho_cache=get_config("cep_cache_path", ".cache_cep.sqlite3"),
+                timeout=(consulta_cep.TIMEOUT[0], float(get_config("cep_timeout", consulta_cep.TIMEOUT[1]))),
+            )
+        return _resolvedor_cep
 
-# --- FUNÇÃO DE CONSULTA DE CEP (SEM ALTERAÇÕES) ---
 def consultar_cep(cep):
-    cep_limpo = "".join(filter(str.isdigit, cep))
-    if len(cep_limpo) != 8:
-        return None
-    try:
-        url = f"https://viacep.com.br/ws/{cep_limpo}/json/"
-        response = requests.get(url)
-        if response.status_code == 200:
-            dados = response.json()
-            if dados.get("erro"):
-                return None
-            return dados
+    return resolvedor_cep().consultar(cep)
+
+# --- IMPORTAÇÃO DE CLIENTES ---
+def importar_clientes(colecao, arquivo, nome_arquivo, progresso=None, gravar=True):
+    """Lê um CSV/XLSX de clientes (importacao.ler_clientes) e grava os aceitos de uma vez.
+
+    Devolve o ResultadoImportacao; com gravar=False só valida. Erros no
+    arquivo inteiro (formato, cabeçalho) saem como importacao.ErroImportacao.
+    """
+    import importacao
+    resultado = importacao.ler_clientes(arquivo, nome_arquivo, lambda doc: documento_cadastrado(colecao, None, doc) is not None, progresso)
+    if gravar and resultado.clientes:
+        inserir_registros(colecao, resultado.clientes)
+    return resultado
+
+# --- EXPORTAÇÃO EM LOTE (.ZIP) ---
+# Os documentos são gerados num pool de processos (exportacao.py) e gravados
+# num .zip em disco. export_workers limita a quantidade de processos (padrão:
+# um por CPU).
+CAMPOS_CLIENTE = {
+    "contracts.json": "cliente",
+    "invoices.json": "cliente_info",
+}
+
+def registros_para_exportar(colecao, status=None, periodo=None, cliente=None):
+    """Contratos/faturas com um dos 'status' (lista; vazia = todos), no 'periodo' e do 'cliente'.
+
+    'cliente' é um trecho do CPF/CNPJ (só dígitos e pontuação) ou o nome,
+    buscado como na lista de clientes (sem acentos, tolerando erros).
+    """
+    campo_data = CAMPOS_PERIODO[colecao.nome]
+    # Um status só vai como filtro para o backend; vários são filtrados aqui.
+    filtros = {'status': status[0]} if status and len(status) == 1 else None
+    registros = consultar_registros(colecao, filtros, ordenar_por=campo_data, periodo=periodo)
+    if status and len(status) > 1:
+        registros = [r for r in registros if r.get('status') in status]
+    if cliente and cliente.strip():
+        import indices
+        if any(c.isalpha() for c in cliente):
+            ids = {r[colecao.chave] for r in buscar_por_nome(colecao, cliente, limite=None)}
+            registros = [r for r in registros if r[colecao.chave] in ids]
         else:
-            return None
-    except requests.RequestException:
-        return None
+            digitos = indices.somente_digitos(cliente)
+            campo = CAMPOS_CLIENTE[colecao.nome]
+            registros = [r for r in registros if digitos in indices.somente_digitos((r.get(campo) or {}).get('cpf_cnpj'))]
+    return registros
+
+def exportar_documentos(colecao, registros, destino, progresso=None):
+    """Grava em 'destino' um .zip com o contrato (contracts.json) ou a fatura (invoices.json) de cada registro."""
+    import exportacao
+    if colecao.nome == "contracts.json":
+        tipo = "contrato"
+        itens = [(f"CONTRATO_{c['numero_contrato']}_{c['cliente']['nome_razao_social']}.docx", c) for c in registros]
+    else:
+        tipo = "fatura"
+        itens = [(f"FATURA_{f['numero_fatura']}.docx", dados_fatura_docx(f)) for f in registros]
+    trabalhadores = int(get_config("export_workers", 0)) or None
+    return exportacao.exportar_zip(tipo, itens, destino, trabalhadores=trabalhadores, progresso=progresso)
+
+# O .zip fica num arquivo temporário até a próxima exportação da sessão ou o
+# fim do processo.
+_exportacoes = set()
+
+@atexit.register
+def _remover_exportacoes():
+    for caminho in list(_exportacoes):
+        _remover_exportacao(caminho)
+
+def _remover_exportacao(caminho):
+    _exportacoes.discard(caminho)
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+def _ler_arquivo(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+def exibir_exportacao(colecao, titulo, status_opcoes, prefixo_arquivo):
+    """Expander de exportação em lote: filtros, barra de progresso e botão de download do .zip."""
+    import tempfile
+    chave = f"exportacao_{colecao.nome}"
+    with st.expander(titulo):
+        with st.form(f"form_{chave}"):
+            col_status, col_periodo, col_cliente = st.columns(3)
+            with col_status:
+                status = st.multiselect("Status", options=status_opcoes)
+            with col_periodo:
+                periodo = st.date_input("Período", value=(), format="DD/MM/YYYY")
+            with col_cliente:
+                cliente = st.text_input("Cliente (nome ou CPF/CNPJ)")
+            gerar = st.form_submit_button("Gerar .zip")
+
+        if gerar:
+            try:
+                # Um dia só (um clique) vale como o período (dia, dia), como no filtro da página 4.
+                registros = registros_para_exportar(colecao, status, (periodo[0], periodo[-1]) if periodo else None, cliente)
+            except Exception as e:
+                st.error(f"Erro de conexão: {e}")
+                st.stop()
+            anterior = st.session_state.pop(chave, None)
+            if anterior:
+                _remover_exportacao(anterior["caminho"])
+            if not registros:
+                st.info("Nenhum documento encontrado com esses filtros.")
+            else:
+                descritor, caminho = tempfile.mkstemp(prefix=f"{prefixo_arquivo}_", suffix=".zip")
+                os.close(descritor)
+                _exportacoes.add(caminho)
+                barra = st.progress(0.0, text=f"Gerando {len(registros)} documentos...")
+                try:
+                    quantidade = exportar_documentos(colecao, registros, caminho,
+                                                     lambda feitos, total: barra.progress(feitos / total, text=f"{feitos} de {total} documentos"))
+                except Exception as e:
+                    _remover_exportacao(caminho)
+                    st.error(f"Falha ao gerar os documentos: {e}")
+                    st.stop()
+                barra.empty()
+                st.session_state[chave] = {
+                    "caminho": caminho, "quantidade": quantidade,
+                    "nome": f"{prefixo_arquivo}_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+                }
+
+        pronta = st.session_state.get(chave)
+        if pronta and os.path.exists(pronta["caminho"]):
+            st.success(f"{pronta['quantidade']} documentos prontos.")
+            st.download_button(
+                "Baixar .zip", data=lambda: _ler_arquivo(pronta["caminho"]), file_name=pronta["nome"],
+                mime="application/zip", key=f"baixar_{chave}",
+            )
 
 # --- COMPONENTE DE RODAPÉ (SEM ALTERAÇÕES) ---
 def exibir_rodape():
@@ -0,0 +1,85 @@
+# validacao.py
+# Validação e formatação de CPF/CNPJ, importada por utils no primeiro uso.
+# Segue as mesmas regras do validate_docbr, usado antes: aceita o documento
+# com ou sem máscara ('.', '-' e, no CNPJ, '/'), completa o CPF com zeros à
+# esquerda, recusa dígitos todos iguais e aceita o CNPJ alfanumérico (letras
+# nas 12 primeiras posições, valendo ord(c) - 48 no cálculo).
+#
+# Os dígitos verificadores são calculados direto sobre a string, sem montar
+# listas nem objetos por chamada, e os resultados ficam num cache LRU: o mesmo
+# documento costuma ser validado várias vezes (formulário, reruns, importação).
+import re
+from functools import lru_cache
+
+TAMANHO_CACHE = 4096
+
+_ENTRADA_CPF = re.compile(r'[0-9.\-]*')
+_ENTRADA_CNPJ = re.compile(r'[0-9A-Za-z./\-]*')
+_MASCARA = re.compile(r'[^0-9A-Za-z]')
+_PESOS_CNPJ_1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_PESOS_CNPJ_2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def _digito_cpf(digitos, quantidade):
+    total = 0
+    for i in range(quantidade):
+        total += (ord(digitos[i]) - 48) * (quantidade + 1 - i)
+    resto = total * 10 % 11
+    return 0 if resto == 10 else resto
+
+def _digito_cnpj(caracteres, pesos):
+    total = 0
+    for i, peso in enumerate(pesos):
+        total += (ord(caracteres[i]) - 48) * peso
+    resto = total % 11
+    return 0 if resto < 2 else 11 - resto
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def validar_e_formatar_cpf(cpf_str):
+    if not isinstance(cpf_str, str) or not _ENTRADA_CPF.fullmatch(cpf_str):
+        return None
+    digitos = cpf_str.replace('.', '').replace('-', '')
+    if len(digitos) > 11:
+        return None
+    digitos = digitos.zfill(11)
+    if digitos == digitos[0] * 11:
+        return None
+    if _digito_cpf(digitos, 9) != ord(digitos[9]) - 48 or _digito_cpf(digitos, 10) != ord(digitos[10]) - 48:
+        return None
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def validar_e_formatar_cnpj(cnpj_str):
+    if not isinstance(cnpj_str, str) or not _ENTRADA_CNPJ.fullmatch(cnpj_str):
+        return None
+    caracteres = cnpj_str.upper().replace('.', '').replace('/', '').replace('-', '')
+    if len(caracteres) != 14 or caracteres == caracteres[0] * 14:
+        return None
+    if _digito_cnpj(caracteres, _PESOS_CNPJ_1) != ord(caracteres[12]) - 48 or _digito_cnpj(caracteres, _PESOS_CNPJ_2) != ord(caracteres[13]) - 48:
+        return None
+    return f"{caracteres[:2]}.{caracteres[2:5]}.{caracteres[5:8]}/{caracteres[8:12]}-{caracteres[12:]}"
+
+
+# --- EM LOTE ---
+def tipo_documento(documento):
+    """'cnpj' se o documento tem 14 caracteres (sem a máscara), senão 'cpf'."""
+    sem_mascara = _MASCARA.sub('', documento or '')
+    return "cnpj" if len(sem_mascara) == 14 else "cpf"
+
+def validar_documentos(documentos, tipo=None):
+    """Valida e formata uma coluna inteira de documentos (importações, auditorias da base).
+
+    'tipo' é "cpf", "cnpj" ou None para decidir documento a documento pelo
+    tamanho. Devolve uma lista na mesma ordem, com o documento formatado ou
+    None onde ele é inválido. Repetidos na coluna são validados uma vez só.
+    """
+    validadores = {"cpf": validar_e_formatar_cpf, "cnpj": validar_e_formatar_cnpj}
+    resultados = {}
+    formatados = []
+    for documento in documentos:
+        chave = (tipo or tipo_documento(documento), documento)
+        if chave not in resultados:
+            resultados[chave] = validadores[chave[0]](documento)
+        formatados.append(resultados[chave])
+    return formatados